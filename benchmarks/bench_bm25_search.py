@@ -0,0 +1,72 @@
+"""
+Latency of LF1's local BM25 fallback index on a synthetic restaurant catalog.
+
+Usage: python benchmarks/bench_bm25_search.py [catalog_size]
+"""
+import gzip
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+import lambda_loader  # noqa: F401  (puts lambdas/ on sys.path)
+from bm25_index import BM25Index
+from search_snapshot import SNAPSHOT_VERSION
+
+CUISINES = ["pizza", "chinese", "mexican", "sushi", "indian", "thai", "burgers", "vegan",
+            "korean", "italian", "greek", "ramen", "bbq", "seafood", "french", "deli"]
+WORDS = ["golden", "dragon", "joe's", "little", "house", "kitchen", "express", "garden",
+         "palace", "corner", "brothers", "street", "shack", "grill", "bistro", "cafe",
+         "royal", "spicy", "happy", "lucky", "bamboo", "fire", "harbor", "village"]
+
+
+def synthetic_rows(count, rng):
+    rows = []
+    for i in range(count):
+        cuisine = rng.choice(CUISINES)
+        name = " ".join(rng.sample(WORDS, rng.randint(1, 3)) + [cuisine if rng.random() < 0.3 else str(i)])
+        rows.append([f"r{i:06d}", name.title(), cuisine, f"{i} Broadway, New York, NY",
+                     40.7 + rng.random() / 10, -74.0 + rng.random() / 10])
+    return rows
+
+
+def percentile(samples, fraction):
+    return sorted(samples)[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def main():
+    catalog_size = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    rng = random.Random(42)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "restaurants_snapshot.json.gz")
+        with gzip.open(path, "wt", encoding="utf-8") as snapshot_file:
+            json.dump({"version": SNAPSHOT_VERSION,
+                       "fields": ["restaurant_id", "name", "cuisine", "address", "lat", "lon"],
+                       "rows": synthetic_rows(catalog_size, rng)}, snapshot_file, separators=(",", ":"))
+        snapshot_bytes = os.path.getsize(path)
+
+        started = time.perf_counter()
+        index = BM25Index.from_snapshot(path)
+        load_ms = (time.perf_counter() - started) * 1000
+
+    queries = [("cuisine", rng.choice(CUISINES)) for _ in range(500)]
+    queries += [("name", " ".join(rng.sample(WORDS, 2))) for _ in range(500)]
+
+    print(f"catalog: {catalog_size} restaurants, snapshot {snapshot_bytes / 1024:.0f} KiB, load {load_ms:.1f} ms")
+    for field in ("cuisine", "name"):
+        samples = []
+        for query_field, text in queries:
+            if query_field != field:
+                continue
+            started = time.perf_counter()
+            index.search(text, field, 10)
+            samples.append((time.perf_counter() - started) * 1000)
+        print(f"{field:<8} p50 {statistics.median(samples):.3f} ms  p99 {percentile(samples, 0.99):.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
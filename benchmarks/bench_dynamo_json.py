@@ -0,0 +1,122 @@
+"""
+Serialization cost of DynamoDB items: the old per-handler converters
+(copy the item with decimal_to_float / convert_decimal, then json.dumps)
+against the shared single-pass dynamo_json encoder.
+
+Usage: python benchmarks/bench_dynamo_json.py [menu_items] [orders]
+"""
+import json
+import random
+import sys
+import time
+from decimal import Decimal
+
+import lambda_loader  # noqa: F401  (puts lambdas/ on sys.path)
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+from dynamo_json import dumps, dumps_typed
+
+
+# Converters as they were in LF3/LEX and LF9-1 before the shared module
+def decimal_to_float(obj):
+    if isinstance(obj, list):
+        return [decimal_to_float(i) for i in obj]
+    elif isinstance(obj, dict):
+        return {k: decimal_to_float(v) for k, v in obj.items()}
+    elif isinstance(obj, Decimal):
+        return float(obj)
+    else:
+        return obj
+
+
+def convert_decimal(obj):
+    if isinstance(obj, list):
+        return [convert_decimal(i) for i in obj]
+    elif isinstance(obj, dict):
+        return {k: convert_decimal(v) for k, v in obj.items()}
+    elif isinstance(obj, Decimal):
+        return int(obj) if obj % 1 == 0 else float(obj)
+    else:
+        return obj
+
+
+def deserialize(item):
+    deserializer = TypeDeserializer()
+    return {name: deserializer.deserialize(value) for name, value in item.items()}
+
+
+# LF9-2's encoder
+class DecimalEncoder(json.JSONEncoder):
+    def default(self, obj):
+        if isinstance(obj, Decimal):
+            return str(obj)
+        return super(DecimalEncoder, self).default(obj)
+
+
+def synthetic_menu(count, rng):
+    return [{
+        "item_id": f"item-{i:06d}",
+        "item_name": f"Dish {i}",
+        "restaurant_id": "r000001",
+        "restaurant_name": "Golden Dragon",
+        "price": Decimal(f"{rng.randint(3, 40)}.{rng.choice(['00', '50', '95'])}")
+    } for i in range(count)]
+
+
+def synthetic_orders(count, rng):
+    return [{
+        "order_id": f"order-{i:06d}",
+        "user_id": "user-1",
+        "restaurant_id": f"r{rng.randint(1, 500):06d}",
+        "status": "DELIVERED",
+        "timestamp": f"2024-12-{rng.randint(1, 28):02d}T12:00:00",
+        "total_price": Decimal(f"{rng.randint(10, 200)}.{rng.randint(0, 99):02d}"),
+        "items": [{"item_id": f"item-{rng.randint(0, 9999):06d}", "quantity": Decimal(rng.randint(1, 4))}
+                  for _ in range(rng.randint(1, 8))],
+        "tags": {"lunch", "card"}
+    } for i in range(count)]
+
+
+def best_of(function, value, repeat=7):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function(value)
+        timings.append((time.perf_counter() - started) * 1000)
+    return min(timings)
+
+
+def report(label, baseline, shared):
+    print(f"{label:<34} before {baseline:8.2f} ms  after {shared:8.2f} ms  ({baseline / shared:.1f}x)")
+
+
+def main():
+    menu_items = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    orders = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    rng = random.Random(42)
+    menu = synthetic_menu(menu_items, rng)
+    history = synthetic_orders(orders, rng)
+    for order in history:
+        order["tags"] = sorted(order["tags"])  # the old converters cannot encode sets
+
+    print(f"menu: {menu_items} items, order history: {orders} orders")
+    report("menu (decimal_to_float + dumps)",
+           best_of(lambda items: json.dumps({"menu": decimal_to_float(items)}), menu),
+           best_of(lambda items: dumps({"menu": items}), menu))
+    report("orders (convert_decimal + dumps)",
+           best_of(lambda items: json.dumps({"orders": convert_decimal(items)}), history),
+           best_of(lambda items: dumps({"orders": items}), history))
+    report("orders (DecimalEncoder)",
+           best_of(lambda items: json.dumps({"orders": items}, cls=DecimalEncoder), history),
+           best_of(lambda items: dumps({"orders": items}), history))
+
+    # Low-level items, as returned by boto3.client('dynamodb') and stream images
+    serializer = TypeSerializer()
+    typed_menu = [{name: serializer.serialize(value) for name, value in item.items()} for item in menu]
+    report("typed menu (deserialize + dumps)",
+           best_of(lambda items: json.dumps([decimal_to_float(deserialize(item)) for item in items]),
+                   typed_menu),
+           best_of(lambda items: "[" + ",".join(dumps_typed(item) for item in items) + "]", typed_menu))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Typo-tolerant name lookup: trigram candidate index vs the current token match.
+
+The baseline is the BM25 index, which matches whole tokens the same way the
+OpenSearch `match` query in LF1 does, so a misspelled word finds nothing.
+
+Usage: python benchmarks/bench_fuzzy_search.py [catalog_size] [queries]
+"""
+import random
+import statistics
+import sys
+import time
+
+import lambda_loader  # noqa: F401  (puts lambdas/ on sys.path)
+from bm25_index import BM25Index
+from trigram_index import TrigramIndex
+
+SYLLABLES = ["chi", "po", "tle", "ka", "ra", "mi", "zo", "lu", "ban", "do", "sha", "ke", "tor",
+             "vi", "nel", "qua", "ri", "sto", "mar", "gen", "ta", "fu", "yo", "bel", "cor", "das"]
+SUFFIXES = ["", "", "Grill", "Kitchen", "Pizza", "Cafe", "Express", "Noodle Bar", "Taqueria", "Deli"]
+LETTERS = "abcdefghijklmnopqrstuvwxyz"
+
+
+def synthetic_catalog(count, rng):
+    names = set()
+    while len(names) < count:
+        brand = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).title()
+        if rng.random() < 0.3:
+            brand += " " + "".join(rng.choice(SYLLABLES) for _ in range(2)).title()
+        names.add(f"{brand} {rng.choice(SUFFIXES)}".strip())
+    return [{"restaurant_id": f"r{i:06d}", "name": name} for i, name in enumerate(sorted(names))]
+
+
+def misspell(word, rng):
+    """One random edit: drop, duplicate, substitute or transpose a letter."""
+    position = rng.randrange(1, len(word) - 1)
+    edit = rng.choice(("drop", "double", "substitute", "transpose"))
+    if edit == "drop":
+        return word[:position] + word[position + 1:]
+    if edit == "double":
+        return word[:position] + word[position] + word[position:]
+    if edit == "substitute":
+        return word[:position] + rng.choice(LETTERS) + word[position + 1:]
+    return word[:position - 1] + word[position] + word[position - 1] + word[position + 1:]
+
+
+def percentile(samples, fraction):
+    return sorted(samples)[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def evaluate(label, search, queries):
+    top1 = top5 = 0
+    samples = []
+    for query, expected in queries:
+        started = time.perf_counter()
+        results = search(query)
+        samples.append((time.perf_counter() - started) * 1000)
+        ids = [doc_id for doc_id, _, _ in results]
+        top1 += bool(ids) and ids[0] == expected
+        top5 += expected in ids
+    print(f"{label:<14}{top1 / len(queries):>8.1%}{top5 / len(queries):>8.1%}"
+          f"{statistics.median(samples):>10.3f}{percentile(samples, 0.99):>10.3f}")
+
+
+def main():
+    catalog_size = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    query_count = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    rng = random.Random(7)
+    catalog = synthetic_catalog(catalog_size, rng)
+
+    started = time.perf_counter()
+    match_index = BM25Index.from_documents(catalog, fields=("name",))
+    match_build = time.perf_counter() - started
+    started = time.perf_counter()
+    trigram_index = TrigramIndex.from_documents(catalog)
+    trigram_build = time.perf_counter() - started
+
+    # Misspell the brand (first word) of random restaurants, e.g. "Chipotle Grill" -> "Chipolte Grill"
+    queries = []
+    for document in rng.sample(catalog, query_count):
+        words = document["name"].split()
+        words[0] = misspell(words[0].lower(), rng)
+        queries.append((" ".join(words), document["restaurant_id"]))
+
+    print(f"catalog: {catalog_size} restaurants, {query_count} misspelled queries")
+    print(f"build: match {match_build:.2f} s, trigram {trigram_build:.2f} s")
+    print(f"{'engine':<14}{'top1':>8}{'top5':>8}{'p50 ms':>10}{'p99 ms':>10}")
+    evaluate("match", lambda query: match_index.search(query, "name", 5), queries)
+    evaluate("trigram", lambda query: trigram_index.search(query, 5), queries)
+
+
+if __name__ == "__main__":
+    main()
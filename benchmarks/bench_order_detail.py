@@ -0,0 +1,127 @@
+"""
+Order detail reads: the old serial chain in LF9-1 (order, restaurant and
+delivery get_item, then one Menu_Items get_item per line) against the
+handler's concurrent fan-out with a single BatchGetItem for the menu items,
+and against an order that carries its own line snapshot (placed by LF7).
+
+The in-memory tables sleep for a fixed round-trip latency per call, so wall
+time counts round trips.
+
+Usage: python benchmarks/bench_order_detail.py [order_lines] [latency_ms]
+"""
+import json
+import sys
+import time
+from decimal import Decimal
+
+from lambda_loader import load_lambda
+
+lf9_1 = load_lambda('LF9-1-view-an-order.py')
+
+
+class FakeTable:
+    def __init__(self, rows, key, latency, calls):
+        self.rows = rows
+        self.key = key
+        self.latency = latency
+        self.calls = calls
+
+    def get_item(self, Key):
+        self.calls['get_item'] += 1
+        time.sleep(self.latency)
+        item = self.rows.get(Key[self.key])
+        return {'Item': dict(item)} if item else {}
+
+
+class FakeDynamoDB:
+    def __init__(self, tables, latency):
+        self.tables = tables
+        self.latency = latency
+        self.calls = {'get_item': 0, 'batch_get_item': 0}
+
+    def Table(self, name):
+        rows, key = self.tables[name]
+        return FakeTable(rows, key, self.latency, self.calls)
+
+    def batch_get_item(self, RequestItems):
+        self.calls['batch_get_item'] += 1
+        time.sleep(self.latency)
+        responses = {}
+        for table_name, request in RequestItems.items():
+            rows, key = self.tables[table_name]
+            responses[table_name] = [dict(rows[k[key]]) for k in request['Keys'] if k[key] in rows]
+        return {'Responses': responses}
+
+
+# LF9-1 before the fan-out
+def serial_view(dynamodb, order_id):
+    order = dynamodb.Table('Order').get_item(Key={'order_id': order_id})['Item']
+    restaurant = dynamodb.Table('Restaurant').get_item(Key={'restaurant_id': order['restaurant_id']}).get('Item', {})
+    delivery = dynamodb.Table('Delivery_Tracking').get_item(Key={'order_id': order_id}).get('Item')
+    items = []
+    for item in order['items']:
+        menu_item = dynamodb.Table('Menu_Items').get_item(Key={'item_id': item['item_id']}).get('Item')
+        if menu_item:
+            items.append({'item_id': item['item_id'], 'item_name': menu_item['item_name'],
+                          'price': menu_item['price'], 'quantity': item['quantity']})
+    return order, restaurant, delivery, items
+
+
+def build_tables(lines):
+    menu = {f"i{i:03d}": {'item_id': f"i{i:03d}", 'item_name': f"Dish {i}", 'price': Decimal('9.50')}
+            for i in range(lines)}
+    order = {'order_id': 'o1', 'user_id': 'u1', 'restaurant_id': 'r1', 'status': 'PLACED',
+             'timestamp': '2024-12-01T12:00:00', 'total_price': Decimal('9.50') * lines,
+             'items': [{'item_id': item_id, 'quantity': Decimal(1)} for item_id in menu]}
+    snapshot_order = dict(order, order_id='o2', restaurant_name='Golden Dragon', restaurant_address='1 Main St',
+                          items=[{'item_id': item_id, 'item_name': item['item_name'], 'price': item['price'],
+                                  'quantity': Decimal(1), 'line_total': item['price']}
+                                 for item_id, item in menu.items()])
+    return {
+        'Order': ({'o1': order, 'o2': snapshot_order}, 'order_id'),
+        'Restaurant': ({'r1': {'restaurant_id': 'r1', 'name': 'Golden Dragon', 'address': '1 Main St'}},
+                       'restaurant_id'),
+        'Delivery_Tracking': ({order_id: {'order_id': order_id, 'status': 'ON_THE_WAY'} for order_id in ('o1', 'o2')},
+                              'order_id'),
+        'Menu_Items': (menu, 'item_id'),
+    }
+
+
+def timed(function):
+    started = time.perf_counter()
+    result = function()
+    return (time.perf_counter() - started) * 1000, result
+
+
+def main():
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 10) / 1000
+    fake = FakeDynamoDB(build_tables(lines), latency)
+
+    serial_ms, (_, _, _, serial_items) = timed(lambda: serial_view(fake, 'o1'))
+    serial_calls = dict(fake.calls)
+
+    fake.calls.update(get_item=0, batch_get_item=0)
+    lf9_1.dynamodb = fake
+    lf9_1.order_table = fake.Table('Order')
+    lf9_1.restaurant_table = fake.Table('Restaurant')
+    lf9_1.delivery_table = fake.Table('Delivery_Tracking')
+    event = {'pathParameters': {'orderId': 'o1'}}
+    lf9_1.print = lambda *args, **kwargs: None
+    fanout_ms, response = timed(lambda: lf9_1.lambda_handler(event, None))
+    fanout_calls = dict(fake.calls)
+    assert len(json.loads(response['body'])['order_info']['items']) == len(serial_items) == lines
+
+    fake.calls.update(get_item=0, batch_get_item=0)
+    snapshot_ms, response = timed(lambda: lf9_1.lambda_handler({'pathParameters': {'orderId': 'o2'}}, None))
+    snapshot_calls = dict(fake.calls)
+    assert len(json.loads(response['body'])['order_info']['items']) == lines
+
+    print(f"order with {lines} lines, {latency * 1000:.0f} ms per DynamoDB call:")
+    print(f"  serial get_item chain   {serial_ms:7.1f} ms  calls {serial_calls}")
+    print(f"  parallel + BatchGetItem {fanout_ms:7.1f} ms  calls {fanout_calls}")
+    print(f"  order line snapshot     {snapshot_ms:7.1f} ms  calls {snapshot_calls}")
+
+
+if __name__ == "__main__":
+    main()
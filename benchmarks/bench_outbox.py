@@ -0,0 +1,220 @@
+"""
+Order placement with the transactional outbox, run against in-memory
+stand-ins for DynamoDB (transactions, the outbox stream, scans and batch
+deletes) and SQS, with failures injected.
+
+1. The old LF7 flow (put_item, then send_message), crashing between the two
+   calls at the injected rate: orders that never reach the queue.
+2. LF7 with put_with_outbox plus the LF7b relay (stream batches of 100,
+   retried twice like an event source mapping's MaximumRetryAttempts, from
+   the lowest failed record on so sent records are replayed, then the
+   scheduled sweep for what the stream gave up on), with failed
+   transactions, failed SendMessageBatch calls and failed batch entries:
+   every stored order is published exactly once, no message exists without
+   an order, and SQS calls drop to about one per 10 orders.
+
+Usage: python benchmarks/bench_outbox.py [orders] [failure_rate]
+"""
+import json
+import random
+import sys
+from contextlib import contextmanager
+
+from boto3.dynamodb.types import TypeDeserializer
+from botocore.exceptions import ClientError
+
+from lambda_loader import load_lambda  # puts lambdas/ on sys.path
+import bench_pricing
+import menu_snapshot
+import outbox
+
+lf7 = load_lambda('LF7-place-order.py')
+lf7b = load_lambda('LF7b-relay-order-outbox.py')
+deserializer = TypeDeserializer()
+
+STREAM_BATCH_SIZE = 100
+STREAM_MAX_RETRIES = 2
+
+
+class InjectedCrash(Exception):
+    pass
+
+
+class FakeDynamoDBClient:
+    """transact_write_items over dict tables, recording outbox inserts as stream records."""
+
+    def __init__(self, tables, rng, failure_rate):
+        self.tables = tables
+        self.rng = rng
+        self.failure_rate = failure_rate
+        self.stream = []
+        self.sequence = 0
+
+    def transact_write_items(self, TransactItems):
+        if self.rng.random() < self.failure_rate:
+            raise ClientError({'Error': {'Code': 'TransactionCanceledException', 'Message': 'injected'}},
+                              'TransactWriteItems')
+        puts = [(put['TableName'], put['Item']) for put in (item['Put'] for item in TransactItems)]
+        # All or nothing: apply only after the whole transaction is accepted
+        for table_name, item in puts:
+            row = {name: deserializer.deserialize(value) for name, value in item.items()}
+            self.tables.setdefault(table_name, {})[row.get('message_id') or row.get('order_id')] = row
+            if table_name == outbox.OUTBOX_TABLE_NAME:
+                self.sequence += 1
+                self.stream.append({'eventName': 'INSERT',
+                                    'dynamodb': {'SequenceNumber': str(self.sequence), 'NewImage': item}})
+
+
+class FakeOutboxTable:
+    """Outbox rows behind both the Table (scan, batch deletes) and batch_get_item."""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def batch_get_item(self, RequestItems):
+        request = RequestItems[outbox.OUTBOX_TABLE_NAME]
+        return {'Responses': {outbox.OUTBOX_TABLE_NAME: [
+            {'message_id': key['message_id']} for key in request['Keys'] if key['message_id'] in self.rows
+        ]}}
+
+    def scan(self, FilterExpression, ExpressionAttributeValues, **kwargs):
+        cutoff = ExpressionAttributeValues[':cutoff']
+        return {'Items': [dict(row) for row in self.rows.values() if row['created_at'] < cutoff]}
+
+    @contextmanager
+    def batch_writer(self):
+        yield self
+
+    def delete_item(self, Key):
+        self.rows.pop(Key['message_id'], None)
+
+
+class FakeSQS:
+    def __init__(self, rng, failure_rate):
+        self.rng = rng
+        self.failure_rate = failure_rate
+        self.calls = 0
+        self.delivered = []
+
+    def send_message(self, QueueUrl, MessageBody, **kwargs):
+        self.calls += 1
+        self.delivered.append(json.loads(MessageBody))
+
+    def send_message_batch(self, QueueUrl, Entries):
+        self.calls += 1
+        assert len(Entries) <= 10
+        if self.rng.random() < self.failure_rate:
+            raise ClientError({'Error': {'Code': 'ServiceUnavailable', 'Message': 'injected'}}, 'SendMessageBatch')
+        failed = []
+        for entry in Entries:
+            if self.rng.random() < self.failure_rate:
+                failed.append({'Id': entry['Id'], 'Code': 'InternalError', 'Message': 'injected', 'SenderFault': False})
+            else:
+                self.delivered.append(json.loads(entry['MessageBody']))
+        return {'Successful': [], 'Failed': failed}
+
+
+def order_events(count, menus, rng):
+    restaurant_ids = list(menus)
+    events = []
+    for i in range(count):
+        restaurant_id = rng.choice(restaurant_ids)
+        items = [{'item_id': item['item_id'], 'quantity': rng.randint(1, 3)}
+                 for item in rng.sample(menus[restaurant_id], 3)]
+        events.append({'body': json.dumps({'restaurant_id': restaurant_id, 'items': items}),
+                       'requestContext': {'authorizer': {'claims': {'sub': f"user-{i % 50}"}}}})
+    return events
+
+
+def old_flow(count, rng, failure_rate):
+    """LF7 before the outbox: the process can die between the put and the send."""
+    orders, sqs = {}, FakeSQS(rng, 0)
+    for i in range(count):
+        try:
+            orders[f"o{i}"] = {'order_id': f"o{i}"}
+            if rng.random() < failure_rate:
+                raise InjectedCrash()
+            sqs.send_message(QueueUrl='', MessageBody=json.dumps({'order_id': f"o{i}"}))
+        except InjectedCrash:
+            pass
+    published = {message['order_id'] for message in sqs.delivered}
+    return sqs.calls, len(set(orders) - published)
+
+
+def outbox_flow(count, rng, failure_rate):
+    menus = bench_pricing.synthetic_menus(20, rng)
+    menu_snapshot.dynamodb = bench_pricing.FakeDynamoDB(menus)
+    tables = {}
+    client = FakeDynamoDBClient(tables, rng, failure_rate)
+    outbox.dynamodb_client = client
+    outbox.dynamodb = outbox.outbox_table = FakeOutboxTable(tables.setdefault(outbox.OUTBOX_TABLE_NAME, {}))
+    lf7.restaurant_table = type('Restaurants', (), {'get_item': lambda self, **kwargs: {'Item': {'name': 'R'}}})()
+    sqs = FakeSQS(rng, failure_rate)
+    lf7b.sqs = sqs
+    lf7.print = lf7b.print = outbox.print = lambda *args, **kwargs: None
+
+    statuses = [lf7.lambda_handler(event, None)['statusCode'] for event in order_events(count, menus, rng)]
+
+    # Stream delivery: a batch with failures is retried up to STREAM_MAX_RETRIES times
+    # from its lowest failed sequence number, replaying every later record, then skipped
+    retries = replayed = 0
+    pending = client.stream
+    attempts = 0
+    while pending:
+        batch, pending = pending[:STREAM_BATCH_SIZE], pending[STREAM_BATCH_SIZE:]
+        failures = {failure['itemIdentifier'] for failure in lf7b.lambda_handler({'Records': batch}, None)['batchItemFailures']}
+        if failures and attempts < STREAM_MAX_RETRIES:
+            retries += 1
+            attempts += 1
+            lowest = min(failures, key=int)
+            resume = next(i for i, record in enumerate(batch) if record['dynamodb']['SequenceNumber'] == lowest)
+            replayed += sum(record['dynamodb']['SequenceNumber'] not in failures for record in batch[resume:])
+            pending = batch[resume:] + pending
+        else:
+            attempts = 0
+    stream_leftover = len(tables[outbox.OUTBOX_TABLE_NAME])
+
+    # What the stream gave up on is picked up by the scheduled sweep; every record is old enough here
+    outbox.SWEEP_AFTER_SECONDS = -1
+    sweeps = 0
+    while tables[outbox.OUTBOX_TABLE_NAME] and sweeps < 20:
+        lf7b.lambda_handler({}, None)
+        sweeps += 1
+
+    stored = set(tables.get(lf7.ORDER_TABLE_NAME, {}))
+    published = [message['order_id'] for message in sqs.delivered]
+    return {
+        'placed': statuses.count(200),
+        'failed_requests': statuses.count(500),
+        'stored': len(stored),
+        'unpublished': len(stored - set(published)),
+        'messages_without_order': len(set(published) - stored),
+        'duplicate_messages': len(published) - len(set(published)),
+        'sqs_calls': sqs.calls,
+        'stream_retries': retries,
+        'replayed_records': replayed,
+        'left_for_sweep': stream_leftover,
+        'sweeps': sweeps,
+        'outbox_left': len(tables[outbox.OUTBOX_TABLE_NAME])
+    }
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    failure_rate = float(sys.argv[2]) if len(sys.argv) > 2 else 0.05
+    old_calls, lost = old_flow(count, random.Random(7), failure_rate)
+    result = outbox_flow(count, random.Random(7), failure_rate)
+
+    print(f"{count} orders, {failure_rate:.0%} injected failure rate")
+    print(f"  put_item + send_message: {old_calls} SQS calls, {lost} stored orders never published")
+    print(f"  outbox + relay:          {result['sqs_calls']} SQS calls, {result['unpublished']} stored orders never published")
+    print(f"    {result}")
+    assert result['placed'] == result['stored']
+    assert result['unpublished'] == 0 and result['messages_without_order'] == 0 and result['outbox_left'] == 0
+    assert result['duplicate_messages'] == 0
+    if result['left_for_sweep']:
+        assert result['sweeps'] > 0
+
+
+if __name__ == "__main__":
+    main()
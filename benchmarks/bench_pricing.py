@@ -0,0 +1,163 @@
+"""
+Integer-cents pricing against the Decimal(str(...)) arithmetic it replaces.
+
+1. One 1k-line cart: old LF4 calculate_total_price vs pricing.price_lines.
+2. Bulk re-pricing of many carts from menus: a get_item per cart line with
+   Decimal math vs pricing.reprice_carts (one BatchGetItem of menu snapshots
+   per 100 restaurants, each menu parsed once).
+
+Usage: python benchmarks/bench_pricing.py [cart_lines] [carts] [restaurants]
+"""
+import random
+import sys
+import time
+from array import array
+from decimal import Decimal
+
+import lambda_loader  # noqa: F401  (puts lambdas/ on sys.path)
+import menu_snapshot
+import pricing
+from dynamo_json import dumps
+
+MENU_SIZE = 100
+
+# Typical in-region DynamoDB round trip, for the network estimate (the fakes are free)
+ROUND_TRIP_MS = 5
+
+
+# LF4's total before the pricing module
+def calculate_total_price(item_list):
+    return sum(Decimal(str(item['item_quantity'])) * Decimal(str(item['item_price'])) for item in item_list)
+
+
+class FakeTable:
+    def __init__(self, rows, key, calls):
+        self.rows = rows
+        self.key = key
+        self.calls = calls
+
+    def get_item(self, Key):
+        self.calls['get_item'] += 1
+        item = self.rows.get(Key[self.key])
+        return {'Item': dict(item)} if item else {}
+
+
+class FakeDynamoDB:
+    """Menu_Items keyed by item_id and Menu_Snapshots keyed by restaurant_id."""
+
+    def __init__(self, menus):
+        self.calls = {'get_item': 0, 'batch_get_item': 0}
+        self.menu_items = {item['item_id']: item for menu in menus.values() for item in menu}
+        self.snapshots = {
+            restaurant_id: {'restaurant_id': restaurant_id, 'version': Decimal(1), 'item_count': Decimal(len(menu)),
+                            'menu_json': dumps({'menu': menu, 'version': 1})}
+            for restaurant_id, menu in menus.items()
+        }
+
+    def Table(self, name):
+        if name == menu_snapshot.SNAPSHOT_TABLE_NAME:
+            return FakeTable(self.snapshots, 'restaurant_id', self.calls)
+        return FakeTable(self.menu_items, 'item_id', self.calls)
+
+    def batch_get_item(self, RequestItems):
+        self.calls['batch_get_item'] += 1
+        (table_name, request), = RequestItems.items()
+        rows = [self.snapshots[key['restaurant_id']] for key in request['Keys'] if key['restaurant_id'] in self.snapshots]
+        return {'Responses': {table_name: [dict(row) for row in rows]}}
+
+
+def synthetic_menus(restaurants, rng):
+    return {
+        f"r{r:05d}": [{'item_id': f"r{r:05d}-i{i:03d}", 'item_name': f"Dish {i}", 'restaurant_id': f"r{r:05d}",
+                       'price': Decimal(f"{rng.randint(3, 40)}.{rng.choice(['00', '25', '50', '95'])}")}
+                      for i in range(MENU_SIZE)]
+        for r in range(restaurants)
+    }
+
+
+def timed(function, repeat=5):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def bench_large_cart(lines, rng):
+    item_list = [{'item_id': f"i{i}", 'item_name': f"Dish {i}", 'item_quantity': rng.randint(1, 5),
+                  'item_price': float(f"{rng.randint(3, 40)}.{rng.choice(['00', '25', '50', '95'])}")}
+                 for i in range(lines)]
+    unit_cents = array('q', (pricing.to_cents(item['item_price']) for item in item_list))
+    quantities = array('q', (item['item_quantity'] for item in item_list))
+
+    before_ms, before = timed(lambda: calculate_total_price(item_list))
+    convert_ms, _ = timed(lambda: price_from_lines(item_list))
+    after_ms, after = timed(lambda: pricing.price_lines(unit_cents, quantities, tax_ppm=88750, delivery_fee_cents=299))
+    assert pricing.to_cents(before) == after['subtotal']
+    print(f"{lines}-line cart: Decimal(str()) total {before_ms:.3f} ms | "
+          f"cents from cart lines {convert_ms:.3f} ms | cents arrays (subtotal+tax+fees) {after_ms:.3f} ms")
+
+
+def price_from_lines(item_list):
+    return pricing.price_lines([pricing.to_cents(item['item_price']) for item in item_list],
+                               [item['item_quantity'] for item in item_list])
+
+
+def bench_bulk_repricing(carts, restaurants, rng):
+    menus = synthetic_menus(restaurants, rng)
+    restaurant_ids = list(menus)
+    orders = []
+    for _ in range(carts):
+        restaurant_id = rng.choice(restaurant_ids)
+        orders.append((restaurant_id, [{'item_id': item['item_id'], 'quantity': rng.randint(1, 3)}
+                                       for item in rng.sample(menus[restaurant_id], 5)]))
+
+    fake = FakeDynamoDB(menus)
+    menu_items = fake.Table('Menu_Items')
+
+    def per_item_lookup():
+        totals = []
+        for _, items in orders:
+            total = Decimal(0)
+            for item in items:
+                price = menu_items.get_item(Key={'item_id': item['item_id']})['Item']['price']
+                total += Decimal(str(item['quantity'])) * Decimal(str(price))
+            totals.append(total)
+        return totals
+
+    def batched():
+        menu_snapshot.snapshot_cache.clear()
+        pricing.price_cache.clear()
+        return pricing.reprice_carts(orders)
+
+    menu_snapshot.dynamodb = fake
+    fake.calls.update(get_item=0, batch_get_item=0)
+    before_ms, before = timed(per_item_lookup, repeat=1)
+    before_calls = dict(fake.calls)
+    fake.calls.update(get_item=0, batch_get_item=0)
+    after_ms, after = timed(batched, repeat=1)
+    after_calls = dict(fake.calls)
+    warm_ms, _ = timed(lambda: pricing.reprice_carts(orders), repeat=3)
+    assert [pricing.to_cents(total) for total in before] == [priced['subtotal'] for priced in after]
+
+    print(f"{carts} carts over {restaurants} restaurants ({MENU_SIZE}-item menus):")
+    print(f"  get_item per line + Decimal   {before_ms:8.1f} ms  calls {before_calls}")
+    print(f"  reprice_carts (cold cache)    {after_ms:8.1f} ms  calls {after_calls}")
+    print(f"  reprice_carts (warm cache)    {warm_ms:8.1f} ms  calls 0")
+    print(f"  + network at {ROUND_TRIP_MS} ms/call: {sum(before_calls.values()) * ROUND_TRIP_MS / 1000:.0f} s "
+          f"vs {sum(after_calls.values()) * ROUND_TRIP_MS} ms")
+
+
+def main():
+    cart_lines = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    carts = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    restaurants = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+    rng = random.Random(42)
+    bench_large_cart(cart_lines, rng)
+    bench_bulk_repricing(carts, restaurants, rng)
+
+
+if __name__ == "__main__":
+    main()
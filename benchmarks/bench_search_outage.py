@@ -0,0 +1,93 @@
+"""
+LF1 search during an OpenSearch outage, with the cluster replaced by a stub
+that times out every request and the local BM25 index built from a synthetic
+catalog.
+
+The stub fails instantly, so the time a real timeout would cost is modelled:
+each attempt waits the full (connect, read) SEARCH_TIMEOUT. Before, every
+search made 1 + 2 retried attempts; now it makes one, and for
+SEARCH_BREAKER_SECONDS afterwards searches go straight to the local index.
+
+Usage: python benchmarks/bench_search_outage.py [searches] [catalog_size]
+"""
+import io
+import json
+import random
+import statistics
+import sys
+import time
+from contextlib import redirect_stdout
+
+import requests
+
+from lambda_loader import load_lambda  # puts lambdas/ on sys.path
+import opensearch_client
+from bench_bm25_search import CUISINES, synthetic_rows
+from bm25_index import BM25Index
+
+lf1 = load_lambda("LF1-Restaurant-search.py")
+lf1.print = lambda *args, **kwargs: None
+
+OLD_ATTEMPTS_PER_SEARCH = 3  # Retry(total=2) on the shared session, timeouts included
+
+
+class Cluster:
+    def __init__(self):
+        self.up = False
+        self.attempts = 0
+
+    def request(self, method, url, data=None, **kwargs):
+        self.attempts += 1
+        if not self.up:
+            raise requests.ConnectTimeout("stub: cluster unreachable")
+        response = requests.Response()
+        response.status_code = 200
+        response._content = json.dumps({"hits": {"hits": [{"_id": "r000001", "_score": 1.0,
+                                                          "sort": [1.0, "r000001"]}]}}).encode()
+        return response
+
+
+def search(query):
+    with redirect_stdout(io.StringIO()):
+        response = lf1.lambda_handler({"body": json.dumps({"type": "cuisineType", "query": query})}, None)
+    return json.loads(response["body"])
+
+
+def main():
+    searches = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    catalog_size = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    rng = random.Random(9)
+    fields = ["restaurant_id", "name", "cuisine", "address", "lat", "lon"]
+    lf1.local_index = BM25Index.from_documents(dict(zip(fields, row)) for row in synthetic_rows(catalog_size, rng))
+
+    cluster = Cluster()
+    opensearch_client.session.request = cluster.request
+    opensearch_client.fail_fast_session.request = cluster.request
+
+    samples = []
+    for _ in range(searches):
+        started = time.perf_counter()
+        result = search(rng.choice(CUISINES))
+        samples.append((time.perf_counter() - started) * 1000)
+        assert result["restaurantIds"], "outage search returned nothing"
+
+    per_attempt = sum(lf1.SEARCH_TIMEOUT)
+    old_wait = searches * OLD_ATTEMPTS_PER_SEARCH * per_attempt
+    new_wait = cluster.attempts * per_attempt
+    print(f"{searches} searches while OpenSearch times out ({per_attempt:.0f} s per attempt), "
+          f"{catalog_size}-restaurant local index:")
+    print(f"  before: {searches * OLD_ATTEMPTS_PER_SEARCH} OpenSearch attempts, ~{old_wait:.0f} s waiting on timeouts")
+    print(f"  now:    {cluster.attempts} attempt(s), ~{new_wait:.0f} s waiting; the rest served locally, "
+          f"p50 {statistics.median(samples[1:]):.2f} ms  max {max(samples[1:]):.2f} ms")
+    assert cluster.attempts == 1
+
+    # Once the breaker window has passed, the next search tries OpenSearch again
+    cluster.up = True
+    lf1.opensearch_down_until = 0.0
+    search("pizza")
+    assert cluster.attempts == 2 and not lf1.search_breaker_open()
+    print(f"  after {lf1.SEARCH_BREAKER_SECONDS} s the next search goes back to OpenSearch")
+
+
+if __name__ == "__main__":
+    main()
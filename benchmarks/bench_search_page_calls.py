@@ -0,0 +1,102 @@
+"""
+Counts the downstream calls needed to render one page of search results.
+
+before: LF1 returns restaurantIds, then the results page calls LF2 once per id
+after:  LF1 with hydrate=true returns the restaurant cards in one response
+
+Usage: python benchmarks/bench_search_page_calls.py
+"""
+import io
+import json
+from collections import Counter
+from contextlib import redirect_stdout
+
+from lambda_loader import load_lambda
+
+import opensearch_client
+
+PAGE_SIZE = 10
+
+RESTAURANTS = {
+    f"r{i}": {
+        "restaurant_id": f"r{i}",
+        "name": f"Pizza Place {i}",
+        "cuisine": "pizza",
+        "address": f"{i} Main St, New York, NY",
+        "coordinates": {"lat": 40.7 + i / 1000, "lon": -74.0 - i / 1000},
+    }
+    for i in range(PAGE_SIZE)
+}
+
+calls = Counter()
+
+
+class FakeResponse:
+    def __init__(self, payload):
+        self.payload = payload
+        self.status_code = 200
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+def fake_opensearch_request(method, url, data=None, **kwargs):
+    calls["opensearch"] += 1
+    if "/_doc/" in url:
+        restaurant_id = url.rsplit("/", 1)[1]
+        return FakeResponse({"_id": restaurant_id, "_source": dict(RESTAURANTS[restaurant_id])})
+
+    source = json.loads(data).get("_source")
+    hits = []
+    for restaurant_id, restaurant in RESTAURANTS.items():
+        hit = {"_id": restaurant_id, "_score": 1.0, "sort": [1.0, restaurant_id]}
+        if source:
+            hit["_source"] = {field: restaurant[field] for field in source}
+        hits.append(hit)
+    return FakeResponse({"hits": {"hits": hits}})
+
+
+class FakeLocationClient:
+    def search_place_index_for_position(self, IndexName, Position):
+        calls["location"] += 1
+        return {"Results": [{"Place": {"Label": "1 Main St, New York, NY"}}]}
+
+
+def invoke(module, body):
+    calls["api_gateway_lambda"] += 1
+    # Keep the handlers' logging out of the report
+    with redirect_stdout(io.StringIO()):
+        response = module.lambda_handler({"body": json.dumps(body)}, None)
+    return json.loads(response["body"])
+
+
+def render_page_before(lf1, lf2):
+    result = invoke(lf1, {"type": "cuisineType", "query": "pizza"})
+    return [invoke(lf2, {"restaurantId": restaurant_id})["restaurantDetails"]
+            for restaurant_id in result["restaurantIds"]]
+
+
+def render_page_after(lf1, lf2):
+    return invoke(lf1, {"type": "cuisineType", "query": "pizza", "hydrate": "true"})["restaurants"]
+
+
+def main():
+    lf1 = load_lambda("LF1-Restaurant-search.py")
+    lf2 = load_lambda("LF2-Restaurant-get.py")
+    opensearch_client.session.request = fake_opensearch_request
+    opensearch_client.fail_fast_session.request = fake_opensearch_request
+    lf2.location_client = FakeLocationClient()
+
+    print(f"{'flow':<8}{'cards':>7}{'api+lambda':>12}{'opensearch':>12}{'location':>10}{'total':>8}")
+    for label, render in (("before", render_page_before), ("after", render_page_after)):
+        calls.clear()
+        cards = render(lf1, lf2)
+        print(f"{label:<8}{len(cards):>7}{calls['api_gateway_lambda']:>12}{calls['opensearch']:>12}"
+              f"{calls['location']:>10}{sum(calls.values()):>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""
+Local harness for sqs_consumer and the two queue handlers built on it.
+
+1. Generic batch: records over several keys with simulated I/O latency. The
+   old serial loop against consume() for wall time and per-key ordering, then
+   with a few poison messages: the old loop fails the whole batch, consume()
+   reports only the affected records.
+2. LF8 with in-memory tables and SES: a poison message fails alone, and the
+   batch's users and restaurants are read with one BatchGetItem per table.
+3. LF8 against an order table that evaluates the state machine's condition:
+   a shuffled stream of status messages with duplicates and stale
+   redeliveries never moves an order backwards, and rejected messages are
+   acknowledged without delivery writes or emails.
+4. LF11c with an in-memory DynamoDB client: more requests than seats for one
+   restaurant and date in a single batch never overbook, and a redelivered
+   request is not declined by its own reservation.
+
+Usage: python benchmarks/bench_sqs_consumer.py [records] [keys] [latency_ms]
+"""
+import json
+import random
+import sys
+import threading
+import time
+from datetime import date, timedelta
+
+from botocore.exceptions import ClientError
+
+from lambda_loader import load_lambda  # puts lambdas/ on sys.path
+import order_status
+import sqs_consumer
+
+lf8 = load_lambda('LF8-process-order.py')
+lf11c = load_lambda('LF11c-make-reservation.py')
+lf8.print = lf11c.print = sqs_consumer.print = lambda *args, **kwargs: None
+
+
+def sqs_event(messages):
+    return {'Records': [
+        {'messageId': f"m{i}", 'body': message if isinstance(message, str) else json.dumps(message)}
+        for i, message in enumerate(messages)
+    ]}
+
+
+def old_loop(event, process):
+    """The LF8 loop before the consumer: serial, re-raising on the first bad record."""
+    for record in event['Records']:
+        process(json.loads(record['body']), record)
+
+
+def bench_generic(count, keys, latency, rng):
+    messages = [{'key': f"k{rng.randrange(keys)}", 'seq': i} for i in range(count)]
+    clean_event = sqs_event(messages)
+    bad = [dict(message) for message in messages]
+    for i in rng.sample(range(count), 3):
+        bad[i]['poison'] = True
+    bad[rng.randrange(count)] = '{not json'
+    bad_event = sqs_event(bad)
+
+    seen = {}
+    lock = threading.Lock()
+
+    def process(message, record):
+        time.sleep(latency)
+        if message.get('poison'):
+            raise ValueError("poison message")
+        with lock:
+            seen.setdefault(message['key'], []).append(message['seq'])
+
+    def timed(function):
+        started = time.perf_counter()
+        function()
+        return (time.perf_counter() - started) * 1000
+
+    old_ms = timed(lambda: old_loop(clean_event, process))
+    seen.clear()
+    new_ms = timed(lambda: sqs_consumer.consume(clean_event, process, key=lambda message: message['key']))
+    assert all(sequence == sorted(sequence) for sequence in seen.values()), "per-key order violated"
+
+    seen.clear()
+    result = sqs_consumer.consume(bad_event, process, key=lambda message: message['key'])
+    failed = {failure['itemIdentifier'] for failure in result['batchItemFailures']}
+    assert all(sequence == sorted(sequence) for sequence in seen.values()), "per-key order violated"
+    assert sum(len(sequence) for sequence in seen.values()) + len(failed) == count
+
+    print(f"{count} records over {keys} keys, {latency * 1000:.0f} ms of I/O each:")
+    print(f"  serial loop                {old_ms:7.1f} ms")
+    print(f"  consume() on {sqs_consumer.CONSUMER_WORKERS} threads   {new_ms:7.1f} ms  (per-key order kept)")
+    print(f"  with 4 bad records: serial loop redelivers all {count}; consume() reports {len(failed)} "
+          f"(the bad records and their same-key successors)")
+
+
+class Recorder:
+    def __init__(self, **methods):
+        self.calls = []
+        for name, method in methods.items():
+            setattr(self, name, self.recording(name, method))
+
+    def recording(self, name, method):
+        def call(**kwargs):
+            self.calls.append((name, kwargs))
+            return method(**kwargs)
+        return call
+
+
+class FakeBatchDynamoDB:
+    """batch_get_item over User and Restaurant rows."""
+
+    def __init__(self, tables):
+        self.tables = tables
+        self.calls = 0
+
+    def batch_get_item(self, RequestItems):
+        self.calls += 1
+        responses = {}
+        for table_name, request in RequestItems.items():
+            rows, key = self.tables[table_name]
+            responses[table_name] = [dict(rows[k[key]]) for k in request['Keys'] if k[key] in rows]
+        return {'Responses': responses}
+
+
+def check_lf8(rng):
+    users = {f"u{i}": {'user_id': f"u{i}", 'email': f"u{i}@example.com", 'coordinates': [0, i]} for i in range(5)}
+    restaurants = {f"r{i}": {'restaurant_id': f"r{i}", 'coordinates': [1, i]} for i in range(3)}
+    lf8.dynamodb = FakeBatchDynamoDB({'User': (users, 'user_id'), 'Restaurant': (restaurants, 'restaurant_id')})
+    lf8.order_table = Recorder(update_item=lambda **kwargs: {})
+    lf8.delivery_tracking_table = Recorder(update_item=lambda **kwargs: {})
+    lf8.user_table = Recorder(get_item=lambda **kwargs: {'Item': users[kwargs['Key']['user_id']]})
+    lf8.restaurant_table = Recorder(get_item=lambda **kwargs: {'Item': restaurants[kwargs['Key']['restaurant_id']]})
+    lf8.ses = Recorder(send_email=lambda **kwargs: {})
+    messages = [{'order_id': f"o{i}", 'user_id': rng.choice(list(users)), 'restaurant_id': rng.choice(list(restaurants)),
+                 'status': rng.choice(['PREPARING', 'OUT_FOR_DELIVERY', 'DELIVERED']),
+                 'timestamp': '2024-12-01T12:00:00'} for i in range(50)]
+    # Before the preload: an email lookup per message, plus user and restaurant coordinates per delivery start
+    before = len(messages) + 2 * sum(message['status'] == 'OUT_FOR_DELIVERY' for message in messages)
+    messages.insert(4, {'order_id': 'o-bad'})  # missing fields
+    result = lf8.lambda_handler(sqs_event(messages), None)
+    assert result == {'batchItemFailures': [{'itemIdentifier': 'm4'}]}, result
+    assert len(lf8.order_table.calls) == 50 and len(lf8.ses.calls) == 50
+    single_gets = len(lf8.user_table.calls) + len(lf8.restaurant_table.calls)
+    assert single_gets == 0
+    print("LF8: 51 records with one malformed -> only it is reported; 50 orders updated and emailed")
+    print(f"     user/restaurant reads: {before} get_item before -> {lf8.dynamodb.calls} BatchGetItem "
+          f"(one per table) + {single_gets} get_item")
+
+
+class FakeOrderTable:
+    """update_item that evaluates apply_transition's ConditionExpression against dict rows."""
+
+    def __init__(self, orders):
+        self.orders = orders
+        self.lock = threading.Lock()
+        self.history = {order_id: [] for order_id in orders}
+
+    def update_item(self, Key, UpdateExpression, ConditionExpression, ExpressionAttributeNames, ExpressionAttributeValues):
+        values = ExpressionAttributeValues
+        with self.lock:
+            order = self.orders[Key['order_id']]
+            allowed = [value for name, value in values.items() if name.startswith(':from')]
+            if order['status'] not in allowed or order.get('status_seq', -1) >= values[':seq']:
+                raise ClientError({'Error': {'Code': 'ConditionalCheckFailedException', 'Message': ''}}, 'UpdateItem')
+            order.update(status=values[':new_status'], status_updated_at=values[':timestamp'], status_seq=values[':seq'])
+            self.history[Key['order_id']].append(values[':seq'])
+
+
+def check_lf8_transitions(rng):
+    orders = {f"o{i}": {'order_id': f"o{i}", 'status': 'PLACED', 'timestamp': '2024-12-01T11:59:00'} for i in range(20)}
+    lf8.order_table = FakeOrderTable(orders)
+    lf8.delivery_tracking_table = Recorder(update_item=lambda **kwargs: {}, put_item=lambda **kwargs: {})
+    lf8.ses = Recorder(send_email=lambda **kwargs: {})
+    messages = [{'order_id': order_id, 'user_id': 'u0', 'restaurant_id': 'r0', 'status': status,
+                 'timestamp': f"2024-12-01T12:0{sequence}:00"}
+                for order_id in orders for sequence, status in enumerate(order_status.ORDER_STATUSES)]
+
+    # Deliver in waves: each wave carries every order's next status, so the full
+    # lifecycle lands, plus shuffled copies of other messages: redeliveries of
+    # statuses already applied and some that arrive ahead of their predecessor
+    delivered, old_writes, old_emails = 0, 0, 0
+    for wave in order_status.ORDER_STATUSES:
+        batch = [message for message in messages if message['status'] == wave]
+        earlier = messages[:messages.index(batch[-1]) + 1]
+        batch += rng.sample(earlier, 3 * len(batch))
+        rng.shuffle(batch)
+        lf8.lambda_handler(sqs_event(batch), None)
+        delivered += len(batch)
+        # Before: every message was written, emailed, and delivery ones touched the tracking table
+        old_writes += len(batch) + sum(message['status'] in ['OUT_FOR_DELIVERY', 'DELIVERED'] for message in batch)
+        old_emails += len(batch)
+
+    # A PLACED acknowledgement overtaken by PREPARING is stale and skipped; nothing else is
+    applied = sum(len(history) for history in lf8.order_table.history.values())
+    assert all(order['status'] == 'DELIVERED' for order in orders.values())
+    assert all(order['timestamp'] == '2024-12-01T11:59:00' for order in orders.values()), "placement time overwritten"
+    assert all(history == sorted(set(history)) and history[-1] == 4 for history in lf8.order_table.history.values()), \
+        "order moved backwards or repeated a status"
+    assert len(lf8.ses.calls) == applied
+    new_writes = applied + len(lf8.delivery_tracking_table.calls)
+    print(f"LF8 transitions: {delivered} messages ({delivered - applied} duplicate, stale or early) for "
+          f"{len(orders)} orders -> all DELIVERED, none regressed or repeated")
+    print(f"     writes {old_writes} -> {new_writes}, emails {old_emails} -> {len(lf8.ses.calls)}")
+
+
+class FakeReservationDB:
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.reservations = {}
+        self.lock = threading.Lock()
+
+    def get_item(self, TableName, Key):
+        if TableName == 'Restaurant':
+            return {'Item': {'name': {'S': 'Golden Dragon'}, 'capacity': {'N': str(self.capacity)}}}
+        return {'Item': {'email': {'S': 'eater@example.com'}}}
+
+    def query(self, **kwargs):
+        time.sleep(0.002)  # widen the check-then-write window
+        with self.lock:
+            return {'Items': [dict(item) for item in self.reservations.values()]}
+
+    def put_item(self, TableName, Item, ConditionExpression):
+        with self.lock:
+            if Item['reservation_id']['S'] in self.reservations:
+                raise ClientError({'Error': {'Code': 'ConditionalCheckFailedException', 'Message': ''}}, 'PutItem')
+            self.reservations[Item['reservation_id']['S']] = Item
+
+
+def check_lf11c():
+    db = FakeReservationDB(capacity=6)
+    lf11c.dynamodb = db
+    lf11c.ses = Recorder(send_email=lambda **kwargs: {})
+    res_date = (date.today() + timedelta(days=7)).isoformat()
+    requests = [{'user_id': f"u{i}", 'restaurant_id': 'r1', 'res_date': res_date, 'time': '19:00', 'party_size': 2}
+                for i in range(6)]
+    result = lf11c.lambda_handler(sqs_event(requests), None)
+    booked = sum(int(item['party_size']['N']) for item in db.reservations.values())
+    assert result == {'batchItemFailures': []} and booked <= db.capacity, (result, booked)
+
+    # Redelivery of an accepted request (e.g. after a failed email) confirms it again
+    lf11c.ses.calls.clear()
+    lf11c.lambda_handler(sqs_event([requests[0]]), None)
+    body = lf11c.ses.calls[0][1]['Message']['Body']['Text']['Data']
+    assert 'has been made' in body
+    print(f"LF11c: 6 requests for {db.capacity} seats in one batch -> {len(db.reservations)} booked "
+          f"({booked} seats), no overbooking; redelivered request confirmed, not declined")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    keys = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    latency = (float(sys.argv[3]) if len(sys.argv) > 3 else 5) / 1000
+    bench_generic(count, keys, latency, random.Random(3))
+    check_lf8(random.Random(5))
+    check_lf8_transitions(random.Random(11))
+    check_lf11c()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+import importlib.util
+import os
+import sys
+
+LAMBDAS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambdas')
+
+# Shared modules in lambdas/ are imported by the handlers as top-level modules
+sys.path.insert(0, LAMBDAS_DIR)
+
+# Dummy credentials so module-level boto3/AWS4Auth setup works offline.
+# The benchmarks replace every network call with an in-memory stand-in.
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'benchmark')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'benchmark')
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+os.environ.setdefault('OPENSEARCH_ENDPOINT', 'https://opensearch.benchmark.invalid')
+
+
+def load_lambda(filename):
+    """
+    Import a handler file from lambdas/ by file name (handler names contain dashes).
+    """
+    module_name = os.path.splitext(filename)[0].replace('-', '_')
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(LAMBDAS_DIR, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,49 @@
+import os
+import sys
+
+import boto3
+
+# The snapshot format and writer live with the lambdas that serve it
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambdas'))
+from menu_snapshot import MENU_TABLE_NAME, read_stored_snapshot, rebuild_menu_snapshot  # noqa: E402
+
+# AWS region
+region = 'us-east-1'
+
+dynamodb = boto3.resource('dynamodb', region_name=region)
+
+
+# Restaurants that have at least one menu item
+def menu_restaurant_ids(menu_table):
+    table = dynamodb.Table(menu_table)
+    scan_kwargs = {"ProjectionExpression": "restaurant_id"}
+    restaurant_ids = set()
+    while True:
+        response = table.scan(**scan_kwargs)
+        restaurant_ids.update(item['restaurant_id'] for item in response.get('Items', []) if item.get('restaurant_id'))
+        last_evaluated_key = response.get('LastEvaluatedKey')
+        if not last_evaluated_key:
+            return restaurant_ids
+        scan_kwargs["ExclusiveStartKey"] = last_evaluated_key
+
+
+# Store a menu snapshot for every restaurant with menu items and none stored yet.
+# Requests never store snapshots; LF19 keeps them current after this
+def backfill_menu_snapshots(menu_table):
+    total_built = 0
+    total_skipped = 0
+    for restaurant_id in sorted(menu_restaurant_ids(menu_table)):
+        if read_stored_snapshot(restaurant_id) is not None:
+            total_skipped += 1
+            continue
+        snapshot = rebuild_menu_snapshot(restaurant_id)
+        print(f"Stored menu snapshot for {restaurant_id}: {snapshot['item_count']} items")
+        total_built += 1
+
+    print(f"Total menu snapshots stored: {total_built}")
+    print(f"Total restaurants already having one: {total_skipped}")
+
+
+# Main function
+if __name__ == "__main__":
+    backfill_menu_snapshots(MENU_TABLE_NAME)
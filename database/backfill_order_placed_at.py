@@ -0,0 +1,58 @@
+import boto3
+from botocore.exceptions import ClientError
+
+# AWS region
+region = 'us-east-1'
+
+dynamodb = boto3.resource('dynamodb', region_name=region)
+
+ORDER_TABLE = "Order"
+
+
+# Give orders stored before LF7 wrote placed_at one, so they appear in the
+# user_id-placed_at-index. Their timestamp is the best record of placement left
+# (status updates used to overwrite it); orders that already have placed_at
+# are never touched.
+def backfill_order_placed_at(order_table):
+    table = dynamodb.Table(order_table)
+    scan_kwargs = {
+        "ProjectionExpression": "order_id, #ts, placed_at",
+        "ExpressionAttributeNames": {"#ts": "timestamp"}
+    }
+    total_updated = 0
+    total_skipped = 0
+
+    while True:
+        response = table.scan(**scan_kwargs)
+
+        for item in response.get('Items', []):
+            if 'placed_at' in item:
+                continue
+            if not item.get('timestamp'):
+                print(f"No timestamp for order {item['order_id']}. Skipping.")
+                total_skipped += 1
+                continue
+            try:
+                table.update_item(
+                    Key={"order_id": item['order_id']},
+                    UpdateExpression="SET placed_at = :placed_at",
+                    ConditionExpression="attribute_exists(order_id) AND attribute_not_exists(placed_at)",
+                    ExpressionAttributeValues={":placed_at": item['timestamp']}
+                )
+                total_updated += 1
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                    raise
+
+        last_evaluated_key = response.get('LastEvaluatedKey')
+        if not last_evaluated_key:
+            break
+        scan_kwargs["ExclusiveStartKey"] = last_evaluated_key
+
+    print(f"Total orders backfilled: {total_updated}")
+    print(f"Total orders without a timestamp: {total_skipped}")
+
+
+# Main function
+if __name__ == "__main__":
+    backfill_order_placed_at(ORDER_TABLE)
@@ -0,0 +1,100 @@
+import boto3
+from opensearchpy import OpenSearch, RequestsHttpConnection
+
+# AWS region
+region = 'us-east-1'
+
+# OpenSearch client configuration
+host = ''
+client = OpenSearch(
+    hosts=[{'host': host, 'port': 443}],
+    http_auth=('', ''),
+    use_ssl=True,
+    verify_certs=True,
+    connection_class=RequestsHttpConnection,
+    timeout=30
+)
+
+dynamodb = boto3.resource('dynamodb', region_name=region)
+location_client = boto3.client('location', region_name=region)
+
+RESTAURANT_TABLE = "Restaurant"
+RESTAURANTS_INDEX = "restaurants_index"
+PLACE_INDEX_NAME = "RestaurantPlaceIndex"
+BULK_SIZE = 500
+
+
+# Reverse geocode restaurants that were uploaded without an address
+def reverse_geocode(coordinates):
+    try:
+        response = location_client.search_place_index_for_position(
+            IndexName=PLACE_INDEX_NAME,
+            Position=[float(coordinates['lon']), float(coordinates['lat'])]
+        )
+        if response['Results']:
+            return response['Results'][0]['Place']['Label']
+    except Exception as e:
+        print(f"Error reverse geocoding {coordinates}: {e}")
+    return None
+
+
+def flush_updates(actions):
+    if not actions:
+        return 0
+    response = client.bulk(body=actions)
+    failed = [item['update'] for item in response['items'] if item['update'].get('error')]
+    for item in failed:
+        print(f"Failed to update {item['_id']}: {item['error']}")
+    return len(actions) // 2 - len(failed)
+
+
+# Copy each restaurant's address from DynamoDB onto its restaurants_index document
+def backfill_restaurant_addresses(restaurant_table):
+    table = dynamodb.Table(restaurant_table)
+    scan_kwargs = {
+        "ProjectionExpression": "restaurant_id, address, coordinates"
+    }
+    actions = []
+    total_updated = 0
+    total_geocoded = 0
+
+    while True:
+        response = table.scan(**scan_kwargs)
+
+        for item in response.get('Items', []):
+            restaurant_id = item['restaurant_id']
+            address = item.get('address')
+
+            if not address and item.get('coordinates'):
+                address = reverse_geocode(item['coordinates'])
+                if address:
+                    # Persist it so future index syncs carry the address too
+                    table.update_item(
+                        Key={"restaurant_id": restaurant_id},
+                        UpdateExpression="SET address = :address",
+                        ExpressionAttributeValues={":address": address}
+                    )
+                    total_geocoded += 1
+            if not address:
+                print(f"No address available for restaurant {restaurant_id}. Skipping.")
+                continue
+
+            actions.append({'update': {'_index': RESTAURANTS_INDEX, '_id': restaurant_id}})
+            actions.append({'doc': {'address': address}})
+            if len(actions) >= BULK_SIZE * 2:
+                total_updated += flush_updates(actions)
+                actions = []
+
+        last_evaluated_key = response.get('LastEvaluatedKey')
+        if not last_evaluated_key:
+            break
+        scan_kwargs["ExclusiveStartKey"] = last_evaluated_key
+
+    total_updated += flush_updates(actions)
+    print(f"Total restaurant documents updated: {total_updated}")
+    print(f"Total addresses reverse geocoded: {total_geocoded}")
+
+
+# Main function
+if __name__ == "__main__":
+    backfill_restaurant_addresses(RESTAURANT_TABLE)
@@ -0,0 +1,156 @@
+import boto3
+import time
+
+region = 'us-east-1'
+
+dynamodb = boto3.client('dynamodb', region_name=region)
+
+# Tables and indexes that the lambdas expect beyond the original console-created
+# tables (Restaurant, Menu_Items, Cart, Order, ...)
+TABLE_DEFINITIONS = [
+    {
+        # Reverse-geocoded addresses used by LF2, keyed by geohash cell
+        'TableName': 'Geocode_Cache',
+        'KeySchema': [{'AttributeName': 'geohash', 'KeyType': 'HASH'}],
+        'AttributeDefinitions': [{'AttributeName': 'geohash', 'AttributeType': 'S'}],
+        'BillingMode': 'PAY_PER_REQUEST'
+    },
+    {
+        # Precompiled per-restaurant menu JSON served by LF3, maintained by LF19
+        'TableName': 'Menu_Snapshots',
+        'KeySchema': [{'AttributeName': 'restaurant_id', 'KeyType': 'HASH'}],
+        'AttributeDefinitions': [{'AttributeName': 'restaurant_id', 'AttributeType': 'S'}],
+        'BillingMode': 'PAY_PER_REQUEST'
+    },
+    {
+        # Messages stored with the order in one transaction (LF7), sent to SQS by LF7b
+        # from the table's stream
+        'TableName': 'Order_Outbox',
+        'KeySchema': [{'AttributeName': 'message_id', 'KeyType': 'HASH'}],
+        'AttributeDefinitions': [{'AttributeName': 'message_id', 'AttributeType': 'S'}],
+        'BillingMode': 'PAY_PER_REQUEST',
+        'StreamSpecification': {'StreamEnabled': True, 'StreamViewType': 'NEW_IMAGE'}
+    },
+    {
+        # Stored responses of retried write requests (idempotency.py: LF4, LF7, LF11b, LF12)
+        'TableName': 'Idempotency_Keys',
+        'KeySchema': [{'AttributeName': 'idempotency_key', 'KeyType': 'HASH'}],
+        'AttributeDefinitions': [{'AttributeName': 'idempotency_key', 'AttributeType': 'S'}],
+        'BillingMode': 'PAY_PER_REQUEST'
+    },
+]
+
+# Epoch-seconds attributes after which DynamoDB deletes items
+TIME_TO_LIVE_ATTRIBUTES = {
+    'Idempotency_Keys': 'expires_at',
+}
+
+# Global secondary indexes added to existing tables
+INDEX_DEFINITIONS = [
+    {
+        # Menu of one restaurant, ordered by item name (LF3, LEX)
+        'TableName': 'Menu_Items',
+        'AttributeDefinitions': [
+            {'AttributeName': 'restaurant_id', 'AttributeType': 'S'},
+            {'AttributeName': 'item_name', 'AttributeType': 'S'}
+        ],
+        'Index': {
+            'IndexName': 'restaurant_id-index',
+            'KeySchema': [
+                {'AttributeName': 'restaurant_id', 'KeyType': 'HASH'},
+                {'AttributeName': 'item_name', 'KeyType': 'RANGE'}
+            ],
+            'Projection': {'ProjectionType': 'ALL'}
+        }
+    },
+    {
+        # Order history of one user, newest first (LF9-2). Sorted on placed_at, which only
+        # LF7 writes: status updates never move an order within the index
+        # (existing orders: database/backfill_order_placed_at.py)
+        'TableName': 'Order',
+        'AttributeDefinitions': [
+            {'AttributeName': 'user_id', 'AttributeType': 'S'},
+            {'AttributeName': 'placed_at', 'AttributeType': 'S'}
+        ],
+        'Index': {
+            'IndexName': 'user_id-placed_at-index',
+            'KeySchema': [
+                {'AttributeName': 'user_id', 'KeyType': 'HASH'},
+                {'AttributeName': 'placed_at', 'KeyType': 'RANGE'}
+            ],
+            'Projection': {'ProjectionType': 'ALL'}
+        }
+    },
+]
+
+
+# Create tables that don't already exist
+def create_tables():
+    existing_tables = set()
+    for page in dynamodb.get_paginator('list_tables').paginate():
+        existing_tables.update(page['TableNames'])
+
+    for definition in TABLE_DEFINITIONS:
+        table_name = definition['TableName']
+        if table_name in existing_tables:
+            print(f"Table {table_name} already exists. Skipping.")
+            continue
+        dynamodb.create_table(**definition)
+        dynamodb.get_waiter('table_exists').wait(TableName=table_name)
+        print(f"Created table: {table_name}")
+
+
+# Turn on TTL expiry for tables that rely on it
+def enable_time_to_live():
+    for table_name, attribute_name in TIME_TO_LIVE_ATTRIBUTES.items():
+        description = dynamodb.describe_time_to_live(TableName=table_name)['TimeToLiveDescription']
+        if description.get('TimeToLiveStatus') in ('ENABLED', 'ENABLING'):
+            print(f"TTL on {table_name} already enabled. Skipping.")
+            continue
+        dynamodb.update_time_to_live(
+            TableName=table_name,
+            TimeToLiveSpecification={'Enabled': True, 'AttributeName': attribute_name}
+        )
+        print(f"Enabled TTL on {table_name}.{attribute_name}")
+
+
+# Wait until a newly added index has finished backfilling
+def wait_for_index(table_name, index_name, delay=15):
+    while True:
+        table = dynamodb.describe_table(TableName=table_name)['Table']
+        statuses = {index['IndexName']: index['IndexStatus'] for index in table.get('GlobalSecondaryIndexes', [])}
+        if statuses.get(index_name) == 'ACTIVE':
+            return
+        print(f"Waiting for {table_name}.{index_name} ({statuses.get(index_name)})...")
+        time.sleep(delay)
+
+
+# Add global secondary indexes that don't already exist
+def create_indexes():
+    for definition in INDEX_DEFINITIONS:
+        table_name = definition['TableName']
+        index = definition['Index']
+        table = dynamodb.describe_table(TableName=table_name)['Table']
+        existing_indexes = {existing['IndexName'] for existing in table.get('GlobalSecondaryIndexes', [])}
+        if index['IndexName'] in existing_indexes:
+            print(f"Index {table_name}.{index['IndexName']} already exists. Skipping.")
+            continue
+
+        create_index = dict(index)
+        if table.get('BillingModeSummary', {}).get('BillingMode') != 'PAY_PER_REQUEST':
+            create_index['ProvisionedThroughput'] = {'ReadCapacityUnits': 5, 'WriteCapacityUnits': 5}
+        dynamodb.update_table(
+            TableName=table_name,
+            AttributeDefinitions=definition['AttributeDefinitions'],
+            GlobalSecondaryIndexUpdates=[{'Create': create_index}]
+        )
+        # DynamoDB only builds one new index per table at a time
+        wait_for_index(table_name, index['IndexName'])
+        print(f"Created index: {table_name}.{index['IndexName']}")
+
+
+# Main function
+if __name__ == "__main__":
+    create_tables()
+    enable_time_to_live()
+    create_indexes()
@@ -1,4 +1,5 @@
 import boto3
+import sys
 from decimal import Decimal
 from opensearchpy import OpenSearch, RequestsHttpConnection
 from requests_aws4auth import AWS4Auth
@@ -28,6 +29,47 @@ restaurant_table = dynamodb.Table('Restaurant')
 menu_items_table = dynamodb.Table('Menu_Items')
 
 
+# Edge n-gram analysis for type-ahead: "piz" matches "pizza" at index time,
+# while queries are analyzed normally so each keystroke is a cheap term lookup.
+AUTOCOMPLETE_ANALYSIS = {
+    'filter': {
+        'autocomplete_filter': {
+            'type': 'edge_ngram',
+            'min_gram': 1,
+            'max_gram': 20
+        }
+    },
+    'analyzer': {
+        'autocomplete': {
+            'type': 'custom',
+            'tokenizer': 'standard',
+            'filter': ['lowercase', 'asciifolding', 'autocomplete_filter']
+        },
+        'autocomplete_search': {
+            'type': 'custom',
+            'tokenizer': 'standard',
+            'filter': ['lowercase', 'asciifolding']
+        }
+    }
+}
+
+AUTOCOMPLETE_SUBFIELD = {
+    'autocomplete': {
+        'type': 'text',
+        'analyzer': 'autocomplete',
+        'search_analyzer': 'autocomplete_search'
+    }
+}
+
+RESTAURANT_PROPERTIES = {
+    'restaurant_id': {'type': 'keyword'},
+    'name': {'type': 'text', 'fields': AUTOCOMPLETE_SUBFIELD},
+    'cuisine': {'type': 'text', 'fields': AUTOCOMPLETE_SUBFIELD},
+    'address': {'type': 'text'},
+    'coordinates': {'type': 'geo_point'}
+}
+
+
 # Create indexes if they don't already exist
 def create_indexes():
     # Restaurant index
@@ -35,15 +77,11 @@ def create_indexes():
         restaurant_index_body = {
             'settings': {
                 'number_of_shards': 1,
-                'number_of_replicas': 1
+                'number_of_replicas': 1,
+                'analysis': AUTOCOMPLETE_ANALYSIS
             },
             'mappings': {
-                'properties': {
-                    'restaurant_id': {'type': 'keyword'},
-                    'name': {'type': 'text'},
-                    'cuisine': {'type': 'text'},
-                    'coordinates': {'type': 'geo_point'}
-                }
+                'properties': RESTAURANT_PROPERTIES
             }
         }
         client.indices.create(index='restaurants_index', body=restaurant_index_body)
@@ -68,6 +106,27 @@ def create_indexes():
         print("Created index: menu_items_index")
 
 
+# Add the autocomplete analyzers and sub-fields to an existing restaurants_index
+def add_autocomplete_to_restaurants_index():
+    # Analyzers can only be added while the index is closed
+    client.indices.close(index='restaurants_index')
+    try:
+        client.indices.put_settings(index='restaurants_index', body={'analysis': AUTOCOMPLETE_ANALYSIS})
+    finally:
+        client.indices.open(index='restaurants_index')
+
+    client.indices.put_mapping(index='restaurants_index', body={
+        'properties': {
+            'name': RESTAURANT_PROPERTIES['name'],
+            'cuisine': RESTAURANT_PROPERTIES['cuisine']
+        }
+    })
+
+    # Re-index documents in place so existing restaurants get the new sub-fields
+    response = client.update_by_query(index='restaurants_index', body={'query': {'match_all': {}}}, conflicts='proceed')
+    print(f"Added autocomplete fields to restaurants_index, updated {response.get('updated')} documents")
+
+
 # Push data from Restaurant table to restaurants_index
 def push_restaurants_to_opensearch():
     last_evaluated_key = None
@@ -100,6 +159,7 @@ def push_restaurants_to_opensearch():
                 'restaurant_id': restaurant_id,
                 'name': item.get('name'),
                 'cuisine': item.get('cuisine'),
+                'address': item.get('address'),
                 'coordinates': item.get('coordinates')
             }
 
@@ -176,7 +236,12 @@ def push_menu_items_to_opensearch():
 
 
 # Main function
+# python create_es_indexes.py                     create indexes and load data
+# python create_es_indexes.py --add-autocomplete  migrate a restaurants_index created before autocomplete
 if __name__ == "__main__":
-    create_indexes()
-    push_restaurants_to_opensearch()
-    push_menu_items_to_opensearch()
+    if '--add-autocomplete' in sys.argv[1:]:
+        add_autocomplete_to_restaurants_index()
+    else:
+        create_indexes()
+        push_restaurants_to_opensearch()
+        push_menu_items_to_opensearch()
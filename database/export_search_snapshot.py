@@ -0,0 +1,67 @@
+import boto3
+import gzip
+import json
+
+dynamodb = boto3.resource('dynamodb')
+s3 = boto3.client('s3')
+
+RESTAURANT_TABLE = "Restaurant"
+
+# Snapshot consumed by lambdas/bm25_index.py (LF1's local fallback search engine)
+SNAPSHOT_VERSION = 1
+SNAPSHOT_FIELDS = ["restaurant_id", "name", "cuisine", "address", "lat", "lon"]
+SNAPSHOT_FILE = "restaurants_snapshot.json.gz"
+SNAPSHOT_BUCKET = ""
+SNAPSHOT_KEY = "search/restaurants_snapshot.json.gz"
+
+
+# Scan the Restaurant table into compact snapshot rows
+def load_snapshot_rows(restaurant_table):
+    table = dynamodb.Table(restaurant_table)
+    projection = "restaurant_id, #n, cuisine, address, coordinates"
+    scan_kwargs = {
+        "ProjectionExpression": projection,
+        "ExpressionAttributeNames": {"#n": "name"}
+    }
+
+    rows = []
+    while True:
+        response = table.scan(**scan_kwargs)
+        for item in response.get("Items", []):
+            coordinates = item.get("coordinates") or {}
+            rows.append([
+                item["restaurant_id"],
+                item.get("name"),
+                item.get("cuisine"),
+                item.get("address"),
+                float(coordinates["lat"]) if "lat" in coordinates else None,
+                float(coordinates["lon"]) if "lon" in coordinates else None
+            ])
+
+        last_evaluated_key = response.get("LastEvaluatedKey")
+        if not last_evaluated_key:
+            break
+        scan_kwargs["ExclusiveStartKey"] = last_evaluated_key
+
+    # Stable order keeps BM25 tie-breaking deterministic between snapshots
+    rows.sort(key=lambda row: row[0])
+    return rows
+
+
+# Write the snapshot locally and optionally publish it to S3
+def export_search_snapshot(restaurant_table, output_file, bucket=None, key=SNAPSHOT_KEY):
+    rows = load_snapshot_rows(restaurant_table)
+    snapshot = {"version": SNAPSHOT_VERSION, "fields": SNAPSHOT_FIELDS, "rows": rows}
+
+    with gzip.open(output_file, "wt", encoding="utf-8") as snapshot_file:
+        json.dump(snapshot, snapshot_file, separators=(",", ":"))
+    print(f"Wrote {len(rows)} restaurants to {output_file}")
+
+    if bucket:
+        s3.upload_file(output_file, bucket, key)
+        print(f"Uploaded snapshot to s3://{bucket}/{key}")
+
+
+# Main function
+if __name__ == "__main__":
+    export_search_snapshot(RESTAURANT_TABLE, SNAPSHOT_FILE, SNAPSHOT_BUCKET)
@@ -1,4 +1,7 @@
-async function fetchOrders() {
+// Cursor of the next page of orders, null once the last page is shown
+let nextCursor = null;
+
+async function fetchOrders(cursor = null) {
     try {
         const API_URL = 'https://930lk1e388.execute-api.us-east-1.amazonaws.com/dev';
         
@@ -13,7 +16,10 @@ async function fetchOrders() {
 
         const userId = localStorage.getItem("userId");
 
-        const fullUrl = `${API_URL}/orders?user_id=${encodeURIComponent(userId)}`;
+        let fullUrl = `${API_URL}/orders?user_id=${encodeURIComponent(userId)}`;
+        if (cursor) {
+            fullUrl += `&cursor=${encodeURIComponent(cursor)}`;
+        }
 
         console.log('Fetching from:', fullUrl);
         // Add the Authorization header with the ID token
@@ -41,8 +47,11 @@ async function fetchOrders() {
         const currentOrdersContainer = document.getElementById('currentOrders');
         const historyOrdersContainer = document.getElementById('historyOrders');
         
-        currentOrdersContainer.innerHTML = '';
-        historyOrdersContainer.innerHTML = '';
+        // A later page is appended below the orders already shown
+        if (!cursor) {
+            currentOrdersContainer.innerHTML = '';
+            historyOrdersContainer.innerHTML = '';
+        }
 
         // Parse the body string into an object since it's double stringified
         const ordersData = JSON.parse(data.body);
@@ -62,6 +71,9 @@ async function fetchOrders() {
             }
         });
 
+        nextCursor = ordersData.next_cursor || null;
+        document.getElementById('loadMoreOrders').hidden = !nextCursor;
+
     } catch (error) {
         console.error('Error:', error);
         alert('Error loading orders');
@@ -76,7 +88,7 @@ function createOrderCard(order) {
     card.innerHTML = `
         <div class="order-info">
             <h3>${order.restaurant_name}</h3>
-            <p class="order-details">${order.items_count} items | $${order.total_price}</p>
+            <p class="order-details">${order.items_count} items | $${Number(order.total_price).toFixed(2)}</p>
             <p class="order-time">${formatOrderTime(order.timestamp, order.status)}</p>
         </div>
     `;
@@ -93,4 +105,7 @@ function formatOrderTime(timestamp, status) {
 }
 
 // Load orders when page loads
-document.addEventListener('DOMContentLoaded', fetchOrders);
\ No newline at end of file
+document.addEventListener('DOMContentLoaded', () => {
+    fetchOrders();
+    document.getElementById('loadMoreOrders').addEventListener('click', () => fetchOrders(nextCursor));
+});
\ No newline at end of file
@@ -1,3 +1,7 @@
+// Cursor for the next page of results (null when there are no more)
+let nextCursor = null;
+let loadingPage = false;
+
 // Load the navbar from navbar.html
 document.addEventListener("DOMContentLoaded", () => {
     
@@ -15,6 +19,14 @@ document.addEventListener("DOMContentLoaded", () => {
         console.error('No query found in URL');
     }
 
+    // Infinite scroll: load the next page when the user nears the bottom
+    window.addEventListener("scroll", () => {
+        const nearBottom = window.innerHeight + window.scrollY >= document.body.offsetHeight - 300;
+        if (nearBottom && nextCursor && !loadingPage) {
+            fetchResults(query, type, location, userId, nextCursor);
+        }
+    });
+
     const searchButton = document.getElementById("search-button");
     const searchInput = document.getElementById("searchInput");
     searchButton.addEventListener("click", () => {
@@ -30,8 +42,12 @@ document.addEventListener("DOMContentLoaded", () => {
   });
 });
 
-function fetchResults(query, type, location, userId) {
-    const apiUrl = `https://930lk1e388.execute-api.us-east-1.amazonaws.com/dev/restaurants/search?type=${encodeURIComponent(type)}&query=${encodeURIComponent(query)}&location=${encodeURIComponent(location)}&userId=${encodeURIComponent(userId)}`;
+function fetchResults(query, type, location, userId, cursor = null) {
+    let apiUrl = `https://930lk1e388.execute-api.us-east-1.amazonaws.com/dev/restaurants/search?type=${encodeURIComponent(type)}&query=${encodeURIComponent(query)}&location=${encodeURIComponent(location)}&userId=${encodeURIComponent(userId)}&hydrate=true`;
+    if (cursor) {
+        apiUrl += `&cursor=${encodeURIComponent(cursor)}`;
+    }
+    loadingPage = true;
 
     fetch(apiUrl, {
         method: 'GET',
@@ -46,47 +62,34 @@ function fetchResults(query, type, location, userId) {
         return response.json();
     })
     .then(data => {
-        renderResults(query, data);
+        renderResults(query, data, Boolean(cursor));
     })
     .catch(error => {
         console.error('Error fetching category data:', error);
+    })
+    .finally(() => {
+        loadingPage = false;
     });
 }
 
-async function renderResults(query, data) {
+async function renderResults(query, data, append = false) {
     // Parse the body to get restaurantIds
     const parsedData = JSON.parse(data.body);
     console.log(parsedData.restaurantIds);
+    nextCursor = parsedData.nextCursor || null;
 
-    const apiUrl = `https://930lk1e388.execute-api.us-east-1.amazonaws.com/dev/restaurants/`;
     const resultsContainer = document.getElementById('resultsContainer');
-    const infoContainer = document.getElementById('info');
-    infoContainer.innerHTML = `<h3>Search Results for "${query}"</h3>`;
-
-    // Iterate through restaurantIds and fetch their data
-    const restaurantPromises = parsedData.restaurantIds.map(async (id) => {
-        try {
-            const response = await fetch(`${apiUrl}${id}`);
-            if (!response.ok) {
-                throw new Error(`Failed to fetch restaurant data for ID: ${id}`);
-            }
-            const restaurantData = await response.json();
-            return restaurantData;
-        } catch (error) {
-            console.error(error);
-            return null;
-        }
-    });
+    if (!append) {
+        const infoContainer = document.getElementById('info');
+        infoContainer.innerHTML = `<h3>Search Results for "${query}"</h3>`;
+    }
 
-    // Wait for all fetch requests to complete
-    const restaurants = await Promise.all(restaurantPromises);
+    // Hydrated searches already carry the card fields, so no per-restaurant requests are needed
+    const restaurants = parsedData.restaurants || await fetchRestaurantDetails(parsedData.restaurantIds);
     console.log(restaurants)
     // Render each restaurant's data
-    restaurants.forEach((restaurant) => {
-        const parsedRestaurant = JSON.parse(restaurant.body)
-        console.log(parsedRestaurant.restaurantDetails)
-        const restaurantInfo = parsedRestaurant.restaurantDetails
-        if (restaurant) {
+    restaurants.forEach((restaurantInfo) => {
+        if (restaurantInfo) {
             const resultItem = `
                 <div class="restaurant-card">
                     <a href="restaurant-info.html?query=${restaurantInfo.restaurant_id}">
@@ -95,7 +98,8 @@ async function renderResults(query, data) {
                         </div>
                         <div class="info">
                             <h3 class="restaurant-name">${restaurantInfo.name}</h3>
-                            <p class="address">${restaurantInfo.address}</p>
+                            <p class="address">${restaurantInfo.address || ''}</p>
+                            ${restaurantInfo.distance_km != null ? `<p class="distance">${restaurantInfo.distance_km} km away</p>` : ''}
                         </div>
                     </a>
                 </div>
@@ -104,4 +108,26 @@ async function renderResults(query, data) {
             resultsContainer.innerHTML += resultItem;
         }
     });
-}
\ No newline at end of file
+}
+
+async function fetchRestaurantDetails(restaurantIds) {
+    const apiUrl = `https://930lk1e388.execute-api.us-east-1.amazonaws.com/dev/restaurants/`;
+
+    // Iterate through restaurantIds and fetch their data
+    const restaurantPromises = restaurantIds.map(async (id) => {
+        try {
+            const response = await fetch(`${apiUrl}${id}`);
+            if (!response.ok) {
+                throw new Error(`Failed to fetch restaurant data for ID: ${id}`);
+            }
+            const restaurantData = await response.json();
+            return JSON.parse(restaurantData.body).restaurantDetails;
+        } catch (error) {
+            console.error(error);
+            return null;
+        }
+    });
+
+    // Wait for all fetch requests to complete
+    return Promise.all(restaurantPromises);
+}
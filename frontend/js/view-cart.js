@@ -39,9 +39,9 @@ async function getCartContent(userId, idToken) {
                     <img src="images/food.jpeg" alt="food" />
                     <div class="details">
                         <h3>${item.item_name}</h3>
-                        <p>$${item.item_price} dollars</p>
+                        <p>$${Number(item.item_price).toFixed(2)} dollars</p>
                         <div class="quantity">
-                            <input type="number" value="${item.item_quantity}" min="0" step="1" />
+                            <input type="number" value="${item.item_quantity}" min="0" step="1" data-item-id="${item.item_id}" />
                         </div>
                     </div>
                     <p class="price">$${(item.item_price * item.item_quantity).toFixed(2)}</p>
@@ -53,20 +53,71 @@ async function getCartContent(userId, idToken) {
         });
         summaryContainer.innerHTML += `
         <h3>Order summary</h3>
-          <p>Subtotal: $${cart.total_price}</p>
-          <p><strong>Total: $${cart.total_price }</strong></p>
+          <p>Subtotal: $${Number(cart.total_price).toFixed(2)}</p>
+          <p><strong>Total: $${Number(cart.total_price).toFixed(2)}</strong></p>
           <button id="placeOrderBtn">Continue to payment</button>`;
         
         document.getElementById('placeOrderBtn').addEventListener('click', () => {
             placeOrder(cart, idToken);
         });
+
+        // Quantity changes update a single cart line on the server
+        itemContainer.querySelectorAll('input[data-item-id]').forEach(input => {
+            input.addEventListener('change', () => {
+                setItemQuantity(cart, input.dataset.itemId, parseInt(input.value, 10) || 0, userId, idToken);
+            });
+        });
     } catch (error) {
         console.error('Error:', error);
     }
 }
+async function setItemQuantity(cart, itemId, quantity, userId, idToken) {
+    try {
+        const response = await fetch('https://930lk1e388.execute-api.us-east-1.amazonaws.com/dev/cart/add', {
+            method: 'POST',
+            headers: {
+                'Authorization': `Bearer ${idToken}`,
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({
+                userid: userId,
+                operation: 'set_quantity',
+                restaurant_id: cart.restaurant_id,
+                item_id: itemId,
+                item_quantity: quantity,
+                expected_version: cart.version
+            })
+        });
+
+        if (!response.ok) {
+            throw new Error(`Failed to update cart. Status: ${response.status}`);
+        }
+        const result = JSON.parse((await response.json()).body);
+        if (result.message && !result.cart) {
+            throw new Error(result.message);
+        }
+    } catch (error) {
+        console.error('Error updating cart:', error);
+    }
+    // Re-render from the server copy, which also picks up edits made elsewhere (409)
+    getCartContent(userId, idToken);
+}
+// One idempotency key per checkout of a cart version: retrying after a timeout
+// or a double click returns the first order instead of placing a second one
+function orderIdempotencyKey(cartContent) {
+    const storageKey = `orderKey:${cartContent.user_id}:${cartContent.version}`;
+    let key = sessionStorage.getItem(storageKey);
+    if (!key) {
+        key = crypto.randomUUID();
+        sessionStorage.setItem(storageKey, key);
+    }
+    return [storageKey, key];
+}
 async function placeOrder(cartContent, idToken) {
+    const [storageKey, idempotencyKey] = orderIdempotencyKey(cartContent);
     try {
         const requestBody = {
+            idempotency_key: idempotencyKey,
             restaurant_id: cartContent.restaurant_id,
             items: cartContent.item_list.map(item => ({
                 item_id: item.item_id,
@@ -90,6 +141,7 @@ async function placeOrder(cartContent, idToken) {
 
         const result = await response.json();
         console.log('Order placed successfully:', result);
+        sessionStorage.removeItem(storageKey);
         alert('Order placed successfully!');
         window.location.href='order-list.html'
     } catch (error) {
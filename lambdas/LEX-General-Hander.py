@@ -1,11 +1,14 @@
 import json
 import logging
-import requests
 import boto3
-import os
-from boto3.dynamodb.conditions import Key, Attr
-from decimal import Decimal
+from boto3.dynamodb.conditions import Key
 import uuid
+from cart_store import chatbot_items, clear_cart, get_cart, set_quantity
+from dynamo_json import dumps
+from pricing import format_cents, price_lines, to_cents
+from opensearch_client import OpenSearchClient
+from trigram_index import TrigramIndex
+from search_snapshot import load_snapshot_documents
 
 # Initialize AWS clients
 dynamodb = boto3.resource('dynamodb')
@@ -13,15 +16,17 @@ lambda_client = boto3.client("lambda")
 
 # DynamoDB table names
 MENU_TABLE_NAME = 'Menu_Items'
-CART_TABLE_NAME = 'Cart'
+MENU_INDEX_NAME = 'restaurant_id-index'
 
 logger = logging.getLogger()
 logger.setLevel(logging.DEBUG)
 
-# Environment variables for OpenSearch credentials and endpoint
-username = os.getenv("OPENSEARCH_USERNAME")
-password = os.getenv("OPENSEARCH_PASSWORD")
-endpoint = os.getenv("OPENSEARCH_ENDPOINT")
+# Uses the master user: deploy with OPENSEARCH_AUTH=basic plus OPENSEARCH_ENDPOINT,
+# OPENSEARCH_USERNAME and OPENSEARCH_PASSWORD
+search_client = OpenSearchClient()
+
+# Trigram index of restaurant names, built once per container for name resolution
+restaurant_name_index = None
 
 def lambda_handler(event, context):
     """
@@ -44,11 +49,6 @@ def lambda_handler(event, context):
     else:
         return default_fallback_response(event, session_attributes)
 
-def decimal_default(obj):
-    if isinstance(obj, Decimal):
-        return float(obj)
-    raise TypeError
-
 def handle_main_intent(event, session_attributes, user_id):
     """
     Handler for MainIntent.
@@ -119,11 +119,11 @@ def handle_main_intent(event, session_attributes, user_id):
             }
         
         user_data = items[0]
-        logger.info(f"user_data retrieved: {json.dumps(user_data, indent=2, default=decimal_default)}")
+        logger.info(f"user_data retrieved: {dumps(user_data)}")
         
         # Extract coordinates
         coordinates = user_data.get('coordinates', {})
-        logger.info(f"Coordinates field: {json.dumps(coordinates, indent=2, default=decimal_default)}")
+        logger.info(f"Coordinates field: {dumps(coordinates)}")
 
         lat = float(coordinates.get('lat', 0))
         lon = float(coordinates.get('lon', 0))
@@ -273,134 +273,102 @@ def query_nearby_restaurants(lat, lon):
     }
 
     try:
-        response = requests.post(
-            f"{endpoint}/restaurants_index/_search",
-            auth=(username, password),
-            headers={"Content-Type": "application/json"},
-            json=search_body
-        )
-        if response.status_code == 200:
-            search_data = response.json()
-            results = [
-                {
-                    "name": hit['_source']['name'],
-                    "cuisine": hit['_source']['cuisine'],
-                    "distance": round(hit['sort'][0], 2)
-                }
-                for hit in search_data.get("hits", {}).get("hits", [])
-            ]
-            return results
-        else:
-            logger.error(f"OpenSearch query failed with status {response.status_code}: {response.text}")
-            return []
+        search_data = search_client.search("restaurants_index", search_body)
+        results = [
+            {
+                "name": hit['_source']['name'],
+                "cuisine": hit['_source']['cuisine'],
+                "distance": round(hit['sort'][0], 2)
+            }
+            for hit in search_data.get("hits", {}).get("hits", [])
+        ]
+        return results
     except Exception as e:
         logger.error(f"Error querying OpenSearch: {e}")
         return []
 
-def decimal_to_float(obj):
-    """
-    Recursively convert DynamoDB Decimal types to float.
-    """
-    if isinstance(obj, list):
-        return [decimal_to_float(i) for i in obj]
-    elif isinstance(obj, dict):
-        return {k: decimal_to_float(v) for k, v in obj.items()}
-    elif isinstance(obj, Decimal):
-        return float(obj)
-    else:
-        return obj
-
 def get_menu_by_restaurant_id(restaurant_id):
     """
-    Query DynamoDB Menu_Items table for menu items by restaurant_name.
+    Query the Menu_Items restaurant_id index for a restaurant's menu items,
+    following LastEvaluatedKey so large menus are not truncated.
     """
     table = dynamodb.Table(MENU_TABLE_NAME)
+    query_kwargs = {
+        'IndexName': MENU_INDEX_NAME,
+        'KeyConditionExpression': Key('restaurant_id').eq(restaurant_id)
+    }
     try:
-        response = table.scan(
-            FilterExpression=boto3.dynamodb.conditions.Attr('restaurant_id').eq(restaurant_id)
-        )
-        return decimal_to_float(response.get('Items', []))
+        items = []
+        while True:
+            response = table.query(**query_kwargs)
+            items.extend(response.get('Items', []))
+            last_evaluated_key = response.get('LastEvaluatedKey')
+            if not last_evaluated_key:
+                break
+            query_kwargs['ExclusiveStartKey'] = last_evaluated_key
+        return items
     except Exception as e:
         logger.error(f"Error retrieving menu from DynamoDB: {e}")
         return []
 
-def update_cart(user_id, restaurant_id, item_name, quantity, price):
+def get_restaurant_name_index():
     """
-    Add an item to the user's cart in the Cart table.
+    Build the restaurant name index on first use, from the search snapshot when it
+    is available, otherwise from a single paginated scan of the Restaurant table.
     """
-    table = dynamodb.Table(CART_TABLE_NAME)
-    try:
-        # Calculate total price for the item
-        total_price = Decimal(str(quantity)) * Decimal(str(price))
-
-        # Insert or update the cart
-        table.put_item(
-            Item={
-                'user_id': user_id,
-                'restaurant_id': restaurant_id,
-                'item_list': [{
-                    'item_name': item_name,
-                    'item_quantity': Decimal(str(quantity)),
-                    'item_price': Decimal(str(price))
-                }],
-                'total_price': total_price
+    global restaurant_name_index
+    if restaurant_name_index is None:
+        try:
+            documents = load_snapshot_documents()
+        except Exception as e:
+            logger.info(f"Search snapshot unavailable, scanning Restaurant table: {e}")
+            restaurant_table = dynamodb.Table("Restaurant")
+            scan_kwargs = {
+                "ProjectionExpression": "restaurant_id, #n",
+                "ExpressionAttributeNames": {"#n": "name"}
             }
-        )
-        return True
-    except Exception as e:
-        logger.error(f"Error updating cart in DynamoDB: {e}")
-        return False
+            documents = []
+            while True:
+                response = restaurant_table.scan(**scan_kwargs)
+                documents.extend(response.get("Items", []))
+                if "LastEvaluatedKey" not in response:
+                    break
+                scan_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+        restaurant_name_index = TrigramIndex.from_documents(documents)
+    return restaurant_name_index
 
 def get_restaurant_id_by_name(restaurant_name):
     """
-    Query the DynamoDB Restaurant table for the restaurant_id by comparing normalized names.
+    Resolve a spoken/typed restaurant name to its restaurant_id: exact normalized
+    match first, then the closest name in the trigram index ("chipolte" -> "Chipotle").
     """
     try:
-        # Access the DynamoDB Restaurant table
-        restaurant_table = dynamodb.Table("Restaurant")
-
-        # Scan the table to find a matching restaurant name
-        response = restaurant_table.scan()
-        items = response.get("Items", [])
-
-        # Iterate through items and find a match
-        for item in items:
-            db_name = item.get("name", "").strip().lower()  # Normalize DB name for comparison
-            if db_name == restaurant_name.strip().lower():  # Normalize input name for comparison
-                return item.get("restaurant_id")  # Return the matched restaurant_id
-
-        # No match found
-        logger.warning(f"No restaurant found with the name: {restaurant_name}")
-        return None
+        restaurant_id = get_restaurant_name_index().lookup(restaurant_name)
+        if not restaurant_id:
+            logger.warning(f"No restaurant found with the name: {restaurant_name}")
+        return restaurant_id
     except Exception as e:
         logger.error(f"Error querying restaurant_id for {restaurant_name}: {e}")
         return None
 
 def initialize_cart(user_id):
+    """
+    Load the user's cart through the shared cart store, the same cart the web
+    app reads and writes. A missing cart is simply empty; nothing is written.
+    """
     try:
-        cart_table = dynamodb.Table("Cart")
-        
-        # Query the Cart table for the user's cart
-        response = cart_table.get_item(Key={"user_id": user_id})
-        
-        # If cart exists, return it
-        if "Item" in response:
+        cart = get_cart(user_id)
+        if cart:
             logger.info(f"Cart found for user {user_id}.")
-            return response["Item"].get("cart", [])
-        
-        # If cart doesn't exist, initialize it
-        logger.info(f"No cart found for user {user_id}. Initializing a new cart.")
-        cart_table.put_item(
-            Item={
-                "user_id": user_id,
-                "cart": []  # Start with an empty cart
-            }
-        )
-        return []  # Return an empty cart
+        return chatbot_items(cart)
     except Exception as e:
-        logger.error(f"Error initializing cart for user {user_id}: {e}")
+        logger.error(f"Error loading cart for user {user_id}: {e}")
         return []  # Return an empty cart as a fallback
 
+def price_session_cart(cart):
+    """Price the session cart ([{item_id, item_name, quantity, price}]) in integer cents."""
+    return price_lines([to_cents(item["price"]) for item in cart], [int(item["quantity"]) for item in cart])
+
 def handle_order_intent(event, session_attributes, user_id):
     """
     Handles the order intent by retrieving the menu, collecting item and quantity, and updating the cart.
@@ -443,24 +411,7 @@ def handle_order_intent(event, session_attributes, user_id):
     
     # Initialize the cart if it does not exist in session attributes
     if "cart" not in session_attributes:
-        session_attributes["cart"] = json.dumps([])  # Initialize an empty cart in session attributes
-        try:
-            cart_table = dynamodb.Table("Cart")
-            response = cart_table.get_item(Key={"user_id": user_id})
-            if "Item" in response:
-                session_attributes["cart"] = json.dumps(response["Item"]["cart"])  # Load the cart from the database
-                logger.info(f"Cart loaded from database for user {user_id}.")
-            else:
-                # Initialize a new cart in DynamoDB
-                cart_table.put_item(
-                    Item={
-                        "user_id": user_id,
-                        "cart": []  # Save an empty cart in DynamoDB
-                    }
-                )
-                logger.info(f"Initialized a new cart for user {user_id} in DynamoDB.")
-        except Exception as e:
-            logger.error(f"Error initializing cart for user {user_id}: {e}")
+        session_attributes["cart"] = json.dumps(initialize_cart(user_id))
 
 
     restaurant_id = session_attributes.get("restaurant_id")
@@ -494,7 +445,7 @@ def handle_order_intent(event, session_attributes, user_id):
 
             # Format and store the menu
             menu_list = "\n".join([f"{i+1}. {item['item_name']} - ${item['price']:.2f}" for i, item in enumerate(menu)])
-            session_attributes["menu"] = json.dumps(menu)
+            session_attributes["menu"] = dumps(menu)
             logger.info(f"Menu stored in session attributes: {session_attributes['menu']}")
 
         # Check if the user is already being asked for the item name
@@ -575,16 +526,13 @@ def handle_order_intent(event, session_attributes, user_id):
     # Save the updated cart to session attributes
     session_attributes["cart"] = json.dumps(cart)
 
-    # Save the updated cart to DynamoDB only when confirmed and after modifying the cart
+    # Persist only the changed line (quantity, total and version) instead of rewriting the cart.
+    # The stored cart comes back with the write, so the session picks up web edits for free.
     try:
-        cart = json.loads(session_attributes.get("cart", "[]"))
-        cart_table = dynamodb.Table("Cart")
-        cart_table.put_item(
-            Item={
-                "user_id": user_id,
-                "cart": cart  # Save the updated cart
-            }
-        )
+        stored_cart = set_quantity(user_id, restaurant_id, item["item_id"], int(quantity),
+                                   item_name=item["item_name"], item_price=item["price"])
+        cart = chatbot_items(stored_cart)
+        session_attributes["cart"] = json.dumps(cart)
         logger.info(f"Updated cart saved for user {user_id}.")
     except Exception as e:
         logger.error(f"Error saving updated cart to DynamoDB for user {user_id}: {e}")
@@ -616,8 +564,10 @@ def handle_order_intent(event, session_attributes, user_id):
     # Step 6: Confirm the order
     if not order_confirmation:
         # Summarize cart content (use the session-stored cart to avoid doubling quantities)
-        total_items = "\n".join([f"{i+1}. {item['quantity']}x {item['item_name']} - ${item['price'] * item['quantity']:.2f}" for i, item in enumerate(cart)])
-        total_price = sum(item["price"] * item["quantity"] for item in cart)
+        priced = price_session_cart(cart)
+        total_items = "\n".join([f"{i+1}. {item['quantity']}x {item['item_name']} - ${format_cents(line_total)}"
+                                 for i, (item, line_total) in enumerate(zip(cart, priced["line_totals"]))])
+        total_price = format_cents(priced["total"])
         session_attributes["total_price"] = total_price
         return {
             "sessionState": {
@@ -625,14 +575,15 @@ def handle_order_intent(event, session_attributes, user_id):
                 "dialogAction": {"type": "ElicitSlot", "slotToElicit": "OrderConfirmation"},
                 "intent": intent
             },
-            "messages": [{"contentType": "PlainText", "content": f"Here's your order summary:\n{total_items}\nTotal: ${total_price:.2f}\nWould you like to place this order?"}]
+            "messages": [{"contentType": "PlainText", "content": f"Here's your order summary:\n{total_items}\nTotal: ${total_price}\nWould you like to place this order?"}]
         }
 
     # Step 7: Place the order
     if order_confirmation.lower() == "yes":
         restaurant_id = session_attributes["restaurant_id"]
         items = [{"item_id": item["item_id"], "quantity": item["quantity"]} for item in cart]
-        total_price = sum(item["price"] * item["quantity"] for item in cart)
+        # Indicative only: LF7 re-prices the order from the menu
+        total_price = price_session_cart(cart)["total"] / 100
 
         # Generate a unique order ID
         order_id = str(uuid.uuid4())
@@ -669,13 +620,7 @@ def handle_order_intent(event, session_attributes, user_id):
 
                 # Clear the cart after placing the order
                 try:
-                    cart_table = dynamodb.Table("Cart")
-                    cart_table.put_item(
-                        Item={
-                            "user_id": user_id,
-                            "cart": []  # Save an empty cart to clear it in DynamoDB
-                        }
-                    )
+                    clear_cart(user_id)
                     logger.info(f"Cart cleared for user {user_id} after placing the order.")
                 except Exception as e:
                     logger.error(f"Error clearing cart for user {user_id}: {e}")
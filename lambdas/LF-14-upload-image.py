@@ -4,7 +4,8 @@ import uuid
 import json
 import logging
 import requests
-from requests.auth import HTTPBasicAuth
+from opensearch_client import OpenSearchClient
+from dynamo_batch import batch_get_items
 
 # Initialize AWS clients
 s3 = boto3.client('s3')
@@ -17,13 +18,12 @@ logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
 # OpenSearch configurations
-OPENSEARCH_HOST = "https://search-feastfleet-ylmv33u5rsoztak4q2xazv4x7u.us-east-1.es.amazonaws.com"
 MENU_ITEMS_INDEX = 'menu_items_index'
 RESTAURANTS_INDEX = 'restaurants_index'
 
-# OpenSearch credentials
-OPENSEARCH_USERNAME = "admin"
-OPENSEARCH_PASSWORD = "Cloudcomputing2024!!"
+# Shared pooled client with the master user: deploy with OPENSEARCH_AUTH=basic plus
+# OPENSEARCH_ENDPOINT, OPENSEARCH_USERNAME and OPENSEARCH_PASSWORD
+search_client = OpenSearchClient()
 
 # SageMaker endpoint name
 ENDPOINT_NAME = 'Endpoint-ResNet-50-1'
@@ -1038,41 +1038,38 @@ LABELS = ["tench",
 
 def query_opensearch(index_name, query):
     """Helper function to query OpenSearch."""
-    url = f"{OPENSEARCH_HOST}/{index_name}/_search"
-    headers = {"Content-Type": "application/json"}
-    auth = HTTPBasicAuth(OPENSEARCH_USERNAME, OPENSEARCH_PASSWORD)  # Use basic authentication
-    
     try:
-        response = requests.post(url, auth=auth, headers=headers, data=json.dumps(query))
-        response.raise_for_status()  # Raise HTTPError for bad HTTP responses
-        return response.json()
+        return search_client.search(index_name, query)
     except requests.exceptions.RequestException as e:
         logger.error("Error querying OpenSearch: %s", str(e), exc_info=True)
         raise
 
 
 def get_restaurants_by_ids(restaurant_ids):
-    table = dynamodb.Table(RESTAURANT_TABLE_NAME)
-    restaurants = []
+    # One BatchGetItem per 100 ids instead of a get_item per restaurant
+    try:
+        items = batch_get_items(
+            dynamodb,
+            RESTAURANT_TABLE_NAME,
+            [{'restaurant_id': restaurant_id} for restaurant_id in restaurant_ids],
+            attributes=['name', 'address', 'cuisine']
+        )
+    except Exception as e:
+        print(f"Error fetching restaurants {restaurant_ids}: {e}")
+        return []
 
-    for restaurant_id in restaurant_ids:
-        try:
-            # Fetch the restaurant by its ID
-            response = table.get_item(Key={'restaurant_id': restaurant_id})
-            if 'Item' in response:
-                # Extract only the desired attributes
-                item = response['Item']
-                filtered_item = {
-                    'restaurant_id': item.get('restaurant_id'),
-                    'name': item.get('name'),
-                    'address': item.get('address'),
-                    'cuisine': item.get('cuisine')
-                }
-                restaurants.append(filtered_item)
-            else:
-                print(f"Restaurant with ID {restaurant_id} not found.")
-        except Exception as e:
-            print(f"Error fetching restaurant {restaurant_id}: {e}")
+    restaurants = []
+    for restaurant_id, item in zip(restaurant_ids, items):
+        if item:
+            # Extract only the desired attributes
+            restaurants.append({
+                'restaurant_id': item.get('restaurant_id'),
+                'name': item.get('name'),
+                'address': item.get('address'),
+                'cuisine': item.get('cuisine')
+            })
+        else:
+            print(f"Restaurant with ID {restaurant_id} not found.")
 
     return restaurants
 
@@ -1,23 +1,102 @@
+import base64
 import json
+import os
 import boto3
-from decimal import Decimal
+from dynamo_batch import batch_get_items
+from dynamo_json import dumps
+from ttl_cache import TTLCache
 
 dynamodb = boto3.resource('dynamodb', region_name="us-east-1")
 order_table = dynamodb.Table('Order')
-restaurant_table = dynamodb.Table('Restaurant')
+RESTAURANT_TABLE_NAME = 'Restaurant'
 
-class DecimalEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, Decimal):
-            return str(obj)
-        return super(DecimalEncoder, self).default(obj)
+# Restaurant summaries shown next to each order, kept while the container is warm
+RESTAURANT_SUMMARY_FIELDS = ['restaurant_id', 'name']
+RESTAURANT_CACHE_SIZE = int(os.getenv('RESTAURANT_CACHE_SIZE', '1024'))
+RESTAURANT_CACHE_TTL = int(os.getenv('RESTAURANT_CACHE_TTL', '300'))
+restaurant_cache = TTLCache(maxsize=RESTAURANT_CACHE_SIZE, ttl=RESTAURANT_CACHE_TTL)
+
+# Orders of one user by placement time; see database/create_dynamodb_tables.py
+ORDER_USER_INDEX_NAME = 'user_id-placed_at-index'
+ORDER_FIELDS = ['order_id', 'restaurant_id', 'restaurant_name', 'status', 'placed_at', 'total_price', 'items']
+
+# Orders per page (`limit` query parameter)
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# An index page's LastEvaluatedKey: the table key plus the index key
+CURSOR_KEYS = {'order_id', 'user_id', 'placed_at'}
+
+
+def encode_cursor(last_evaluated_key):
+    """Opaque next-page token carrying the key of the last order on a page."""
+    return base64.urlsafe_b64encode(json.dumps(last_evaluated_key).encode()).decode()
+
+
+def decode_cursor(cursor, user_id):
+    try:
+        start_key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    # A cursor only resumes the history of the user it was issued for
+    if not isinstance(start_key, dict) or set(start_key) != CURSOR_KEYS or start_key['user_id'] != user_id:
+        raise ValueError("Invalid cursor")
+    return start_key
+
+
+def query_orders(user_id, limit, cursor=None):
+    """
+    One page of a user's orders, newest first, and the cursor of the next page
+    (None on the last page). Cost depends on the page size, not on how many
+    orders the table holds.
+    """
+    query_kwargs = {
+        'IndexName': ORDER_USER_INDEX_NAME,
+        'KeyConditionExpression': '#user_id = :uid',
+        'ScanIndexForward': False,
+        'Limit': limit,
+        'ProjectionExpression': ', '.join(f'#{field}' for field in ORDER_FIELDS),
+        'ExpressionAttributeNames': {f'#{field}': field for field in ORDER_FIELDS + ['user_id']},
+        'ExpressionAttributeValues': {':uid': user_id}
+    }
+    if cursor:
+        query_kwargs['ExclusiveStartKey'] = decode_cursor(cursor, user_id)
+    response = order_table.query(**query_kwargs)
+    last_evaluated_key = response.get('LastEvaluatedKey')
+    return response.get('Items', []), encode_cursor(last_evaluated_key) if last_evaluated_key else None
+
+
+def get_restaurant_summaries(restaurant_ids):
+    """
+    {restaurant_id: summary} for the restaurants on a page of orders: each id
+    once, warm entries from memory, the rest with one BatchGetItem per 100
+    restaurants. Restaurants that no longer exist are left out.
+    """
+    summaries = {}
+    missing = []
+    for restaurant_id in dict.fromkeys(restaurant_ids):
+        summary = restaurant_cache.get(restaurant_id)
+        if summary is None:
+            missing.append(restaurant_id)
+        else:
+            summaries[restaurant_id] = summary
+
+    if missing:
+        keys = [{'restaurant_id': restaurant_id} for restaurant_id in missing]
+        stored = batch_get_items(dynamodb, RESTAURANT_TABLE_NAME, keys, attributes=RESTAURANT_SUMMARY_FIELDS)
+        for restaurant_id, summary in zip(missing, stored):
+            if summary is not None:
+                restaurant_cache.set(restaurant_id, summary)
+                summaries[restaurant_id] = summary
+    return summaries
 
 def lambda_handler(event, context):
     try:
         print("Received event:", json.dumps(event))
         print("Query parameters:", event.get('queryStringParameters'))
         
-        user_id = event.get('queryStringParameters', {}).get('user_id')
+        params = event.get('queryStringParameters') or {}
+        user_id = params.get('user_id')
         print("Extracted user_id:", user_id)
 
         if not user_id:
@@ -26,22 +105,27 @@ def lambda_handler(event, context):
                 'body': json.dumps({'message': 'user_id is required'})
             }
         
-        # Query orders for the user
-        response = order_table.scan(
-            FilterExpression='user_id = :uid',
-            ExpressionAttributeValues={':uid': user_id}
-        )
-        
-        orders = response.get('Items', [])
+        # One page of the user's orders, newest first
+        try:
+            limit = max(1, min(int(params.get('limit', PAGE_SIZE)), MAX_PAGE_SIZE))
+            orders, next_cursor = query_orders(user_id, limit, params.get('cursor'))
+        except ValueError as e:
+            return {
+                'statusCode': 400,
+                'body': json.dumps({'message': str(e)})
+            }
         
+        # Orders placed since LF7 stores the restaurant name need no lookup;
+        # older ones on the page share at most one batched read
+        restaurants = get_restaurant_summaries(
+            order['restaurant_id'] for order in orders if 'restaurant_name' not in order
+        )
+
         # Process each order to include restaurant name and item count
         processed_orders = []
         for order in orders:
-            # Get restaurant name
-            restaurant_response = restaurant_table.get_item(
-                Key={'restaurant_id': order['restaurant_id']}
-            )
-            restaurant_name = restaurant_response.get('Item', {}).get('name', 'Unknown Restaurant')
+            restaurant = restaurants.get(order['restaurant_id'], {})
+            restaurant_name = order.get('restaurant_name') or restaurant.get('name', 'Unknown Restaurant')
             
             # Count items
             items_count = sum(item['quantity'] for item in order.get('items', []))
@@ -51,16 +135,17 @@ def lambda_handler(event, context):
                 'restaurant_id': order['restaurant_id'],
                 'restaurant_name': restaurant_name,
                 'status': order['status'],
-                'timestamp': order['timestamp'],
-                'total_price': str(order.get('total_price', '0')),
+                'timestamp': order['placed_at'],
+                'total_price': order.get('total_price', 0),
                 'items_count': items_count
             })
         
         return {
             'statusCode': 200,
-            'body': json.dumps({
-                'orders': processed_orders
-            }, cls=DecimalEncoder)
+            'body': dumps({
+                'orders': processed_orders,
+                'next_cursor': next_cursor
+            })
         }
         
     except Exception as e:
@@ -1,12 +1,20 @@
+import base64
 import boto3
 import json
-import logging
-import requests 
+import math
+import os
+import re
+import time
+import requests
 from requests_aws4auth import AWS4Auth
-from requests.auth import HTTPBasicAuth
 from botocore.exceptions import ClientError
+from opensearch_client import OpenSearchClient
+from ttl_cache import TTLCache
+from bm25_index import BM25Index
+from trigram_index import TrigramIndex
+from search_snapshot import load_snapshot_documents
 region = 'us-east-1'
-opensearch_url = 'https://search-feastfleet-ylmv33u5rsoztak4q2xazv4x7u.us-east-1.es.amazonaws.com/restaurants_index/_search'
+RESTAURANTS_INDEX = 'restaurants_index'
 
 session = boto3.Session()
 credentials = session.get_credentials()
@@ -18,88 +26,511 @@ awsauth = AWS4Auth(
     service,
     session_token=credentials.token
 )
+search_client = OpenSearchClient(sigv4_auth=awsauth)
+location_client = boto3.client('location', region_name=region)
+dynamodb = boto3.resource('dynamodb', region_name=region)
+user_table = dynamodb.Table('User')
+
+# Search results for popular queries are reused across warm invocations
+search_cache = TTLCache(
+    maxsize=int(os.getenv('SEARCH_CACHE_SIZE', '512')),
+    ttl=int(os.getenv('SEARCH_CACHE_TTL_SECONDS', '300'))
+)
+
+# Resolved search origins (geocoded text locations and user profile coordinates).
+# Failed or empty lookups are retried after ORIGIN_MISS_TTL seconds, so one
+# throttled call doesn't turn off distance ranking for the full hour
+origin_cache = TTLCache(maxsize=1024, ttl=3600)
+ORIGIN_MISS_TTL = 60
+
+# Local indexes built from the snapshot written by database/export_search_snapshot.py
+# (bundled, or fetched from S3): BM25 for OpenSearch outages, trigrams for typos
+snapshot_documents = None
+local_index = None
+name_index = None
+
+# Fail over quickly instead of waiting on a struggling cluster: one attempt
+# (no retries), then the local index
+SEARCH_TIMEOUT = (1, 2)
+
+# After an outage (connection error, timeout or 5xx) searches skip OpenSearch
+# and go straight to the local index for this many seconds
+SEARCH_BREAKER_SECONDS = int(os.getenv('SEARCH_BREAKER_SECONDS', '30'))
+opensearch_down_until = 0.0
+
+# Fields the results page needs to render a restaurant card
+RESTAURANT_CARD_FIELDS = ["restaurant_id", "name", "cuisine", "address", "coordinates"]
+
+SEARCH_SIZE = 10
+SEARCH_MAX_SIZE = 50
+
+# Deterministic order for search_after paging: relevance, then restaurant_id
+SEARCH_SORT = [{"_score": "desc"}, {"restaurant_id": "asc"}]
+
+# Location-aware search: hits outside the radius are filtered out and the text
+# score is multiplied by a gaussian decay on distance from the origin
+GEO_DEFAULT_RADIUS_KM = 10
+GEO_MAX_RADIUS_KM = 50
+GEO_DECAY_SCALE_KM = 2
+GEO_DECAY_OFFSET_KM = 0.5
+GEO_DECAY = 0.5
+PLACE_INDEX_NAME = 'RestaurantPlaceIndex'
+COORDINATES_PATTERN = re.compile(r"^\s*(-?\d+(?:\.\d+)?)\s*,\s*(-?\d+(?:\.\d+)?)\s*$")
+
+# Type-ahead returns only what the dropdown renders
+AUTOCOMPLETE_FIELDS = ["restaurant_id", "name", "cuisine"]
+AUTOCOMPLETE_DEFAULT_SIZE = 5
+AUTOCOMPLETE_MAX_SIZE = 10
+
+# Search API query type -> restaurants_index field
+SEARCH_FIELDS = {
+    "name": "name",
+    "cuisineType": "cuisine",
+}
+
+
+def normalize_query(value):
+    return " ".join(str(value).lower().split())
 
 
-def get_restaurant_by_name(name):
+def is_outage(error):
+    """Connection errors, timeouts and 5xx responses; a rejected query is not an outage."""
+    if isinstance(error, requests.HTTPError):
+        return error.response is None or error.response.status_code >= 500
+    return isinstance(error, requests.RequestException)
 
-    query = {
-        "size": 10,
-        "query":{
-            "match":{
-                "name": name,
+
+def trip_search_breaker(error):
+    global opensearch_down_until
+    if is_outage(error):
+        opensearch_down_until = time.monotonic() + SEARCH_BREAKER_SECONDS
+
+
+def search_breaker_open():
+    return time.monotonic() < opensearch_down_until
+
+
+def search_restaurants(field, value, source=False, size=SEARCH_SIZE, search_after=None, near=None):
+    """
+    Run a single match query against restaurants_index and return the raw hits.
+    `source` is passed through as OpenSearch source filtering: False for ids only,
+    or a list of fields to return with each hit. `search_after` is the sort
+    values of the last hit of the previous page. `near` is an optional
+    (lat, lon, radius_km) origin: hits are limited to the radius, ranked with a
+    distance decay and annotated with `distance_km`.
+    Results are cached on the normalized (field, query, size, source, cursor, origin) tuple.
+    """
+    value = normalize_query(value)
+    if near and not source:
+        source = ["coordinates"]
+    cache_key = (field, value, size, tuple(source) if source else None,
+                 tuple(search_after) if search_after else None, near)
+
+    def run_query():
+        text_query = {
+            "match": {
+                field: value
             }
         }
+        if near:
+            text_query = geo_ranked_query(text_query, near)
+        query = {
+            "size": size,
+            "_source": source,
+            "track_total_hits": False,
+            "query": text_query,
+            "sort": SEARCH_SORT
+        }
+        if search_after:
+            query["search_after"] = list(search_after)
+        response_json = search_client.search(RESTAURANTS_INDEX, query, timeout=SEARCH_TIMEOUT, retry=False)
+        hits = response_json["hits"]["hits"]
+        if near:
+            add_distances(hits, near)
+        return hits
+
+    if search_breaker_open():
+        # OpenSearch failed moments ago: answer locally instead of waiting on it again
+        hits = search_cache.get(cache_key)
+        if hits is None:
+            hits = search_local_index(field, value, source, size, search_after, near)
+        if hits is not None:
+            return hits
+
+    try:
+        return search_cache.get_or_load(cache_key, run_query)
+    except Exception as e:
+        trip_search_breaker(e)
+        # Fallback results are not cached so OpenSearch is retried once the breaker closes
+        hits = search_local_index(field, value, source, size, search_after, near)
+        if hits is None:
+            raise
+        print("OpenSearch unavailable, served from local index:", e)
+        return hits
+
+
+def geo_ranked_query(text_query, near):
+    """
+    Wrap a text query in a geo_distance filter and a gauss decay on coordinates,
+    so matching, radius filtering and distance ranking happen in one request.
+    """
+    lat, lon, radius_km = near
+    origin = {"lat": lat, "lon": lon}
+    return {
+        "function_score": {
+            "query": {
+                "bool": {
+                    "must": text_query,
+                    "filter": {
+                        "geo_distance": {
+                            "distance": f"{radius_km}km",
+                            "coordinates": origin
+                        }
+                    }
+                }
+            },
+            "functions": [
+                {
+                    "gauss": {
+                        "coordinates": {
+                            "origin": origin,
+                            "scale": f"{GEO_DECAY_SCALE_KM}km",
+                            "offset": f"{GEO_DECAY_OFFSET_KM}km",
+                            "decay": GEO_DECAY
+                        }
+                    }
+                }
+            ],
+            "boost_mode": "multiply"
+        }
     }
 
-    headers = { "Content-Type" : "application/json"}
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 6371.0 * 2 * math.asin(math.sqrt(a))
+
+
+def gauss_decay(distance_km):
+    """Same curve as the OpenSearch gauss function used in geo_ranked_query."""
+    sigma_squared = -GEO_DECAY_SCALE_KM ** 2 / (2 * math.log(GEO_DECAY))
+    return math.exp(-max(0.0, distance_km - GEO_DECAY_OFFSET_KM) ** 2 / (2 * sigma_squared))
+
+
+def add_distances(hits, near):
+    lat, lon, _ = near
+    for hit in hits:
+        coordinates = hit.get("_source", {}).get("coordinates")
+        if coordinates:
+            hit["distance_km"] = round(haversine_km(lat, lon, float(coordinates["lat"]), float(coordinates["lon"])), 2)
+
+
+def parse_location_value(value):
+    # The frontend sends the literal strings "null"/"undefined" for missing values
+    if value is None or str(value).strip().lower() in ("", "null", "undefined"):
+        return None
+    return str(value).strip()
+
+
+def resolve_search_origin(location, user_id):
+    """
+    Resolve where to search around: "lat,lon" in `location`, else the geocoded
+    `location` text, else the user's saved coordinates. Returns (lat, lon) or None.
+    Coordinates are rounded to ~100m so nearby searches share cache entries.
+    """
+    location = parse_location_value(location)
+    user_id = parse_location_value(user_id)
+
+    if location:
+        match = COORDINATES_PATTERN.match(location)
+        if match:
+            return round(float(match.group(1)), 3), round(float(match.group(2)), 3)
+        origin = origin_cache.get_or_load(("location", location.lower()), lambda: geocode_location(location),
+                                          miss_ttl=ORIGIN_MISS_TTL)
+        if origin:
+            return origin
+
+    if user_id:
+        return origin_cache.get_or_load(("user", user_id), lambda: get_user_coordinates(user_id),
+                                        miss_ttl=ORIGIN_MISS_TTL)
+    return None
+
+
+def geocode_location(location):
     try:
-        response = requests.get(
-            opensearch_url,
-            auth=('admin', 'Cloudcomputing2024!!'),
-            headers=headers,
-            json=query
+        response = location_client.search_place_index_for_text(
+            IndexName=PLACE_INDEX_NAME,
+            Text=location,
+            MaxResults=1
         )
-        response_json = response.json()
-        print(response_json)
-        restaurant_ids = [hit["_id"] for hit in response_json["hits"]["hits"]]
-        return restaurant_ids
+        if response['Results']:
+            lon, lat = response['Results'][0]['Place']['Geometry']['Point']  # AWS returns [lon, lat]
+            return round(lat, 3), round(lon, 3)
     except Exception as e:
-        print("Error querying OpenSearch:", e)
+        print(f"Error geocoding location '{location}': {e}")
+    return None
+
+
+def get_user_coordinates(user_id):
+    try:
+        response = user_table.get_item(Key={'user_id': user_id}, ProjectionExpression='coordinates')
+        coordinates = response.get('Item', {}).get('coordinates')
+        if coordinates:
+            return round(float(coordinates['lat']), 3), round(float(coordinates['lon']), 3)
+    except ClientError as e:
+        print(f"Error retrieving coordinates for user {user_id}: {e}")
+    return None
+
+
+def get_snapshot_documents():
+    """
+    Load the restaurant snapshot on first use. Returns None when no snapshot is available.
+    """
+    global snapshot_documents
+    if snapshot_documents is None:
+        try:
+            snapshot_documents = load_snapshot_documents()
+            print(f"Loaded search snapshot with {len(snapshot_documents)} restaurants")
+        except Exception as e:
+            print("Error loading search snapshot:", e)
+            return None
+    return snapshot_documents
+
+
+def get_local_index():
+    global local_index
+    if local_index is None:
+        documents = get_snapshot_documents()
+        if documents is None:
+            return None
+        local_index = BM25Index.from_documents(documents)
+    return local_index
+
+
+def get_name_index():
+    global name_index
+    if name_index is None:
+        documents = get_snapshot_documents()
+        if documents is None:
+            return None
+        name_index = TrigramIndex.from_documents(documents)
+    return name_index
+
+
+def local_hit(restaurant_id, score, document, source):
+    """Shape a snapshot document like an OpenSearch hit."""
+    hit = {"_id": restaurant_id, "_score": score, "sort": [score, restaurant_id]}
+    if source:
+        if document.get("lat") is not None:
+            document = dict(document, coordinates={"lat": document["lat"], "lon": document["lon"]})
+        hit["_source"] = {field_name: document.get(field_name) for field_name in source}
+    return hit
+
+
+def search_local_index(field, value, source=False, size=SEARCH_SIZE, search_after=None, near=None):
+    """
+    Answer a search from the local BM25 index with hits shaped like OpenSearch's.
+    """
+    index = get_local_index()
+    if index is None:
+        return None
+
+    adjust = None
+    if near:
+        lat, lon, radius_km = near
+
+        def adjust(document):
+            if document.get("lat") is None:
+                return None
+            distance_km = haversine_km(lat, lon, document["lat"], document["lon"])
+            return gauss_decay(distance_km) if distance_km <= radius_km else None
+
+    hits = [local_hit(restaurant_id, score, document, source)
+            for restaurant_id, score, document in index.search(value, field, size, search_after, adjust)]
+    if near:
+        add_distances(hits, near)
+    return hits
+
+
+def fuzzy_name_hits(name, source=False, size=SEARCH_SIZE, near=None):
+    """
+    Typo-tolerant name search ("chipolte" -> "Chipotle") over the trigram index,
+    used when the exact match query finds nothing.
+    """
+    index = get_name_index()
+    if index is None:
         return []
 
+    if near and not source:
+        source = ["coordinates"]
+    hits = [local_hit(restaurant_id, score, document, source)
+            for restaurant_id, score, document in index.search(name, size)]
+    if near:
+        add_distances(hits, near)
+        hits = [hit for hit in hits if hit.get("distance_km") is not None and hit["distance_km"] <= near[2]]
+    return hits
 
-def get_restaurant_recommendations(cuisine_type):
 
-    query = {
-        "size": 10,  # 设置返回结果数量
-        "query": {
-            "match": {
-                "cuisine": cuisine_type  # 根据 cuisineType 匹配
+def get_autocomplete_suggestions(prefix, size=AUTOCOMPLETE_DEFAULT_SIZE):
+    """
+    Return up to `size` restaurant suggestions whose name or cuisine starts
+    with the typed prefix, using the edge n-gram autocomplete sub-fields.
+    """
+    prefix = normalize_query(prefix)
+    if not prefix:
+        return []
+
+    def run_query():
+        query = {
+            "size": size,
+            "_source": AUTOCOMPLETE_FIELDS,
+            "track_total_hits": False,
+            "query": {
+                "multi_match": {
+                    "query": prefix,
+                    "fields": ["name.autocomplete^2", "cuisine.autocomplete"],
+                    "operator": "and"
+                }
             }
         }
-    }
-
-    headers = {"Content-Type": "application/json"}
+        response_json = search_client.search(RESTAURANTS_INDEX, query, timeout=(1, 1), retry=False)
+        return [
+            {field_name: hit["_source"].get(field_name) for field_name in AUTOCOMPLETE_FIELDS}
+            for hit in response_json["hits"]["hits"]
+        ]
 
+    cache_key = ("autocomplete", prefix, size, None)
+    if search_breaker_open():
+        # No local autocomplete index; suggestions are optional, so don't wait on OpenSearch
+        return search_cache.get(cache_key) or []
     try:
-        response = requests.get(
-            opensearch_url,
-            auth=('admin', 'Cloudcomputing2024!!'),
-            headers=headers,
-            json=query
-        )
-        response_json = response.json()
-        print(response_json)
-        restaurant_ids = [hit["_id"] for hit in response_json["hits"]["hits"]]
-        return restaurant_ids
+        return search_cache.get_or_load(cache_key, run_query)
     except Exception as e:
+        trip_search_breaker(e)
         print("Error querying OpenSearch:", e)
         return []
 
+
+def invalidate_search_cache(query_type=None, query=None):
+    """
+    Drop cached search results in this container: everything, one query type,
+    or a single (type, query) pair. Returns the number of entries removed.
+    """
+    field = SEARCH_FIELDS.get(query_type, query_type)
+    value = normalize_query(query) if query is not None else None
+    return search_cache.invalidate_where(
+        lambda key: (field is None or key[0] == field) and (value is None or key[1] == value)
+    )
+
+
+def encode_cursor(hit):
+    """Opaque next-page token carrying the sort values of the last hit on a page."""
+    return base64.urlsafe_b64encode(json.dumps(hit["sort"]).encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        search_after = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(search_after, list) or len(search_after) != len(SEARCH_SORT):
+        raise ValueError("Invalid cursor")
+    return search_after
+
+
+def restaurant_cards(hits):
+    """
+    Build restaurant cards from source-filtered hits, so the results page does
+    not need a restaurant-get call per hit.
+    """
+    cards = []
+    for hit in hits:
+        card = {field_name: hit["_source"].get(field_name) for field_name in RESTAURANT_CARD_FIELDS}
+        card["restaurant_id"] = card["restaurant_id"] or hit["_id"]
+        if "distance_km" in hit:
+            card["distance_km"] = hit["distance_km"]
+        cards.append(card)
+    return cards
+
 def lambda_handler(event, context):
     """
     Lambda 函数入口点
     """
     try:
+        # Direct invocation hook, e.g. after a bulk re-index:
+        # {"action": "invalidate_search_cache", "type": "cuisineType", "query": "pizza"}
+        if event.get('action') == 'invalidate_search_cache':
+            removed = invalidate_search_cache(event.get('type'), event.get('query'))
+            return {
+                'statusCode': 200,
+                'body': json.dumps({'invalidated': removed, 'cache': search_cache.stats()})
+            }
+
         body = json.loads(event['body'])
         query_type = body.get('type')
         query = body.get('query')
 
-        restaurant_ids = []
-        if query_type == "name":
-            restaurant_ids = get_restaurant_by_name(query)
-        elif query_type == "cuisineType":
-            restaurant_ids = get_restaurant_recommendations(query)
-        else:
+        # hydrate=true returns restaurant cards alongside the ids in one round trip
+        hydrate = str(body.get('hydrate', '')).lower() == 'true'
+
+        if query_type == "autocomplete":
+            size = max(1, min(int(body.get('size', AUTOCOMPLETE_DEFAULT_SIZE)), AUTOCOMPLETE_MAX_SIZE))
+            return {
+                'statusCode': 200,
+                'body': json.dumps({'suggestions': get_autocomplete_suggestions(query or '', size)})
+            }
+
+        if query_type not in SEARCH_FIELDS:
             return {
                 "statusCode": 400,
                 "body": "Invalid query type"
             }
-        
+
+        size = max(1, min(int(body.get('size', SEARCH_SIZE)), SEARCH_MAX_SIZE))
+        try:
+            search_after = decode_cursor(body['cursor']) if body.get('cursor') else None
+        except ValueError as e:
+            return {
+                'statusCode': 400,
+                'body': json.dumps({'message': str(e)})
+            }
+
+        # Rank around the requested location (or the user's saved address) when one is known
+        near = None
+        origin = resolve_search_origin(body.get('location'), body.get('userId'))
+        if origin:
+            radius_km = min(float(body.get('radius', GEO_DEFAULT_RADIUS_KM)), GEO_MAX_RADIUS_KM)
+            near = (origin[0], origin[1], radius_km)
+
+        source = RESTAURANT_CARD_FIELDS if hydrate else False
+        try:
+            hits = search_restaurants(SEARCH_FIELDS[query_type], query, source, size, search_after, near)
+        except Exception as e:
+            print("Error querying OpenSearch:", e)
+            hits = []
+
+        # Misspelled names match nothing; retry the first page against the trigram index
+        fuzzy = False
+        if not hits and query_type == "name" and not search_after:
+            hits = fuzzy_name_hits(query, source, size, near)
+            fuzzy = bool(hits)
+
+        # A full page means there may be more; the cursor resumes after its last hit
+        result = {
+            'restaurantIds': [hit['_id'] for hit in hits],
+            'nextCursor': encode_cursor(hits[-1]) if hits and len(hits) == size and not fuzzy else None
+        }
+        if fuzzy:
+            result['fuzzy'] = True
+        if near:
+            result['distances'] = {hit['_id']: hit.get('distance_km') for hit in hits}
+        if hydrate:
+            result['restaurants'] = restaurant_cards(hits)
 
         return {
             'statusCode': 200,
-            'body': json.dumps({'restaurantIds': restaurant_ids})
+            'body': json.dumps(result)
         }
 
     except Exception as e:
@@ -2,6 +2,7 @@ import boto3
 import json
 import os
 import logging
+from idempotency import idempotent
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
@@ -11,6 +12,7 @@ sqs = boto3.client('sqs')
 # SQS queue URL
 QUEUE_URL = 'https://sqs.us-east-1.amazonaws.com/699475942485/Q2-reservation'
 
+@idempotent('LF11b')
 def lambda_handler(event, context):
     logger.info(f"Event: {json.dumps(event)}")
 
@@ -1,8 +1,8 @@
 import boto3
-import json
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 from botocore.exceptions import ClientError
+from sqs_consumer import consume
 
 
 # Initialize DynamoDB and SQS clients
@@ -17,42 +17,36 @@ USER_TABLE = 'User'
 SENDER_EMAIL = 'abr9982@nyu.edu'
 
 def lambda_handler(event, context):
-    try:
-        response_messages = []
-        for record in event['Records']:
-            # Parse message from SQS
-            message = json.loads(record['body'])
-            user_id = message['user_id']
-            restaurant_id = message['restaurant_id']
-            res_date = message['res_date']
-            time = message['time']
-            party_size = int(message['party_size'])
-
-            # Atomic check and reservation creation
-            success, message = process_reservation(user_id, restaurant_id, res_date, time, party_size)
-            response_messages.append({'success': success, 'message': message})
-            print(f"Processed reservation for user {user_id}: {message}")
-            print('RESPONSE MESSAGES ', response_messages)
-
-            user_email = get_user_email(user_id)
-            if not user_email:
-                print(f"No email found for user {user_id}. Skipping notification.")
-                continue
-
-            # Send email notification to the user
-            user_email = get_user_email(user_id)
-            reservation_id= f"{restaurant_id}#{res_date}#{time}#{user_id}"
-            send_email_notification(user_email, reservation_id, restaurant_id, res_date, time, party_size, success, message)
-
-
-        return {'statusCode': 200, 'body': json.dumps(response_messages)}
-
-    except Exception as e:
-        print(f"Unexpected error: {str(e)}")
-        return {
-            'statusCode': 500,
-            'body': json.dumps({'error': str(e)})
-        }
+    # Reservations for the same restaurant and date run one at a time, so two
+    # messages in a batch cannot both pass the capacity check for the last seats
+    return consume(event, process_message, key=reservation_slot)
+
+def reservation_slot(message):
+    return f"{message['restaurant_id']}#{message['res_date']}"
+
+def process_message(message, record):
+    """
+    Handle one reservation request. Declined reservations are answered by email;
+    errors raise, so the message is reported as failed and redelivered.
+    """
+    user_id = message['user_id']
+    restaurant_id = message['restaurant_id']
+    res_date = message['res_date']
+    time = message['time']
+    party_size = int(message['party_size'])
+
+    # Atomic check and reservation creation
+    success, result = process_reservation(user_id, restaurant_id, res_date, time, party_size)
+    print(f"Processed reservation for user {user_id}: {result}")
+
+    user_email = get_user_email(user_id)
+    if not user_email:
+        print(f"No email found for user {user_id}. Skipping notification.")
+        return
+
+    # Send email notification to the user
+    reservation_id = f"{restaurant_id}#{res_date}#{time}#{user_id}"
+    send_email_notification(user_email, reservation_id, restaurant_id, res_date, time, party_size, success, result)
 
 def process_reservation(user_id, restaurant_id, res_date, time, party_size):
     """Process a single reservation: check availability and create reservation atomically."""
@@ -67,6 +61,11 @@ def process_reservation(user_id, restaurant_id, res_date, time, party_size):
         capacity = int(restaurant['capacity']['N'])
         reservations = fetch_reservations(restaurant_id, res_date)
 
+        # A redelivered message finds the reservation it already made
+        reservation_id = f"{restaurant_id}#{res_date}#{time}#{user_id}"
+        if any(r['reservation_id']['S'] == reservation_id for r in reservations):
+            return True, "Reservation successful."
+
         # Check availability
         if not is_time_available(reservations, res_date, time, party_size, capacity):
             message = f"Insufficient capacity for reservation at {time}."
@@ -77,10 +76,11 @@ def process_reservation(user_id, restaurant_id, res_date, time, party_size):
         create_reservation(user_id, restaurant_id, res_date, time, party_size)
         return True, "Reservation successful."
 
-    except Exception as e:
-        error_message = f"Error processing reservation: {str(e)}"
-        print(error_message)
-        return False, error_message
+    except ClientError as e:
+        # The reservation id is derived from the request: a redelivered message finds its own reservation
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            return True, "Reservation successful."
+        raise
 
 def fetch_restaurant(restaurant_id):
     """Fetch restaurant details from DynamoDB."""
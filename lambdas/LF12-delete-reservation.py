@@ -1,5 +1,6 @@
 import boto3
 import json
+from idempotency import idempotent
 
 # Initialize DynamoDB client
 dynamodb = boto3.client('dynamodb')
@@ -7,6 +8,7 @@ dynamodb = boto3.client('dynamodb')
 # Table name
 RESERVATION_TABLE = 'Reservation'
 
+@idempotent('LF12')
 def lambda_handler(event, context):
     try:
         print('EVENT ', event)
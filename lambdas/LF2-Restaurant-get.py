@@ -1,18 +1,31 @@
 import boto3
 import json
-import requests
 from requests_aws4auth import AWS4Auth
+from botocore.exceptions import ClientError
+from opensearch_client import OpenSearchClient
+from ttl_cache import TTLCache
 
 
 region = 'us-east-1'
 
-opensearch_url = 'https://search-feastfleet-ylmv33u5rsoztak4q2xazv4x7u.us-east-1.es.amazonaws.com/restaurants_index'  
+RESTAURANTS_INDEX = 'restaurants_index'
+
+# Reverse-geocoded addresses for restaurants indexed without one, keyed by geohash
+GEOCODE_CACHE_TABLE = 'Geocode_Cache'
+GEOHASH_PRECISION = 8  # ~38m x 19m cells
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+# Upper bound on ids per multi-get request
+MAX_RESTAURANT_IDS = 500
 
 
 service = "es"
 session = boto3.Session()
 credentials = session.get_credentials()
 location_client = boto3.client('location', region_name=region)
+dynamodb = boto3.resource('dynamodb', region_name=region)
+geocode_cache_table = dynamodb.Table(GEOCODE_CACHE_TABLE)
+address_cache = TTLCache(maxsize=2048, ttl=86400)
 awsauth = AWS4Auth(
     credentials.access_key,
     credentials.secret_key,
@@ -20,15 +33,19 @@ awsauth = AWS4Auth(
     service,
     session_token=credentials.token
 )
+search_client = OpenSearchClient(sigv4_auth=awsauth)
+
+def coordinates_to_position(coordinates):
+    # Location Service positions are [longitude, latitude]
+    if isinstance(coordinates, dict) and 'lon' in coordinates and 'lat' in coordinates:
+        return [float(coordinates['lon']), float(coordinates['lat'])]
+    elif isinstance(coordinates, (list, tuple)) and len(coordinates) == 2:
+        return [float(coordinates[0]), float(coordinates[1])]
+    raise ValueError("Invalid coordinates format. Must be a dict with 'lon' and 'lat' keys, or a list/tuple.")
+
 def convert_coordinates_to_address(coordinates):
     try:
-        # Coordinates should be in [longitude, latitude] format
-        if isinstance(coordinates, dict) and 'lon' in coordinates and 'lat' in coordinates:
-            position = [coordinates['lon'], coordinates['lat']]
-        elif isinstance(coordinates, (list, tuple)) and len(coordinates) == 2:
-            position = coordinates
-        else:
-            raise ValueError("Invalid coordinates format. Must be a dict with 'lon' and 'lat' keys, or a list/tuple.")
+        position = coordinates_to_position(coordinates)
 
         response = location_client.search_place_index_for_position(
             IndexName='RestaurantPlaceIndex',  # Replace with your Place Index name
@@ -42,26 +59,94 @@ def convert_coordinates_to_address(coordinates):
         print(f"Error converting coordinates to address: {e}")
         return None
 
+def encode_geohash(lat, lon, precision=GEOHASH_PRECISION):
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    geohash, bits, bit_count, even = [], 0, 0, True
+    while len(geohash) < precision:
+        value, value_range = (lon, lon_range) if even else (lat, lat_range)
+        middle = (value_range[0] + value_range[1]) / 2
+        bits <<= 1
+        if value >= middle:
+            bits |= 1
+            value_range[0] = middle
+        else:
+            value_range[1] = middle
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            geohash.append(GEOHASH_ALPHABET[bits])
+            bits, bit_count = 0, 0
+    return ''.join(geohash)
+
+def get_cached_address(coordinates):
+    """
+    Reverse geocode through the in-process cache and the shared Geocode_Cache
+    table, so each ~40m cell costs at most one Location Service call.
+    """
+    try:
+        lon, lat = coordinates_to_position(coordinates)
+    except ValueError as e:
+        print(f"Error converting coordinates to address: {e}")
+        return None
+    geohash = encode_geohash(lat, lon)
+
+    def load_address():
+        try:
+            item = geocode_cache_table.get_item(Key={'geohash': geohash}).get('Item')
+            if item:
+                return item['address']
+        except ClientError as e:
+            print(f"Error reading geocode cache for {geohash}: {e}")
+
+        address = convert_coordinates_to_address(coordinates)
+        if address:
+            try:
+                geocode_cache_table.put_item(Item={'geohash': geohash, 'address': address})
+            except ClientError as e:
+                print(f"Error writing geocode cache for {geohash}: {e}")
+        return address
+
+    # Like the Geocode_Cache write, a failed lookup is not kept: the next request retries it
+    return address_cache.get_or_load(geohash, load_address, miss_ttl=0)
+
 def get_restaurant_by_id(restaurant_id):
     
     try:
-        url = f"{opensearch_url}/_doc/{restaurant_id}" 
-        response = requests.get(url, auth=('admin','Cloudcomputing2024!!'), headers={"Content-Type": "application/json"})
-        response_json = response.json()
-        print(response_json)
-        if "_source" in response_json:
-            return response_json["_source"] 
-        else:
-            return None
+        return search_client.get_document(RESTAURANTS_INDEX, restaurant_id)
 
     except Exception as e:
         print(f"Error retrieving restaurant by ID: {e}")
         return None
 
+def get_restaurants_by_ids(restaurant_ids):
+    """
+    Resolve many restaurants with one _mget per MGET_CHUNK_SIZE ids.
+    Returns details in input order, with None for ids that were not found.
+    """
+    restaurants = search_client.multi_get(RESTAURANTS_INDEX, restaurant_ids)
+    for restaurant in restaurants:
+        if restaurant and not restaurant.get('address') and restaurant.get('coordinates'):
+            restaurant['address'] = get_cached_address(restaurant['coordinates'])
+    return restaurants
+
 def lambda_handler(event, context):
     try:
         body = json.loads(event['body'])
         print(body)
+
+        # Multi-get mode: {"restaurantIds": [...]} resolves every id in one call
+        restaurant_ids = body.get('restaurantIds')
+        if restaurant_ids is not None:
+            if not isinstance(restaurant_ids, list) or len(restaurant_ids) > MAX_RESTAURANT_IDS:
+                return {
+                    'statusCode': 400,
+                    'body': json.dumps({'message': f'restaurantIds must be a list of at most {MAX_RESTAURANT_IDS} ids.'})
+                }
+            return {
+                'statusCode': 200,
+                'body': json.dumps({'restaurants': get_restaurants_by_ids(restaurant_ids)})
+            }
+
         restaurant_id = body.get('restaurantId')
         print(restaurant_id)
         if not restaurant_id:
@@ -71,12 +156,11 @@ def lambda_handler(event, context):
             }
 
         restaurant_details = get_restaurant_by_id(restaurant_id)
-        print(restaurant_details['coordinates'])
-        coordinates = restaurant_details.get('coordinates')  # Assuming format [longitude, latitude]
-        if coordinates:
-            address = convert_coordinates_to_address(coordinates)
-            restaurant_details['address'] = address
         if restaurant_details:
+            # The address is written at ingest; only documents indexed before that need geocoding
+            coordinates = restaurant_details.get('coordinates')
+            if not restaurant_details.get('address') and coordinates:
+                restaurant_details['address'] = get_cached_address(coordinates)
             return {
                 'statusCode': 200,
                 'body': json.dumps({'restaurantDetails': restaurant_details})
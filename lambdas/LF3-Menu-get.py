@@ -1,48 +1,5 @@
 import json
-import boto3
-from boto3.dynamodb.conditions import Attr
-from botocore.exceptions import ClientError
-from decimal import Decimal
-
-# 初始化 DynamoDB 资源
-dynamodb = boto3.resource('dynamodb')
-
-# DynamoDB 表名
-TABLE_NAME = 'Menu_Items'
-
-def decimal_to_float(obj):
-    """
-    递归地将 DynamoDB 中的 Decimal 类型转换为 float。
-    """
-    if isinstance(obj, list):
-        return [decimal_to_float(i) for i in obj]
-    elif isinstance(obj, dict):
-        return {k: decimal_to_float(v) for k, v in obj.items()}
-    elif isinstance(obj, Decimal):
-        return float(obj)
-    else:
-        return obj
-
-def get_menu_by_restaurant_id(restaurant_id):
-    """
-    使用 DynamoDB Scan 根据 restaurant_id 检索菜单数据。
-    """
-    table = dynamodb.Table(TABLE_NAME)
-    try:
-        # 使用 Scan 查询，基于属性过滤
-        response = table.scan(
-            FilterExpression=Attr('restaurant_id').eq(restaurant_id)
-        )
-
-        # 返回结果
-        if 'Items' in response and len(response['Items']) > 0:
-            return decimal_to_float(response['Items'])
-        else:
-            return None
-
-    except ClientError as e:
-        print(f"Error retrieving menu from DynamoDB: {e}")
-        return None
+from menu_snapshot import get_menu_snapshot
 
 def lambda_handler(event, context):
     """
@@ -59,13 +16,14 @@ def lambda_handler(event, context):
                 'body': json.dumps({'message': 'Restaurant ID is required in the path.'})
             }
 
-        # 查询 DynamoDB
-        menu_data = get_menu_by_restaurant_id(restaurant_id)
+        # 读取预编译的菜单快照（热容器内存命中时无需访问 DynamoDB）
+        snapshot = get_menu_snapshot(restaurant_id)
 
-        if menu_data:
+        if snapshot['item_count'] > 0:
+            # 直接返回已序列化的 JSON，不再逐项转换 Decimal
             return {
                 'statusCode': 200,
-                'body': json.dumps({'menu': menu_data})
+                'body': snapshot['menu_json']
             }
         else:
             return {
@@ -1,33 +1,35 @@
-from decimal import Decimal
 import json
-import boto3
+from dynamo_json import dumps
 from botocore.exceptions import ClientError
+from cart_store import CartConflict, add_item, remove_item, replace_cart, set_quantity
+from idempotency import idempotent
 
-# 初始化 DynamoDB 资源
-dynamodb = boto3.resource('dynamodb')
+# 每种操作需要的字段（除 userid 外）
+OPERATION_FIELDS = {
+    'add': ['restaurant_id', 'item_id', 'item_name', 'item_price'],
+    'set_quantity': ['restaurant_id', 'item_id', 'item_quantity'],
+    'remove': ['item_id'],
+    'replace': ['restaurant_id', 'item_list'],
+}
 
-# DynamoDB 表名
-CART_TABLE_NAME = 'Cart'
-
-def calculate_total_price(item_list):
+def apply_operation(operation, body):
     """
-    计算购物车总价格。
+    执行单行购物车操作：只读写被修改的那一行、总价和版本号。
+    replace 保留旧接口语义（整车覆盖，菜单页提交所选菜品时使用）。
     """
-    total_price = sum(Decimal(str(item['item_quantity'])) * Decimal(str(item['item_price'])) for item in item_list)
-    return total_price  # 返回 Decimal 类型
-
-def insert_cart(data):
-    """
-    插入购物车数据到 DynamoDB。
-    """
-    table = dynamodb.Table(CART_TABLE_NAME)
-    try:
-        table.put_item(Item=data)
-        return True
-    except ClientError as e:
-        print(f"Error inserting cart into DynamoDB: {e}")
-        return False
+    user_id = body['userid']
+    expected_version = body.get('expected_version')
+    if operation == 'add':
+        return add_item(user_id, body['restaurant_id'], body['item_id'], body['item_name'],
+                        body['item_price'], body.get('item_quantity', 1), expected_version)
+    if operation == 'set_quantity':
+        return set_quantity(user_id, body['restaurant_id'], body['item_id'], body['item_quantity'],
+                            body.get('item_name'), body.get('item_price'), expected_version)
+    if operation == 'remove':
+        return remove_item(user_id, body['item_id'], expected_version)
+    return replace_cart(user_id, body['restaurant_id'], body['item_list'])
 
+@idempotent('LF4')
 def lambda_handler(event, context):
     """
     Lambda 函数入口点。
@@ -36,49 +38,45 @@ def lambda_handler(event, context):
         # 解析请求体
         body = event
 
+        # 未指定 operation 时沿用旧接口：提交完整 item_list
+        operation = body.get('operation', 'replace')
+        if operation not in OPERATION_FIELDS:
+            return {
+                'statusCode': 400,
+                'body': json.dumps({'message': f'Unknown operation: {operation}.'})
+            }
+
         # 验证必需字段
-        required_fields = ['userid', 'restaurant_id', 'item_list']
-        for field in required_fields:
+        for field in ['userid'] + OPERATION_FIELDS[operation]:
             if field not in body:
                 return {
                     'statusCode': 400,
                     'body': json.dumps({'message': f'Missing required field: {field}.'})
                 }
 
-        # 计算总价格
-        item_list = body['item_list']
-        total_price = calculate_total_price(item_list)
-        print(item_list)
-        # 构建数据
-        cart_data = {
-            'user_id': body['userid'],
-            'restaurant_id': body['restaurant_id'],
-            'item_list': [
-                {
-                    'item_id':item['item_id'],
-                    'item_name': item['item_name'],
-                    'item_quantity': Decimal(str(item['item_quantity'])),
-                    'item_price': Decimal(str(item['item_price']))
-                }
-                for item in item_list
-            ],
-            'total_price': total_price
+        cart = apply_operation(operation, body)
+        return {
+            'statusCode': 200,
+            'body': dumps({'message': 'Cart updated successfully.', 'cart': cart})
         }
 
-        # 插入数据到 DynamoDB
-        success = insert_cart(cart_data)
-
-        if success:
-            return {
-                'statusCode': 200,
-                'body': json.dumps({'message': 'Cart inserted successfully.', 'cart': cart_data}, default=str)
-            }
-        else:
-            return {
-                'statusCode': 500,
-                'body': json.dumps({'message': 'Failed to insert cart.'})
-            }
-
+    except CartConflict as e:
+        # 购物车已被其他请求修改，返回最新内容供客户端重试
+        return {
+            'statusCode': 409,
+            'body': dumps({'message': 'Cart was modified by another request.', 'cart': e.cart})
+        }
+    except ValueError as e:
+        return {
+            'statusCode': 400,
+            'body': json.dumps({'message': str(e)})
+        }
+    except ClientError as e:
+        print(f"Error updating cart in DynamoDB: {e}")
+        return {
+            'statusCode': 500,
+            'body': json.dumps({'message': 'Failed to update cart.'})
+        }
     except Exception as e:
         print(f"Error in Lambda handler: {e}")
         return {
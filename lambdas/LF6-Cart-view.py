@@ -1,25 +1,14 @@
-import boto3
 from botocore.exceptions import ClientError
 import json
-
-# 初始化 DynamoDB 资源
-dynamodb = boto3.resource('dynamodb')
-
-# DynamoDB 表名
-CART_TABLE_NAME = 'Cart'
+from cart_store import get_cart
+from dynamo_json import dumps
 
 def get_cart_by_user_id(user_id):
     """
-    根據 user_id 查詢用戶的 cart。
+    根據 user_id 查詢用戶的 cart（由 cart_store 統一轉換為 item_list 格式）。
     """
-    table = dynamodb.Table(CART_TABLE_NAME)
     try:
-        # 查詢 DynamoDB
-        response = table.get_item(Key={'user_id': user_id})
-        if 'Item' in response:
-            return response['Item']
-        else:
-            return None  # 未找到對應的 cart
+        return get_cart(user_id)
     except ClientError as e:
         print(f"Error fetching cart from DynamoDB: {e}")
         return None
@@ -43,7 +32,7 @@ def lambda_handler(event, context):
         if cart:
             return {
                 'statusCode': 200,
-                'body': json.dumps({'message': 'Cart retrieved successfully.', 'cart': cart}, default=str)
+                'body': dumps({'message': 'Cart retrieved successfully.', 'cart': cart})
             }
         else:
             return {
@@ -2,14 +2,39 @@ import json
 import boto3
 import uuid
 from datetime import datetime
-from decimal import Decimal
+from pricing import UnknownMenuItem, from_cents, reprice_cart, to_cents
+from idempotency import idempotent
+from outbox import outbox_record, put_with_outbox
 
 dynamodb = boto3.resource('dynamodb')
-order_table = dynamodb.Table('Order')
+ORDER_TABLE_NAME = 'Order'
+restaurant_table = dynamodb.Table('Restaurant')
 
-sqs = boto3.client('sqs')
+# Order events are published by LF7b from the Order_Outbox table
 queue_url = ''  
 
+def snapshot_items(priced):
+    """
+    The order's lines as placed: name, unit price and line total from the menu
+    snapshot the order was priced against. They are never updated, so order
+    views show what was paid without reading Menu_Items.
+    """
+    return [
+        {'item_id': item_id, 'item_name': name, 'price': from_cents(unit), 'quantity': quantity,
+         'line_total': from_cents(line_total)}
+        for item_id, name, unit, quantity, line_total in zip(
+            priced['item_ids'], priced['names'], priced['unit_cents'], priced['quantities'], priced['line_totals'])
+    ]
+
+def get_restaurant_summary(restaurant_id):
+    response = restaurant_table.get_item(
+        Key={'restaurant_id': restaurant_id},
+        ProjectionExpression='#name, address',
+        ExpressionAttributeNames={'#name': 'name'}
+    )
+    return response.get('Item', {})
+
+@idempotent('LF7')
 def lambda_handler(event, context):
     try:
         # Parse request body
@@ -30,8 +55,19 @@ def lambda_handler(event, context):
 
         # Extract other fields from the request body
         restaurant_id = body['restaurant_id']
-        items = body['items']
-        total_price = Decimal(str(body.get('total_price', 0)))
+
+        # Price the order from the menu snapshot; the client's total is only compared
+        try:
+            priced = reprice_cart(restaurant_id, body['items'])
+        except (UnknownMenuItem, ValueError, KeyError, TypeError) as e:
+            return {
+                'statusCode': 400,
+                'body': json.dumps({'message': f'Invalid order items: {e}'})
+            }
+        if 'total_price' in body and to_cents(body['total_price']) != priced['total']:
+            print(f"Client total {body['total_price']} differs from server total {priced['total']} cents")
+
+        restaurant = get_restaurant_summary(restaurant_id)
         timestamp = datetime.utcnow().isoformat()
         status = 'PLACED'  # Initial order status
 
@@ -40,15 +76,19 @@ def lambda_handler(event, context):
             'order_id': order_id,
             'user_id': user_id,
             'restaurant_id': restaurant_id,
-            'items': items,  # Should be a list of {item_id, quantity}
-            'total_price': total_price,
+            'restaurant_name': restaurant.get('name', 'Unknown'),
+            'restaurant_address': restaurant.get('address', 'Unknown'),
+            'items': snapshot_items(priced),  # List of {item_id, item_name, price, quantity, line_total}
+            'subtotal': from_cents(priced['subtotal']),
+            'tax': from_cents(priced['tax']),
+            'fees': from_cents(priced['fees']),
+            'total_price': from_cents(priced['total']),
             'timestamp': timestamp,
+            'placed_at': timestamp,  # Never updated; sorts the order history (LF9-2)
             'status': status
         }
 
-        order_table.put_item(Item=order_item)
-
-        # Push order status to SQS (Q1)
+        # Order status message for SQS (Q1)
         sqs_message = {
             'order_id': order_id,
             'user_id': user_id,
@@ -57,23 +97,23 @@ def lambda_handler(event, context):
             'timestamp': timestamp
         }
 
-        sqs.send_message(
-            QueueUrl=queue_url,
-            MessageBody=json.dumps(sqs_message),
-            MessageAttributes={
+        # The order and its outbox message are stored atomically; LF7b sends the message
+        put_with_outbox(ORDER_TABLE_NAME, order_item, [
+            outbox_record(queue_url, sqs_message, {
                 'EventType': {
                     'StringValue': 'OrderPlaced',
                     'DataType': 'String'
                 }
-            }
-        )
+            })
+        ])
 
         # Return success response
         return {
             'statusCode': 200,
             'body': json.dumps({
                 'message': 'Order placed successfully.',
-                'order_id': order_id
+                'order_id': order_id,
+                'total_price': float(from_cents(priced['total']))
             })
         }
 
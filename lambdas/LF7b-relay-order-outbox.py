@@ -0,0 +1,53 @@
+import boto3
+from boto3.dynamodb.types import TypeDeserializer
+from outbox import pending_records, publish, unsent
+
+sqs = boto3.client('sqs')
+deserializer = TypeDeserializer()
+
+
+def stream_records(event):
+    """Outbox rows inserted in this DynamoDB stream batch, with the sequence number of each."""
+    records = []
+    for record in event['Records']:
+        if record.get('eventName') != 'INSERT':
+            # Deletes of sent messages come through the same stream
+            continue
+        image = record['dynamodb']['NewImage']
+        records.append((
+            record['dynamodb']['SequenceNumber'],
+            {name: deserializer.deserialize(value) for name, value in image.items()}
+        ))
+    return records
+
+
+def lambda_handler(event, context):
+    """
+    Publish order outbox records to SQS.
+
+    Triggered by the Order_Outbox stream (with ReportBatchItemFailures), it sends
+    the new records in batches of 10 and reports the unsent ones so the stream
+    retries them. A retried batch restarts at the lowest failed record and so
+    replays records sent before; those no longer have an outbox row and are
+    skipped. Invoked on a schedule without Records, it sweeps records a
+    failed run left behind.
+    """
+    if 'Records' not in event:
+        records = pending_records()
+        failed = publish(sqs, records)
+        print(f"Outbox sweep: {len(records) - len(failed)} sent, {len(failed)} failed")
+        return {'sent': len(records) - len(failed), 'failed': len(failed)}
+
+    inserted = stream_records(event)
+    records = unsent([record for _, record in inserted])
+    if len(records) < len(inserted):
+        print(f"Skipping {len(inserted) - len(records)} outbox messages already sent")
+    failed = set(publish(sqs, records))
+    if failed:
+        print(f"{len(failed)} of {len(inserted)} outbox messages not sent; the stream will retry them")
+    return {
+        'batchItemFailures': [
+            {'itemIdentifier': sequence_number}
+            for sequence_number, record in inserted if record['message_id'] in failed
+        ]
+    }
@@ -2,6 +2,9 @@ import boto3
 import json
 from botocore.exceptions import ClientError
 from decimal import Decimal
+from dynamo_batch import batch_get_items
+from order_status import apply_transition
+from sqs_consumer import consume
 
 dynamodb = boto3.resource('dynamodb', region_name="us-east-1")
 ses = boto3.client('ses', region_name="us-east-1")
@@ -17,73 +20,139 @@ delivery_tracking_table = dynamodb.Table(DELIVERY_TRACKING_TABLE)
 user_table = dynamodb.Table(USER_TABLE)
 restaurant_table = dynamodb.Table(RESTAURANT_TABLE)
 
-def lambda_handler(event, context):
+# Attributes the processor reads from users and restaurants
+USER_FIELDS = ["user_id", "email", "coordinates"]
+RESTAURANT_FIELDS = ["restaurant_id", "coordinates"]
+
+class BatchEntities:
     """
-    Lambda function to process SQS messages, update DynamoDB tables, and send email notifications.
+    Users and restaurants referenced by one SQS batch, each fetched once up
+    front with one BatchGetItem per table. Lives for a single invocation, so
+    nothing goes stale across batches. Without a preload (None) lookups fall
+    back to get_item.
+    """
+
+    def __init__(self, users=None, restaurants=None):
+        self.users = users
+        self.restaurants = restaurants
+
+    def user(self, user_id):
+        if self.users is not None:
+            return self.users.get(user_id)
+        return user_table.get_item(Key={"user_id": user_id}).get("Item")
+
+    def restaurant(self, restaurant_id):
+        if self.restaurants is not None:
+            return self.restaurants.get(restaurant_id)
+        return restaurant_table.get_item(Key={"restaurant_id": restaurant_id}).get("Item")
+
+def fetch_by_id(table_name, key_name, ids, attributes):
+    ids = list(dict.fromkeys(ids))
+    items = batch_get_items(dynamodb, table_name, [{key_name: entity_id} for entity_id in ids], attributes=attributes)
+    return {entity_id: item for entity_id, item in zip(ids, items) if item is not None}
+
+def load_batch_entities(records):
     """
-    for record in event['Records']:
+    Collect the users of every message and the restaurants of OUT_FOR_DELIVERY
+    messages (the only ones that need restaurant coordinates), then fetch them.
+    """
+    user_ids = []
+    restaurant_ids = []
+    for record in records:
         try:
-            # Parse the message from SQS
-            message = json.loads(record['body'])
-            order_id = message['order_id']
-            user_id = message['user_id']
-            restaurant_id = message['restaurant_id']
-            new_status = message['status']
-            timestamp = message['timestamp']
+            message = json.loads(record["body"])
+        except ValueError:
+            continue  # Reported as failed by the consumer
+        if not isinstance(message, dict):
+            continue
+        if message.get("user_id"):
+            user_ids.append(message["user_id"])
+        if message.get("status") == "OUT_FOR_DELIVERY" and message.get("restaurant_id"):
+            restaurant_ids.append(message["restaurant_id"])
 
-            print(f"Processing order {order_id}: New status {new_status}")
+    try:
+        return BatchEntities(
+            users=fetch_by_id(USER_TABLE, "user_id", user_ids, USER_FIELDS),
+            restaurants=fetch_by_id(RESTAURANT_TABLE, "restaurant_id", restaurant_ids, RESTAURANT_FIELDS)
+        )
+    except Exception as e:
+        print(f"Batch preload of users and restaurants failed, looking them up per message: {e}")
+        return BatchEntities()
 
-            # Update Order Table with the new status
-            update_order_status(order_id, new_status, timestamp)
+def lambda_handler(event, context):
+    """
+    Lambda function to process SQS messages, update DynamoDB tables, and send email notifications.
+    Messages of one order are handled in order; failed messages are reported in
+    batchItemFailures so only they are redelivered.
+    """
+    entities = load_batch_entities(event.get("Records", []))
+    return consume(
+        event,
+        lambda message, record: process_message(message, record, entities),
+        key=lambda message: message['order_id']
+    )
 
-            # Update Delivery Tracking Table if applicable
-            if new_status in ["OUT_FOR_DELIVERY", "DELIVERED"]:
-                update_delivery_status(order_id, user_id, restaurant_id, new_status, timestamp)
+def process_message(message, record, entities):
+    """
+    Apply one order status message. Raises on failure, which fails this message only.
+    """
+    order_id = message['order_id']
+    user_id = message['user_id']
+    restaurant_id = message['restaurant_id']
+    new_status = message['status']
+    timestamp = message['timestamp']
+
+    print(f"Processing order {order_id}: New status {new_status}")
 
-            # Retrieve user email from User Table
-            user_email = get_user_email(user_id)
-            if not user_email:
-                print(f"No email found for user {user_id}. Skipping notification.")
-                continue
+    # Update Order Table with the new status; a rejected transition (duplicate or
+    # out-of-order delivery) is acknowledged without touching anything else
+    if not update_order_status(order_id, new_status, timestamp):
+        print(f"Order {order_id}: transition to {new_status} rejected, ignoring message")
+        return
 
-            # Send email notification to the user
-            send_email_notification(order_id, new_status, user_email)
+    # Update Delivery Tracking Table if applicable
+    if new_status in ["OUT_FOR_DELIVERY", "DELIVERED"]:
+        update_delivery_status(order_id, user_id, restaurant_id, new_status, timestamp, entities)
 
-        except Exception as e:
-            print(f"Error processing message: {str(e)}")
-            raise e
+    # Retrieve user email from User Table
+    user_email = get_user_email(user_id, entities)
+    if not user_email:
+        print(f"No email found for user {user_id}. Skipping notification.")
+        return
 
-    return {"message": "Successfully processed messages from SQS"}
+    # Send email notification to the user
+    send_email_notification(order_id, new_status, user_email)
 
 # Function to update the Order Table
 def update_order_status(order_id, new_status, timestamp):
+    """
+    Apply the status transition with one conditional write. Returns False if
+    the order state machine rejects it.
+    """
     try:
-        order_table.update_item(
-            Key={"order_id": order_id},
-            UpdateExpression="SET #s = :new_status, #ts = :timestamp",
-            ExpressionAttributeNames={"#s": "status", "#ts": "timestamp"},
-            ExpressionAttributeValues={":new_status": new_status, ":timestamp": timestamp}
-        )
-        print(f"Order {order_id} status updated to {new_status}")
+        applied = apply_transition(order_table, order_id, new_status, timestamp)
+        if applied:
+            print(f"Order {order_id} status updated to {new_status}")
+        return applied
     except ClientError as e:
         print(f"Error updating order status for {order_id}: {e.response['Error']['Message']}")
         raise
 
 # Function to update the Delivery Tracking Table
-def update_delivery_status(order_id, user_id, restaurant_id, new_status, timestamp):
+def update_delivery_status(order_id, user_id, restaurant_id, new_status, timestamp, entities):
     """
     Updates the delivery tracking table or creates a new entry if it doesn't exist.
     """
     try:
         if new_status == "OUT_FOR_DELIVERY":
             # Fetch restaurant coordinates
-            restaurant_coordinates = get_restaurant_coordinates(restaurant_id)
+            restaurant_coordinates = get_restaurant_coordinates(restaurant_id, entities)
             if not restaurant_coordinates:
                 print(f"Failed to fetch coordinates for restaurant {restaurant_id}")
                 return
 
             # Fetch user coordinates
-            user_coordinates = get_user_coordinates(user_id)
+            user_coordinates = get_user_coordinates(user_id, entities)
             if not user_coordinates:
                 print(f"Failed to fetch coordinates for user {user_id}")
                 return
@@ -125,34 +194,34 @@ def update_delivery_status(order_id, user_id, restaurant_id, new_status, timesta
         print(f"Error updating delivery tracking for {order_id}: {str(e)}")
         raise
 
-# Function to retrieve restaurant coordinates from the Restaurant Table
-def get_restaurant_coordinates(restaurant_id):
+# Function to retrieve restaurant coordinates from the batch's restaurants
+def get_restaurant_coordinates(restaurant_id, entities):
     try:
-        response = restaurant_table.get_item(Key={"restaurant_id": restaurant_id})
-        if "Item" in response:
-            return response["Item"].get("coordinates")
+        restaurant = entities.restaurant(restaurant_id)
+        if restaurant:
+            return restaurant.get("coordinates")
         return None
     except ClientError as e:
         print(f"Error retrieving coordinates for restaurant {restaurant_id}: {e.response['Error']['Message']}")
         raise
 
-# Function to retrieve user coordinates from the User Table
-def get_user_coordinates(user_id):
+# Function to retrieve user coordinates from the batch's users
+def get_user_coordinates(user_id, entities):
     try:
-        response = user_table.get_item(Key={"user_id": user_id})
-        if "Item" in response:
-            return response["Item"].get("coordinates")
+        user = entities.user(user_id)
+        if user:
+            return user.get("coordinates")
         return None
     except ClientError as e:
         print(f"Error retrieving coordinates for user {user_id}: {e.response['Error']['Message']}")
         raise
 
-# Function to retrieve user email from User Table
-def get_user_email(user_id):
+# Function to retrieve user email from the batch's users
+def get_user_email(user_id, entities):
     try:
-        response = user_table.get_item(Key={"user_id": user_id})
-        if "Item" in response:
-            return response["Item"].get("email")
+        user = entities.user(user_id)
+        if user:
+            return user.get("email")
         return None
     except ClientError as e:
         print(f"Error retrieving email for user {user_id}: {e.response['Error']['Message']}")
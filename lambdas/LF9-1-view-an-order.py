@@ -1,6 +1,9 @@
 import json
+import os
 import boto3
-from decimal import Decimal
+from concurrent.futures import ThreadPoolExecutor
+from dynamo_batch import batch_get_items
+from dynamo_json import dumps
 
 # Initialize DynamoDB resource
 dynamodb = boto3.resource('dynamodb')
@@ -9,18 +12,55 @@ dynamodb = boto3.resource('dynamodb')
 order_table = dynamodb.Table('Order')
 restaurant_table = dynamodb.Table('Restaurant')
 delivery_table = dynamodb.Table('Delivery_Tracking')
-menu_items_table = dynamodb.Table('Menu_Items')  
+MENU_ITEMS_TABLE_NAME = 'Menu_Items'
+MENU_ITEM_FIELDS = ['item_id', 'item_name', 'price']
+
+# Independent reads run concurrently; the pool is reused while the container is warm
+FETCH_WORKERS = int(os.getenv('FETCH_WORKERS', '4'))
+executor = ThreadPoolExecutor(max_workers=FETCH_WORKERS)
+
+
+def get_item(table, key):
+    return table.get_item(Key=key).get('Item')
+
+
+def get_menu_items(item_ids):
+    """{item_id: menu item} for an order's lines, with one BatchGetItem per 100 items."""
+    if not item_ids:
+        return {}
+    keys = [{'item_id': item_id} for item_id in item_ids]
+    menu_items = batch_get_items(dynamodb, MENU_ITEMS_TABLE_NAME, keys, attributes=MENU_ITEM_FIELDS)
+    return {item['item_id']: item for item in menu_items if item is not None}
+
+
+def join_order_details(order):
+    """
+    Restaurant details and item names/prices for orders placed before LF7
+    stored them, looked up in parallel: one more round trip.
+    """
+    restaurant_future = executor.submit(get_item, restaurant_table, {'restaurant_id': order['restaurant_id']})
+    menu_items_future = executor.submit(get_menu_items, [item['item_id'] for item in order['items']])
+
+    restaurant = restaurant_future.result() or {}
+    restaurant_info = {
+        'name': restaurant.get('name', 'Unknown'),
+        'address': restaurant.get('address', 'Unknown')
+    }
+    menu_items = menu_items_future.result()
+
+    # Combine the order lines with their menu item details
+    items_with_details = []
+    for item in order['items']:
+        menu_item = menu_items.get(item['item_id'])
+        if menu_item is not None:
+            items_with_details.append({
+                'item_id': item['item_id'],
+                'item_name': menu_item.get('item_name', 'Unknown'),
+                'price': menu_item.get('price', 0),
+                'quantity': item['quantity'],
+            })
+    return restaurant_info, items_with_details
 
-# Helper function to convert Decimal to int or float
-def convert_decimal(obj):
-    if isinstance(obj, list):
-        return [convert_decimal(i) for i in obj]
-    elif isinstance(obj, dict):
-        return {k: convert_decimal(v) for k, v in obj.items()}
-    elif isinstance(obj, Decimal):
-        return int(obj) if obj % 1 == 0 else float(obj)
-    else:
-        return obj
 
 def lambda_handler(event, context):
     try:
@@ -41,9 +81,11 @@ def lambda_handler(event, context):
                 'body': json.dumps({'message': 'Order ID is required'})
             }
         
-        # Fetch the order details from the Order table
-        order_response = order_table.get_item(Key={'order_id': order_id})
-        if 'Item' not in order_response:
+        # The order and its delivery tracking share the key: fetch both at once
+        order_future = executor.submit(get_item, order_table, {'order_id': order_id})
+        delivery_future = executor.submit(get_item, delivery_table, {'order_id': order_id})
+        order = order_future.result()
+        if order is None:
             return {
                 'statusCode': 404,
                 'headers': {
@@ -54,44 +96,21 @@ def lambda_handler(event, context):
                 'body': json.dumps({'message': 'Order not found'})
             }
         
-        # Convert Decimal fields to native Python types
-        order = convert_decimal(order_response['Item'])
-        
-        # Fetch the restaurant details from the Restaurant table
-        restaurant_response = restaurant_table.get_item(Key={'restaurant_id': order['restaurant_id']})
-        restaurant = convert_decimal(restaurant_response.get('Item', {}))
-        restaurant_name = restaurant.get('name', 'Unknown')
-        restaurant_address = restaurant.get('address', 'Unknown')
-        
-        # Fetch the delivery tracking details from the Delivery_Tracking table
-        delivery_response = delivery_table.get_item(Key={'order_id': order_id})
-        delivery = convert_decimal(delivery_response.get('Item', {})) if 'Item' in delivery_response else None
-        
-        # Fetch item details from the Menu_Items table
-        items_with_details = []
-        for item in order['items']:
-            item_id = item['item_id']
-            item_quantity = item['quantity']
-            menu_item_response = menu_items_table.get_item(Key={'item_id': item_id})
-            if 'Item' in menu_item_response:
-                menu_item = convert_decimal(menu_item_response['Item'])
-                items_with_details.append({
-                    'item_id': item_id,
-                    'item_name': menu_item.get('item_name', 'Unknown'),
-                    'price': menu_item.get('price', 0),
-                    'quantity': item_quantity,
-                })
-        
-        # Update order information with detailed items
-        order['items'] = items_with_details
+        if 'restaurant_name' in order:
+            # Orders carry a snapshot of their restaurant and lines (LF7): nothing to join
+            restaurant_info = {
+                'name': order['restaurant_name'],
+                'address': order.get('restaurant_address', 'Unknown')
+            }
+        else:
+            restaurant_info, order['items'] = join_order_details(order)
+        delivery = delivery_future.result()
         
         # Construct the response payload with limited restaurant details
+        # (Decimal fields are left as-is and converted while serializing the response)
         result = {
             'order_info': order,
-            'restaurant_info': {
-                'name': restaurant_name,
-                'address': restaurant_address
-            },
+            'restaurant_info': restaurant_info,
             'delivery_info': delivery
         }
         
@@ -102,7 +121,7 @@ def lambda_handler(event, context):
                 'Access-Control-Allow-Methods': 'GET, OPTIONS',
                 'Access-Control-Allow-Headers': 'Content-Type'
             },
-            'body': json.dumps(result)
+            'body': dumps(result)
         }
     
     except Exception as e:
@@ -0,0 +1,107 @@
+import heapq
+import math
+import re
+import unicodedata
+from collections import Counter, defaultdict
+
+from search_snapshot import read_snapshot
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    """Lowercase, strip accents and split on anything that is not a letter or digit."""
+    if not text:
+        return []
+    text = unicodedata.normalize("NFKD", str(text)).encode("ascii", "ignore").decode("ascii")
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """
+    Small in-process inverted index with BM25 scoring over a fixed set of text
+    fields. Built once per container from a restaurant snapshot and used by
+    LF1 when the OpenSearch domain cannot answer.
+    """
+
+    def __init__(self, fields=("name", "cuisine"), k1=1.2, b=0.75):
+        self.fields = tuple(fields)
+        self.k1 = k1
+        self.b = b
+        self.doc_ids = []
+        self.documents = []
+        # field -> term -> [(doc_index, term_frequency)]
+        self.postings = {field: defaultdict(list) for field in self.fields}
+        self.doc_lengths = {field: [] for field in self.fields}
+        self.total_lengths = {field: 0 for field in self.fields}
+
+    def add(self, doc_id, document):
+        doc_index = len(self.doc_ids)
+        self.doc_ids.append(doc_id)
+        self.documents.append(document)
+        for field in self.fields:
+            terms = tokenize(document.get(field))
+            for term, frequency in Counter(terms).items():
+                self.postings[field][term].append((doc_index, frequency))
+            self.doc_lengths[field].append(len(terms))
+            self.total_lengths[field] += len(terms)
+
+    def __len__(self):
+        return len(self.doc_ids)
+
+    def search(self, query, fields=None, size=10, search_after=None, adjust=None):
+        """
+        Return up to `size` (doc_id, score, document) tuples, best match first
+        with ties broken by doc_id. `fields` maps field name to boost and
+        defaults to every indexed field. `search_after` is the (score, doc_id)
+        of the last result of the previous page. `adjust(document)` may return
+        a score multiplier, or None to drop the document.
+        """
+        if not self.doc_ids:
+            return []
+        if fields is None:
+            fields = {field: 1.0 for field in self.fields}
+        elif isinstance(fields, str):
+            fields = {fields: 1.0}
+
+        doc_count = len(self.doc_ids)
+        scores = defaultdict(float)
+        for field, boost in fields.items():
+            postings = self.postings[field]
+            doc_lengths = self.doc_lengths[field]
+            average_length = (self.total_lengths[field] / doc_count) or 1.0
+            for term in set(tokenize(query)):
+                matches = postings.get(term)
+                if not matches:
+                    continue
+                idf = math.log(1 + (doc_count - len(matches) + 0.5) / (len(matches) + 0.5))
+                for doc_index, frequency in matches:
+                    norm = self.k1 * (1 - self.b + self.b * doc_lengths[doc_index] / average_length)
+                    scores[doc_index] += boost * idf * frequency * (self.k1 + 1) / (frequency + norm)
+
+        if adjust is not None:
+            adjusted = {}
+            for doc_index, score in scores.items():
+                multiplier = adjust(self.documents[doc_index])
+                if multiplier is not None:
+                    adjusted[doc_index] = score * multiplier
+            scores = adjusted
+
+        ranked = ((-score, self.doc_ids[doc_index], doc_index) for doc_index, score in scores.items())
+        if search_after is not None:
+            after_score, after_id = search_after
+            ranked = (entry for entry in ranked if entry[:2] > (-after_score, after_id))
+        best = heapq.nsmallest(size, ranked)
+        return [(doc_id, -score, self.documents[doc_index]) for score, doc_id, doc_index in best]
+
+    @classmethod
+    def from_documents(cls, documents, **kwargs):
+        index = cls(**kwargs)
+        for document in documents:
+            index.add(document["restaurant_id"], document)
+        return index
+
+    @classmethod
+    def from_snapshot(cls, path, **kwargs):
+        """Build an index from a snapshot written by database/export_search_snapshot.py."""
+        return cls.from_documents(read_snapshot(path), **kwargs)
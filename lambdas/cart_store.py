@@ -0,0 +1,268 @@
+import boto3
+from botocore.exceptions import ClientError
+
+from pricing import from_cents, to_cents
+
+CART_TABLE_NAME = 'Cart'
+
+# Retries when another request changes the cart between our read and write
+MAX_UPDATE_ATTEMPTS = 5
+
+# Attributes of carts written before the canonical `lines` format: the web
+# cart's item_list, the chatbot's cart list and the first per-line items map.
+# They are read so old carts can be migrated, and dropped on the next write.
+LEGACY_ATTRIBUTES = ('item_list', 'cart', 'items')
+
+dynamodb = boto3.resource('dynamodb')
+cart_table = dynamodb.Table(CART_TABLE_NAME)
+
+
+class CartConflict(Exception):
+    """The cart no longer has the version the caller expected."""
+
+    def __init__(self, cart):
+        super().__init__("Cart was modified by another request")
+        self.cart = cart
+
+
+def make_line(item_name, item_price, item_quantity):
+    """Canonical cart line, stored under its item_id: [item_name, item_price, item_quantity]."""
+    return [item_name, from_cents(to_cents(item_price)), int(item_quantity)]
+
+
+def line_cents(line):
+    return to_cents(line[1]) * line[2] if line else 0
+
+
+def lines_total(lines):
+    return from_cents(sum(line_cents(line) for line in lines.values()))
+
+
+def legacy_lines(item):
+    """Convert any of the older stored cart formats to canonical lines."""
+    if 'items' in item:
+        return {item_id: make_line(line.get('item_name'), line['item_price'], line['item_quantity'])
+                for item_id, line in item['items'].items()}
+    lines = {}
+    for line in item.get('item_list') or []:
+        lines[line['item_id']] = make_line(line.get('item_name'), line['item_price'], line['item_quantity'])
+    for line in item.get('cart') or []:
+        lines[line['item_id']] = make_line(line.get('item_name'), line['price'], line['quantity'])
+    return lines
+
+
+def canonical_cart(item):
+    """
+    Read a stored cart in any format into {user_id, restaurant_id, lines,
+    total_price, version, legacy}. `legacy` carts are rewritten in the
+    canonical format by the next write.
+    """
+    # Canonical carts always carry a version; a line projection may omit `lines`
+    legacy = 'version' not in item or any(name in item for name in LEGACY_ATTRIBUTES)
+    lines = item.get('lines') or {}
+    if legacy:
+        lines = dict(legacy_lines(item), **lines)
+    lines = {item_id: make_line(*line) for item_id, line in lines.items()}
+    return {
+        'user_id': item['user_id'],
+        'restaurant_id': item.get('restaurant_id'),
+        'lines': lines,
+        'total_price': lines_total(lines) if legacy else item.get('total_price', from_cents(0)),
+        'version': item.get('version'),
+        'legacy': legacy
+    }
+
+
+def cart_response(cart):
+    """
+    Shape a canonical cart the way LF4/LF6 return it:
+    {user_id, restaurant_id, item_list, total_price, version}.
+    """
+    if cart is None:
+        return None
+    item_list = [
+        {'item_id': item_id, 'item_name': line[0], 'item_price': line[1], 'item_quantity': line[2]}
+        for item_id, line in cart['lines'].items()
+    ]
+    item_list.sort(key=lambda line: (line['item_name'] or '', line['item_id']))
+    return {
+        'user_id': cart['user_id'],
+        'restaurant_id': cart.get('restaurant_id'),
+        'item_list': item_list,
+        'total_price': cart['total_price'],
+        'version': cart.get('version') or 0
+    }
+
+
+def get_cart(user_id):
+    """The one read path for every channel: a cart in LF4/LF6 response shape, or None."""
+    response = cart_table.get_item(Key={'user_id': user_id})
+    item = response.get('Item')
+    return cart_response(canonical_cart(item)) if item else None
+
+
+def read_line(user_id, item_id=None):
+    """
+    Read just what an update needs: version, restaurant, total, the one line
+    being changed and any legacy attributes (absent once a cart is migrated).
+    """
+    names = {'#lines': 'lines', '#items': 'items', '#cart': 'cart'}
+    projection = 'user_id, version, restaurant_id, total_price, item_list, #cart, #items'
+    if item_id is not None:
+        names['#item_id'] = item_id
+        projection += ', #lines.#item_id'
+    else:
+        projection += ', #lines'
+    response = cart_table.get_item(
+        Key={'user_id': user_id},
+        ProjectionExpression=projection,
+        ExpressionAttributeNames=names
+    )
+    item = response.get('Item')
+    return canonical_cart(item) if item else None
+
+
+def is_version_conflict(error):
+    return error.response['Error']['Code'] == 'ConditionalCheckFailedException'
+
+
+def put_cart(user_id, restaurant_id, lines, previous_version):
+    """
+    Write a whole cart in the canonical format as the next version, if nobody
+    else wrote since `previous_version` (None for carts without a version).
+    """
+    cart = {
+        'user_id': user_id,
+        'restaurant_id': restaurant_id,
+        'lines': lines,
+        'total_price': lines_total(lines),
+        'version': (previous_version or 0) + 1
+    }
+    if previous_version is None:
+        condition = {'ConditionExpression': 'attribute_not_exists(version)'}
+    else:
+        condition = {
+            'ConditionExpression': 'version = :current',
+            'ExpressionAttributeValues': {':current': previous_version}
+        }
+    cart_table.put_item(Item=cart, **condition)
+    return dict(cart, legacy=False)
+
+
+def update_line(user_id, restaurant_id, item_id, change, expected_version=None):
+    """
+    Apply `change(old_line) -> new_line` to one line of the cart, where None
+    means "not in the cart". Each attempt is one read and one write: an
+    UpdateItem of that line, the total and the version for canonical carts,
+    or a full canonical rewrite for legacy carts and restaurant switches.
+    The version condition turns concurrent edits into retries.
+
+    With `expected_version`, raises CartConflict instead of retrying when the
+    cart has moved on. `restaurant_id=None` targets whatever restaurant the
+    cart currently holds.
+    """
+    for _ in range(MAX_UPDATE_ATTEMPTS):
+        stored = read_line(user_id, item_id) or canonical_cart({'user_id': user_id})
+        version = stored['version']
+        if expected_version is not None and (version or 0) != expected_version:
+            raise CartConflict(get_cart(user_id))
+
+        target_restaurant = restaurant_id or stored['restaurant_id']
+        # Chatbot carts never recorded a restaurant: they are adopted by the first write
+        keep_lines = stored['restaurant_id'] in (None, target_restaurant)
+        old_line = stored['lines'].get(item_id) if keep_lines else None
+        new_line = change(old_line)
+
+        try:
+            if stored['legacy'] or stored['restaurant_id'] != target_restaurant:
+                # Migrate in the same write: carry the other lines over unless the restaurant changed
+                lines = dict(stored['lines']) if keep_lines else {}
+                lines.pop(item_id, None)
+                if new_line is not None:
+                    lines[item_id] = new_line
+                return cart_response(put_cart(user_id, target_restaurant, lines, version))
+
+            values = {
+                ':current': version,
+                ':one': 1,
+                ':total': from_cents(to_cents(stored['total_price']) - line_cents(old_line) + line_cents(new_line))
+            }
+            if new_line is None:
+                update_expression = 'REMOVE #lines.#item_id SET total_price = :total, version = version + :one'
+            else:
+                update_expression = 'SET #lines.#item_id = :line, total_price = :total, version = version + :one'
+                values[':line'] = new_line
+            response = cart_table.update_item(
+                Key={'user_id': user_id},
+                UpdateExpression=update_expression,
+                ConditionExpression='version = :current',
+                ExpressionAttributeNames={'#lines': 'lines', '#item_id': item_id},
+                ExpressionAttributeValues=values,
+                ReturnValues='ALL_NEW'
+            )
+            return cart_response(canonical_cart(response['Attributes']))
+        except ClientError as e:
+            if not is_version_conflict(e):
+                raise
+            if expected_version is not None:
+                raise CartConflict(get_cart(user_id))
+    raise CartConflict(get_cart(user_id))
+
+
+def add_item(user_id, restaurant_id, item_id, item_name, item_price, quantity=1, expected_version=None):
+    """Add `quantity` of an item, on top of any quantity already in the cart."""
+    def change(line):
+        existing = line[2] if line else 0
+        return make_line(item_name, item_price, existing + int(quantity))
+    return update_line(user_id, restaurant_id, item_id, change, expected_version)
+
+
+def set_quantity(user_id, restaurant_id, item_id, quantity, item_name=None, item_price=None, expected_version=None):
+    """
+    Set an item's quantity; zero or less removes it. Name and price are only
+    needed when the item is not in the cart yet.
+    """
+    def change(line):
+        if int(quantity) <= 0:
+            return None
+        if line is None:
+            if item_name is None or item_price is None:
+                raise ValueError(f"item {item_id} is not in the cart; item_name and item_price are required")
+            return make_line(item_name, item_price, quantity)
+        return make_line(item_name or line[0], line[1] if item_price is None else item_price, quantity)
+    return update_line(user_id, restaurant_id, item_id, change, expected_version)
+
+
+def remove_item(user_id, item_id, expected_version=None):
+    return update_line(user_id, None, item_id, lambda line: None, expected_version)
+
+
+def replace_cart(user_id, restaurant_id, item_list):
+    """Overwrite the cart with `item_list` ([{item_id, item_name, item_price, item_quantity}])."""
+    lines = {
+        item['item_id']: make_line(item['item_name'], item['item_price'], item['item_quantity'])
+        for item in item_list if int(item['item_quantity']) > 0
+    }
+    for _ in range(MAX_UPDATE_ATTEMPTS):
+        stored = cart_table.get_item(Key={'user_id': user_id}, ProjectionExpression='version').get('Item') or {}
+        try:
+            return cart_response(put_cart(user_id, restaurant_id, lines, stored.get('version')))
+        except ClientError as e:
+            if not is_version_conflict(e):
+                raise
+    raise CartConflict(get_cart(user_id))
+
+
+def clear_cart(user_id):
+    return replace_cart(user_id, None, [])
+
+
+def chatbot_items(cart):
+    """The cart as the Lex handler keeps it in session: [{item_id, item_name, quantity, price}]."""
+    if not cart:
+        return []
+    return [
+        {'item_id': line['item_id'], 'item_name': line['item_name'],
+         'quantity': int(line['item_quantity']), 'price': float(line['item_price'])}
+        for line in cart['item_list']
+    ]
@@ -0,0 +1,59 @@
+import random
+import time
+
+# DynamoDB accepts at most 100 keys per BatchGetItem request
+BATCH_GET_LIMIT = 100
+MAX_ATTEMPTS = 6
+BASE_BACKOFF_SECONDS = 0.05
+
+
+def chunks(values, size):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def batch_get_items(dynamodb, table_name, keys, attributes=None, consistent_read=False):
+    """
+    Fetch `keys` from `table_name` with as few BatchGetItem calls as possible and
+    return the items in the same order as `keys` (None where an item is missing).
+
+    `dynamodb` is a boto3 DynamoDB service resource. Duplicate keys are fetched
+    once, requests are chunked at 100 keys, and UnprocessedKeys are retried with
+    jittered exponential backoff. `attributes` optionally limits the returned
+    attributes; the key attributes are always included so results can be matched
+    back to their keys.
+    """
+    if not keys:
+        return []
+    key_names = list(keys[0].keys())
+
+    def key_of(item):
+        return tuple(item[name] for name in key_names)
+
+    unique_keys = list(dict.fromkeys(key_of(key) for key in keys))
+    table_request = {'ConsistentRead': consistent_read}
+    if attributes:
+        names = list(dict.fromkeys(key_names + list(attributes)))
+        # Placeholders for every attribute, so reserved words like "name" just work
+        table_request['ProjectionExpression'] = ', '.join(f'#a{i}' for i in range(len(names)))
+        table_request['ExpressionAttributeNames'] = {f'#a{i}': name for i, name in enumerate(names)}
+
+    found = {}
+    for chunk in chunks(unique_keys, BATCH_GET_LIMIT):
+        request_items = {
+            table_name: dict(table_request, Keys=[dict(zip(key_names, key)) for key in chunk])
+        }
+        attempt = 0
+        while request_items:
+            response = dynamodb.batch_get_item(RequestItems=request_items)
+            for item in response.get('Responses', {}).get(table_name, []):
+                found[key_of(item)] = item
+
+            request_items = response.get('UnprocessedKeys') or None
+            if request_items:
+                attempt += 1
+                if attempt >= MAX_ATTEMPTS:
+                    raise RuntimeError(f"BatchGetItem on {table_name} left keys unprocessed after {attempt} attempts")
+                time.sleep(random.uniform(0, BASE_BACKOFF_SECONDS * 2 ** attempt))
+
+    return [found.get(key_of(key)) for key in keys]
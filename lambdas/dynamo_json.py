@@ -0,0 +1,106 @@
+import base64
+import json
+from decimal import Decimal
+from json.encoder import encode_basestring_ascii
+
+from boto3.dynamodb.types import Binary
+
+
+def encode_value(value):
+    """
+    json `default` hook for the types boto3 hands back from DynamoDB: Decimal
+    becomes int when integral and float otherwise, sets become lists and
+    binary values become base64 strings.
+    """
+    if isinstance(value, Decimal):
+        return float(value) if value % 1 else int(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, Binary):
+        value = value.value
+    if isinstance(value, (bytes, bytearray)):
+        return base64.b64encode(value).decode('ascii')
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+# One reusable C-accelerated encoder: values are written straight to the output
+# while walking the item, so nothing is copied beforehand
+encoder = json.JSONEncoder(default=encode_value, separators=(',', ':'), check_circular=False)
+
+
+def dumps(obj):
+    """Serialize a structure holding boto3 resource items (Decimal, sets, Binary) to JSON."""
+    return encoder.encode(obj)
+
+
+def dumps_typed(item):
+    """
+    Serialize a low-level DynamoDB item ({'name': {'S': 'x'}, 'price': {'N': '3.5'}}),
+    as returned by the client API or found in stream images, to the plain JSON
+    object it represents. Numbers are copied as-is from their wire text.
+    """
+    parts = []
+    write_typed_map(item, parts)
+    return ''.join(parts)
+
+
+def write_typed_map(item, parts):
+    parts.append('{')
+    first = True
+    for name, attribute in item.items():
+        if not first:
+            parts.append(',')
+        first = False
+        parts.append(encode_basestring_ascii(name))
+        parts.append(':')
+        write_typed_value(attribute, parts)
+    parts.append('}')
+
+
+def write_typed_list(values, parts, write):
+    parts.append('[')
+    for index, value in enumerate(values):
+        if index:
+            parts.append(',')
+        write(value, parts)
+    parts.append(']')
+
+
+def write_binary(value, parts):
+    if isinstance(value, (bytes, bytearray)):
+        value = base64.b64encode(value).decode('ascii')
+    parts.append(encode_basestring_ascii(value))
+
+
+def write_string(value, parts):
+    parts.append(encode_basestring_ascii(value))
+
+
+def write_number(value, parts):
+    parts.append(value)
+
+
+def write_typed_value(attribute, parts):
+    (kind, value), = attribute.items()
+    if kind == 'S':
+        parts.append(encode_basestring_ascii(value))
+    elif kind == 'N':
+        parts.append(value)
+    elif kind == 'M':
+        write_typed_map(value, parts)
+    elif kind == 'L':
+        write_typed_list(value, parts, write_typed_value)
+    elif kind == 'BOOL':
+        parts.append('true' if value else 'false')
+    elif kind == 'NULL':
+        parts.append('null')
+    elif kind == 'SS':
+        write_typed_list(value, parts, write_string)
+    elif kind == 'NS':
+        write_typed_list(value, parts, write_number)
+    elif kind == 'B':
+        write_binary(value, parts)
+    elif kind == 'BS':
+        write_typed_list(value, parts, write_binary)
+    else:
+        raise TypeError(f"Unknown DynamoDB attribute type: {kind}")
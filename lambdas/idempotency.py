@@ -0,0 +1,159 @@
+import functools
+import hashlib
+import json
+import os
+import time
+
+import boto3
+from botocore.exceptions import ClientError
+
+IDEMPOTENCY_TABLE_NAME = os.getenv('IDEMPOTENCY_TABLE', 'Idempotency_Keys')
+
+# Completed responses are replayed for this long (the table's TTL attribute is expires_at)
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv('IDEMPOTENCY_TTL_SECONDS', str(24 * 3600)))
+# A claimed key whose request never finished (e.g. the Lambda timed out) frees up after this
+IN_PROGRESS_SECONDS = int(os.getenv('IDEMPOTENCY_IN_PROGRESS_SECONDS', '60'))
+# Conditional writes tried before a key that keeps being claimed and released counts as in progress
+CLAIM_ATTEMPTS = 2
+
+IDEMPOTENCY_HEADER = 'idempotency-key'
+IDEMPOTENCY_FIELD = 'idempotency_key'
+
+dynamodb = boto3.resource('dynamodb')
+idempotency_table = dynamodb.Table(IDEMPOTENCY_TABLE_NAME)
+
+
+def request_body(event):
+    """The request body as a dict: API Gateway proxy events carry it as a string, LF4 is invoked with it."""
+    body = event.get('body', event) if isinstance(event, dict) else None
+    if isinstance(body, str):
+        try:
+            body = json.loads(body)
+        except ValueError:
+            return {}
+    return body if isinstance(body, dict) else {}
+
+
+def idempotency_key_of(event, body):
+    headers = {name.lower(): value for name, value in (event.get('headers') or {}).items()}
+    return headers.get(IDEMPOTENCY_HEADER) or body.get(IDEMPOTENCY_FIELD)
+
+
+def caller_of(event, body):
+    """Keys are scoped to the caller, so one user's key can never replay another user's response."""
+    try:
+        return event['requestContext']['authorizer']['claims']['sub']
+    except (KeyError, TypeError):
+        return body.get('userid') or body.get('user_id') or ''
+
+
+def fingerprint(body):
+    """Hash of the request without its key: a reused key with a different request is refused."""
+    payload = {name: value for name, value in body.items() if name != IDEMPOTENCY_FIELD}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def error_response(status_code, message):
+    return {'statusCode': status_code, 'body': json.dumps({'message': message})}
+
+
+def claim(record_key, request_hash, now):
+    """
+    Conditionally record the key as in progress. Returns None when this request
+    now owns the key, else the stored record it collided with.
+    """
+    for _ in range(CLAIM_ATTEMPTS):
+        try:
+            idempotency_table.put_item(
+                Item={
+                    'idempotency_key': record_key,
+                    'status': 'IN_PROGRESS',
+                    'request_hash': request_hash,
+                    'expires_at': now + IN_PROGRESS_SECONDS
+                },
+                # Expired records may not have been removed by TTL yet
+                ConditionExpression='attribute_not_exists(idempotency_key) OR expires_at < :now',
+                ExpressionAttributeValues={':now': now}
+            )
+            return None
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+        stored = idempotency_table.get_item(Key={'idempotency_key': record_key}, ConsistentRead=True).get('Item')
+        if stored is not None:
+            return stored
+        # Deleted between our write and read (a failed first attempt): claim again
+    # Still changing hands: answer as for a request in progress (409), the client retries later
+    return {'status': 'IN_PROGRESS', 'request_hash': request_hash}
+
+
+def complete(record_key, response):
+    idempotency_table.update_item(
+        Key={'idempotency_key': record_key},
+        UpdateExpression='SET #status = :completed, #response = :response, expires_at = :expires_at',
+        ExpressionAttributeNames={'#status': 'status', '#response': 'response'},
+        ExpressionAttributeValues={
+            ':completed': 'COMPLETED',
+            ':response': json.dumps(response),
+            ':expires_at': int(time.time()) + IDEMPOTENCY_TTL_SECONDS
+        }
+    )
+
+
+def release(record_key):
+    """Forget a key whose request failed, so a retry runs it again."""
+    try:
+        idempotency_table.delete_item(Key={'idempotency_key': record_key})
+    except ClientError as e:
+        print(f"Failed to release idempotency key {record_key}: {e}")
+
+
+def idempotent(scope):
+    """
+    Make a write handler safe to retry. When the request carries an
+    Idempotency-Key header (or an `idempotency_key` body field), the first
+    request claims the key with a conditional write and its response is
+    stored; retries within IDEMPOTENCY_TTL_SECONDS get that response back
+    without running the handler again. Requests without a key run as before.
+
+    `scope` names the endpoint, e.g. @idempotent('LF7').
+    """
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(event, context):
+            body = request_body(event)
+            key = idempotency_key_of(event, body)
+            if not key:
+                return handler(event, context)
+
+            record_key = f"{scope}#{caller_of(event, body)}#{key}"
+            request_hash = fingerprint(body)
+            try:
+                stored = claim(record_key, request_hash, int(time.time()))
+            except ClientError as e:
+                print(f"Idempotency store unavailable: {e}")
+                return error_response(503, 'Service temporarily unavailable, please retry.')
+
+            if stored is not None:
+                if stored.get('request_hash') != request_hash:
+                    return error_response(422, 'Idempotency key was already used for a different request.')
+                if stored.get('status') == 'COMPLETED':
+                    return json.loads(stored['response'])
+                return error_response(409, 'A request with this idempotency key is still in progress.')
+
+            try:
+                response = handler(event, context)
+            except Exception:
+                release(record_key)
+                raise
+            # Server errors are not stored: the client may retry them
+            if response.get('statusCode', 200) >= 500:
+                release(record_key)
+            else:
+                try:
+                    complete(record_key, response)
+                except ClientError as e:
+                    print(f"Failed to store response for idempotency key {record_key}: {e}")
+            return response
+        return wrapper
+    return decorator
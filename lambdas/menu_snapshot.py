@@ -0,0 +1,220 @@
+import json
+import os
+import time
+
+import boto3
+from boto3.dynamodb.conditions import Key
+from boto3.dynamodb.types import TypeDeserializer
+from botocore.exceptions import ClientError
+
+from dynamo_batch import batch_get_items
+from dynamo_json import dumps
+from ttl_cache import TTLCache
+
+MENU_TABLE_NAME = 'Menu_Items'
+MENU_INDEX_NAME = 'restaurant_id-index'
+
+# Precompiled menus, one item per restaurant:
+# {restaurant_id, version, item_count, built_at, menu_json}
+SNAPSHOT_TABLE_NAME = os.getenv('MENU_SNAPSHOT_TABLE', 'Menu_Snapshots')
+
+# Warm containers serve snapshots from memory; a changed menu reaches them
+# within MENU_SNAPSHOT_CACHE_TTL seconds
+SNAPSHOT_CACHE_SIZE = int(os.getenv('MENU_SNAPSHOT_CACHE_SIZE', '256'))
+SNAPSHOT_CACHE_TTL = int(os.getenv('MENU_SNAPSHOT_CACHE_TTL', '60'))
+
+# Optimistic-write retries when two writers update the same snapshot
+MAX_WRITE_ATTEMPTS = 5
+
+dynamodb = boto3.resource('dynamodb')
+snapshot_cache = TTLCache(maxsize=SNAPSHOT_CACHE_SIZE, ttl=SNAPSHOT_CACHE_TTL)
+deserializer = TypeDeserializer()
+
+
+def compile_menu(version, items):
+    """Serialize a menu once, in the exact shape LF3 returns."""
+    items = sorted(items, key=lambda item: (item.get('item_name') or '', item.get('item_id') or ''))
+    return dumps({'menu': items, 'version': version})
+
+
+def query_menu_items(restaurant_id):
+    """Read every menu item of a restaurant from the restaurant_id index."""
+    table = dynamodb.Table(MENU_TABLE_NAME)
+    query_kwargs = {
+        'IndexName': MENU_INDEX_NAME,
+        'KeyConditionExpression': Key('restaurant_id').eq(restaurant_id)
+    }
+    items = []
+    while True:
+        response = table.query(**query_kwargs)
+        items.extend(response.get('Items', []))
+        last_evaluated_key = response.get('LastEvaluatedKey')
+        if not last_evaluated_key:
+            return items
+        query_kwargs['ExclusiveStartKey'] = last_evaluated_key
+
+
+def write_snapshot(restaurant_id, previous_version, items):
+    """
+    Store a new snapshot version, only if nobody else has written since
+    `previous_version` was read (None when no snapshot existed).
+    Raises ConditionalCheckFailedException otherwise.
+    """
+    version = (previous_version or 0) + 1
+    snapshot = {
+        'restaurant_id': restaurant_id,
+        'version': version,
+        'item_count': len(items),
+        'built_at': int(time.time()),
+        'menu_json': compile_menu(version, items)
+    }
+    if previous_version is None:
+        condition = {'ConditionExpression': 'attribute_not_exists(restaurant_id)'}
+    else:
+        condition = {
+            'ConditionExpression': 'version = :previous',
+            'ExpressionAttributeValues': {':previous': previous_version}
+        }
+    dynamodb.Table(SNAPSHOT_TABLE_NAME).put_item(Item=snapshot, **condition)
+    snapshot_cache.set(restaurant_id, snapshot)
+    return snapshot
+
+
+def build_unstored_snapshot(restaurant_id):
+    """
+    Compile a snapshot from Menu_Items for a restaurant that has none stored,
+    without writing it: only LF19 and database/backfill_menu_snapshots.py store
+    snapshots, so a request for an unknown restaurant costs reads only. It is
+    version 0, and cached in memory only when the menu has items.
+    """
+    items = query_menu_items(restaurant_id)
+    snapshot = {
+        'restaurant_id': restaurant_id,
+        'version': 0,
+        'item_count': len(items),
+        'built_at': int(time.time()),
+        'menu_json': compile_menu(0, items)
+    }
+    if items:
+        snapshot_cache.set(restaurant_id, snapshot)
+    return snapshot
+
+
+def normalize_snapshot(snapshot):
+    if snapshot:
+        snapshot['version'] = int(snapshot['version'])
+        snapshot['item_count'] = int(snapshot['item_count'])
+    return snapshot
+
+
+def read_stored_snapshot(restaurant_id):
+    response = dynamodb.Table(SNAPSHOT_TABLE_NAME).get_item(Key={'restaurant_id': restaurant_id})
+    return normalize_snapshot(response.get('Item'))
+
+
+def is_write_conflict(error):
+    return error.response['Error']['Code'] == 'ConditionalCheckFailedException'
+
+
+def rebuild_menu_snapshot(restaurant_id):
+    """Rebuild a restaurant's snapshot from Menu_Items and store it as the next version."""
+    for _ in range(MAX_WRITE_ATTEMPTS):
+        stored = read_stored_snapshot(restaurant_id)
+        try:
+            return write_snapshot(restaurant_id, stored and stored['version'], query_menu_items(restaurant_id))
+        except ClientError as e:
+            if not is_write_conflict(e):
+                raise
+    raise RuntimeError(f"Could not rebuild menu snapshot for {restaurant_id}: too many concurrent writers")
+
+
+def get_menu_snapshot(restaurant_id):
+    """
+    Return the current snapshot for a restaurant: from memory when warm,
+    otherwise one GetItem on the snapshot table. A restaurant without a stored
+    snapshot gets an unstored one built from Menu_Items.
+    """
+    snapshot = snapshot_cache.get(restaurant_id)
+    if snapshot is not None:
+        return snapshot
+
+    snapshot = read_stored_snapshot(restaurant_id)
+    if snapshot is None:
+        return build_unstored_snapshot(restaurant_id)
+    snapshot_cache.set(restaurant_id, snapshot)
+    return snapshot
+
+
+def get_menu_snapshots(restaurant_ids):
+    """
+    Snapshots for many restaurants as {restaurant_id: snapshot}: warm entries
+    from memory, the rest with one BatchGetItem per 100 restaurants. Restaurants
+    without a stored snapshot get an unstored one built from Menu_Items.
+    """
+    snapshots = {}
+    missing = []
+    for restaurant_id in dict.fromkeys(restaurant_ids):
+        snapshot = snapshot_cache.get(restaurant_id)
+        if snapshot is None:
+            missing.append(restaurant_id)
+        else:
+            snapshots[restaurant_id] = snapshot
+
+    if missing:
+        stored = batch_get_items(dynamodb, SNAPSHOT_TABLE_NAME, [{'restaurant_id': restaurant_id} for restaurant_id in missing])
+        for restaurant_id, snapshot in zip(missing, stored):
+            if snapshot is None:
+                snapshot = build_unstored_snapshot(restaurant_id)
+            else:
+                snapshot_cache.set(restaurant_id, normalize_snapshot(snapshot))
+            snapshots[restaurant_id] = snapshot
+    return snapshots
+
+
+def apply_menu_changes(restaurant_id, changes):
+    """
+    Patch a stored snapshot with Menu_Items stream changes instead of re-reading
+    the menu. `changes` is a list of (item_id, item) pairs in stream order, where
+    item is None for a removed item. Falls back to a full rebuild when the
+    restaurant has no snapshot yet.
+    """
+    for _ in range(MAX_WRITE_ATTEMPTS):
+        stored = read_stored_snapshot(restaurant_id)
+        if stored is None:
+            return rebuild_menu_snapshot(restaurant_id)
+
+        items = {item['item_id']: item for item in json.loads(stored['menu_json'])['menu']}
+        for item_id, item in changes:
+            if item is None:
+                items.pop(item_id, None)
+            else:
+                items[item_id] = item
+        try:
+            return write_snapshot(restaurant_id, stored['version'], list(items.values()))
+        except ClientError as e:
+            if not is_write_conflict(e):
+                raise
+    raise RuntimeError(f"Could not update menu snapshot for {restaurant_id}: too many concurrent writers")
+
+
+def menu_changes_from_stream(records):
+    """
+    Group Menu_Items stream records by restaurant: {restaurant_id: [(item_id, item)]}.
+    REMOVE records need the OldImage, so the stream must use NEW_AND_OLD_IMAGES.
+    """
+    changes = {}
+    for record in records:
+        change = record['dynamodb']
+        if record['eventName'] == 'REMOVE':
+            image = change.get('OldImage')
+            if not image:
+                print(f"Skipping menu snapshot update, no OldImage for {change.get('Keys')}")
+                continue
+            item = None
+        else:
+            image = change['NewImage']
+            item = {name: deserializer.deserialize(value) for name, value in image.items()}
+        restaurant_id = image['restaurant_id']['S']
+        item_id = image['item_id']['S']
+        changes.setdefault(restaurant_id, []).append((item_id, item))
+    return changes
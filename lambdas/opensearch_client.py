@@ -0,0 +1,112 @@
+import json
+import os
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Domain and credentials come only from the environment; nothing is defaulted
+OPENSEARCH_ENDPOINT = os.getenv("OPENSEARCH_ENDPOINT")
+OPENSEARCH_USERNAME = os.getenv("OPENSEARCH_USERNAME")
+OPENSEARCH_PASSWORD = os.getenv("OPENSEARCH_PASSWORD")
+
+# Requests are signed with the handler's AWS4Auth (the Lambda role). "basic"
+# opts into the master user above instead
+OPENSEARCH_AUTH = os.getenv("OPENSEARCH_AUTH", "sigv4")
+
+# (connect, read) timeouts in seconds, overridable per call
+DEFAULT_TIMEOUT = (2, 5)
+
+# Document ids per _mget request
+MGET_CHUNK_SIZE = 100
+
+
+def pooled_session(max_retries):
+    pooled = requests.Session()
+    pooled.headers.update({"Content-Type": "application/json"})
+    pooled.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=max_retries))
+    return pooled
+
+
+# One pooled keep-alive session per container: warm invocations reuse the
+# TCP/TLS connections to the domain instead of handshaking on every query.
+# Retries cover 502/503/504 as well as connect and read timeouts.
+session = pooled_session(
+    Retry(total=2, backoff_factor=0.1, status_forcelist=(502, 503, 504), allowed_methods=None)
+)
+# Single attempt, for callers with a fallback of their own (retry=False): a
+# timeout surfaces after one connect + read timeout instead of three
+fail_fast_session = pooled_session(0)
+
+
+class OpenSearchClient:
+    """
+    Thin wrapper over the shared session for the FeastFleet OpenSearch domain.
+    Requests are signed with `sigv4_auth`, the handler's AWS4Auth object.
+    Basic auth is used only with OPENSEARCH_AUTH=basic. Raises RuntimeError
+    when the endpoint or the chosen credentials are not configured.
+    """
+
+    def __init__(self, endpoint=None, sigv4_auth=None, timeout=DEFAULT_TIMEOUT):
+        endpoint = endpoint or OPENSEARCH_ENDPOINT
+        if not endpoint:
+            raise RuntimeError("OPENSEARCH_ENDPOINT is not set")
+        self.endpoint = endpoint.rstrip("/")
+        self.timeout = timeout
+        if OPENSEARCH_AUTH == "basic":
+            if not (OPENSEARCH_USERNAME and OPENSEARCH_PASSWORD):
+                raise RuntimeError("OPENSEARCH_AUTH=basic needs OPENSEARCH_USERNAME and OPENSEARCH_PASSWORD")
+            self.auth = (OPENSEARCH_USERNAME, OPENSEARCH_PASSWORD)
+        elif sigv4_auth is not None:
+            self.auth = sigv4_auth
+        else:
+            raise RuntimeError("No OpenSearch credentials: pass sigv4_auth or set OPENSEARCH_AUTH=basic")
+
+    def request(self, method, path, body=None, timeout=None, retry=True):
+        """
+        Send a request to the domain and return the decoded JSON response.
+        Raises requests.HTTPError for non-2xx responses. `retry=False` makes a
+        single attempt.
+        """
+        response = (session if retry else fail_fast_session).request(
+            method,
+            f"{self.endpoint}/{path.lstrip('/')}",
+            auth=self.auth,
+            data=json.dumps(body) if body is not None else None,
+            timeout=timeout or self.timeout
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def search(self, index, query, timeout=None, retry=True):
+        """Run a _search request against `index`."""
+        return self.request("POST", f"{index}/_search", query, timeout=timeout, retry=retry)
+
+    def get_document(self, index, doc_id, timeout=None):
+        """Return the _source of a document, or None if it does not exist."""
+        try:
+            response_json = self.request("GET", f"{index}/_doc/{doc_id}", timeout=timeout)
+        except requests.HTTPError as e:
+            if e.response is not None and e.response.status_code == 404:
+                return None
+            raise
+        return response_json.get("_source")
+
+    def multi_get(self, index, doc_ids, source=None, timeout=None):
+        """
+        Fetch many documents with _mget, MGET_CHUNK_SIZE ids per request.
+        Returns each document's _source in the order of `doc_ids` (None if missing).
+        `source` optionally limits the returned fields.
+        """
+        unique_ids = list(dict.fromkeys(doc_ids))
+        found = {}
+        for start in range(0, len(unique_ids), MGET_CHUNK_SIZE):
+            body = {"ids": unique_ids[start:start + MGET_CHUNK_SIZE]}
+            path = f"{index}/_mget"
+            if source:
+                path += "?_source=" + ",".join(source)
+            response_json = self.request("POST", path, body, timeout=timeout)
+            for doc in response_json.get("docs", []):
+                if doc.get("found"):
+                    found[doc["_id"]] = doc.get("_source")
+        return [found.get(doc_id) for doc_id in doc_ids]
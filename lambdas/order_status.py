@@ -0,0 +1,56 @@
+from botocore.exceptions import ClientError
+
+# Order lifecycle, in order; a status's position is its sequence number
+ORDER_STATUSES = ["PLACED", "PREPARING", "READY_FOR_PICKUP", "OUT_FOR_DELIVERY", "DELIVERED"]
+STATUS_SEQUENCE = {status: sequence for sequence, status in enumerate(ORDER_STATUSES)}
+
+# The status LF7 creates orders in. Its message is applied once, to acknowledge the new order
+INITIAL_STATUS = "PLACED"
+
+# Declared transitions: status -> statuses it may move to
+ORDER_TRANSITIONS = {
+    "PLACED": ["PREPARING"],
+    "PREPARING": ["READY_FOR_PICKUP"],
+    "READY_FOR_PICKUP": ["OUT_FOR_DELIVERY"],
+    "OUT_FOR_DELIVERY": ["DELIVERED"],
+    "DELIVERED": [],
+}
+
+
+def allowed_from(new_status):
+    """Statuses an order must be in for `new_status` to be applied."""
+    if new_status == INITIAL_STATUS:
+        return [INITIAL_STATUS]
+    return [status for status, targets in ORDER_TRANSITIONS.items() if new_status in targets]
+
+
+def apply_transition(order_table, order_id, new_status, timestamp):
+    """
+    Move an order to `new_status` with one conditional UpdateItem: the current
+    status must be a declared predecessor and the stored status_seq lower than
+    the new status's sequence. The transition time goes to status_updated_at;
+    timestamp keeps the placement time. Returns False, without writing, when
+    the order is elsewhere (a duplicate or out-of-order delivery). Raises
+    ValueError for statuses outside the lifecycle.
+    """
+    if new_status not in STATUS_SEQUENCE:
+        raise ValueError(f"Unknown order status {new_status}")
+    predecessors = allowed_from(new_status)
+    placeholders = [f":from{i}" for i in range(len(predecessors))]
+    values = dict(zip(placeholders, predecessors))
+    values.update({":new_status": new_status, ":timestamp": timestamp, ":seq": STATUS_SEQUENCE[new_status]})
+    try:
+        order_table.update_item(
+            Key={"order_id": order_id},
+            UpdateExpression="SET #s = :new_status, status_updated_at = :timestamp, status_seq = :seq",
+            # Orders from before the state machine have no status_seq yet
+            ConditionExpression=f"#s IN ({', '.join(placeholders)}) "
+                                "AND (attribute_not_exists(status_seq) OR status_seq < :seq)",
+            ExpressionAttributeNames={"#s": "status"},
+            ExpressionAttributeValues=values
+        )
+        return True
+    except ClientError as e:
+        if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+            return False
+        raise
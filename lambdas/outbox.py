@@ -0,0 +1,133 @@
+import json
+import os
+import time
+import uuid
+
+import boto3
+from boto3.dynamodb.types import TypeSerializer
+from dynamo_batch import batch_get_items
+
+OUTBOX_TABLE_NAME = os.getenv('OUTBOX_TABLE', 'Order_Outbox')
+
+# SendMessageBatch takes at most 10 entries; a transaction at most 100 items
+SEND_BATCH_LIMIT = 10
+TRANSACTION_LIMIT = 100
+
+# The sweeper only picks up records the stream relay should already have sent
+SWEEP_AFTER_SECONDS = int(os.getenv('OUTBOX_SWEEP_AFTER_SECONDS', '120'))
+
+dynamodb = boto3.resource('dynamodb')
+dynamodb_client = boto3.client('dynamodb')
+outbox_table = dynamodb.Table(OUTBOX_TABLE_NAME)
+serializer = TypeSerializer()
+
+
+def outbox_record(queue_url, message, message_attributes=None):
+    """
+    An outbox row for one SQS message: written in the same transaction as the
+    state change it announces, published later by the relay.
+    """
+    record = {
+        'message_id': str(uuid.uuid4()),
+        'queue_url': queue_url,
+        'body': json.dumps(message),
+        'created_at': int(time.time())
+    }
+    if message_attributes:
+        record['message_attributes'] = message_attributes
+    return record
+
+
+def typed(item):
+    return {name: serializer.serialize(value) for name, value in item.items()}
+
+
+def put_with_outbox(table_name, item, records):
+    """
+    Write `item` to `table_name` and its outbox `records` in one DynamoDB
+    transaction: either the row and all of its messages are stored, or nothing is.
+    """
+    if len(records) + 1 > TRANSACTION_LIMIT:
+        raise ValueError(f"At most {TRANSACTION_LIMIT - 1} outbox records per transaction")
+    dynamodb_client.transact_write_items(TransactItems=[
+        {'Put': {'TableName': table_name, 'Item': typed(item)}}
+    ] + [
+        {'Put': {'TableName': OUTBOX_TABLE_NAME, 'Item': typed(record),
+                 'ConditionExpression': 'attribute_not_exists(message_id)'}}
+        for record in records
+    ])
+
+
+def send_entry(record):
+    entry = {'Id': record['message_id'], 'MessageBody': record['body']}
+    if record.get('message_attributes'):
+        entry['MessageAttributes'] = record['message_attributes']
+    return entry
+
+
+def publish(sqs, records):
+    """
+    Send outbox records to their queues with SendMessageBatch, 10 per call, and
+    delete the ones SQS accepted. Returns the message_ids that were not sent;
+    they stay in the outbox for the next attempt.
+    """
+    by_queue = {}
+    for record in records:
+        by_queue.setdefault(record['queue_url'], []).append(record)
+
+    sent = []
+    failed = []
+    for queue_url, queue_records in by_queue.items():
+        for start in range(0, len(queue_records), SEND_BATCH_LIMIT):
+            chunk = queue_records[start:start + SEND_BATCH_LIMIT]
+            try:
+                response = sqs.send_message_batch(QueueUrl=queue_url, Entries=[send_entry(record) for record in chunk])
+            except Exception as e:
+                print(f"SendMessageBatch to {queue_url} failed: {e}")
+                failed.extend(record['message_id'] for record in chunk)
+                continue
+            for failure in response.get('Failed', []):
+                print(f"Outbox message {failure['Id']} not sent: {failure.get('Code')} {failure.get('Message')}")
+            failed_ids = {failure['Id'] for failure in response.get('Failed', [])}
+            failed.extend(failed_ids)
+            sent.extend(record['message_id'] for record in chunk if record['message_id'] not in failed_ids)
+
+    # Delivery is at least once: a crash before this delete resends these messages
+    with outbox_table.batch_writer() as batch:
+        for message_id in sent:
+            batch.delete_item(Key={'message_id': message_id})
+    return failed
+
+
+def unsent(records):
+    """
+    The records whose outbox row still exists, checked with one consistent
+    BatchGetItem per 100 records. A sent record's row has been deleted, so
+    records replayed by a retried stream batch are left out.
+    """
+    if not records:
+        return []
+    keys = [{'message_id': record['message_id']} for record in records]
+    stored = batch_get_items(dynamodb, OUTBOX_TABLE_NAME, keys, attributes=['message_id'], consistent_read=True)
+    return [record for record, row in zip(records, stored) if row is not None]
+
+
+def pending_records(older_than_seconds=None):
+    """Outbox records left behind by failed relay runs, oldest first."""
+    if older_than_seconds is None:
+        older_than_seconds = SWEEP_AFTER_SECONDS
+    cutoff = int(time.time()) - older_than_seconds
+    scan_kwargs = {
+        'FilterExpression': 'created_at < :cutoff',
+        'ExpressionAttributeValues': {':cutoff': cutoff}
+    }
+    records = []
+    while True:
+        response = outbox_table.scan(**scan_kwargs)
+        records.extend(response.get('Items', []))
+        last_evaluated_key = response.get('LastEvaluatedKey')
+        if not last_evaluated_key:
+            break
+        scan_kwargs['ExclusiveStartKey'] = last_evaluated_key
+    records.sort(key=lambda record: record['created_at'])
+    return records
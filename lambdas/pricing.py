@@ -0,0 +1,153 @@
+import json
+import math
+import os
+from array import array
+from decimal import Decimal, ROUND_HALF_UP
+from operator import mul
+
+from menu_snapshot import get_menu_snapshots
+from ttl_cache import TTLCache
+
+# Rates are parts per million so tax stays integer arithmetic (8.875% -> 88750)
+TAX_RATE = Decimal(os.getenv('TAX_RATE', '0'))
+TAX_RATE_PPM = int(TAX_RATE * 1000000)
+DELIVERY_FEE = Decimal(os.getenv('DELIVERY_FEE', '0'))
+DELIVERY_FEE_CENTS = int((DELIVERY_FEE * 100).to_integral_value(ROUND_HALF_UP))
+
+# Parsed menu prices per (restaurant_id, snapshot version); versions never change
+PRICE_CACHE_SIZE = int(os.getenv('PRICE_CACHE_SIZE', '256'))
+price_cache = TTLCache(maxsize=PRICE_CACHE_SIZE, ttl=24 * 3600)
+
+CENT = Decimal('0.01')
+
+
+class UnknownMenuItem(ValueError):
+    """An ordered item_id is not on the restaurant's current menu."""
+
+
+def to_cents(value):
+    """Money (Decimal, int, float or numeric string) in dollars -> integer cents, rounded half up."""
+    if isinstance(value, float):
+        return math.floor(value * 100 + 0.5)
+    if isinstance(value, int):
+        return value * 100
+    if not isinstance(value, Decimal):
+        value = Decimal(value)
+    cents = value * 100
+    whole = int(cents)
+    if whole == cents:
+        return whole
+    return int(cents.to_integral_value(ROUND_HALF_UP))
+
+
+def from_cents(cents):
+    """Integer cents -> Decimal dollars with two places, for DynamoDB and responses."""
+    return Decimal(cents).scaleb(-2).quantize(CENT)
+
+
+def format_cents(cents):
+    return f"{cents // 100}.{cents % 100:02d}" if cents >= 0 else "-" + format_cents(-cents)
+
+
+def rate_of(cents, ppm):
+    """`ppm` parts per million of an amount, rounded half up."""
+    return (cents * ppm + 500000) // 1000000
+
+
+def price_lines(unit_cents, quantities, tax_ppm=None, delivery_fee_cents=None):
+    """
+    Price a cart held as two parallel integer arrays. Returns line totals,
+    subtotal, tax, fees and total, all in cents.
+    """
+    line_totals = array('q', map(mul, unit_cents, quantities))
+    subtotal = sum(line_totals)
+    tax = rate_of(subtotal, TAX_RATE_PPM if tax_ppm is None else tax_ppm)
+    if delivery_fee_cents is None:
+        delivery_fee_cents = DELIVERY_FEE_CENTS
+    fees = delivery_fee_cents if subtotal else 0
+    return {
+        'line_totals': line_totals,
+        'subtotal': subtotal,
+        'tax': tax,
+        'fees': fees,
+        'total': subtotal + tax + fees
+    }
+
+
+def parse_menu_prices(snapshot):
+    """{item_id: (item_name, price_cents)} from a compiled menu snapshot."""
+    menu = json.loads(snapshot['menu_json'])['menu']
+    return {item['item_id']: (item.get('item_name'), to_cents(item.get('price', 0))) for item in menu}
+
+
+def menu_prices_for(restaurant_ids):
+    """
+    Price tables for many restaurants: snapshots not already parsed in this
+    container are fetched with one batch lookup, then parsed once per version.
+    """
+    snapshots = get_menu_snapshots(restaurant_ids)
+    prices = {}
+    for restaurant_id, snapshot in snapshots.items():
+        key = (restaurant_id, snapshot['version'])
+        prices[restaurant_id] = price_cache.get_or_load(key, lambda: parse_menu_prices(snapshot))
+    return prices
+
+
+def reprice_items(prices, items):
+    """
+    Price `items` ([{item_id, quantity}]) against one restaurant's price table.
+    Adds item_ids, names and unit prices (cents) to the price_lines() result.
+    """
+    item_ids = [item['item_id'] for item in items]
+    try:
+        entries = [prices[item_id] for item_id in item_ids]
+    except KeyError as e:
+        raise UnknownMenuItem(f"item {e.args[0]} is not on the menu") from None
+    quantities = array('q', [int(item['quantity']) for item in items])
+    if quantities and min(quantities) <= 0:
+        raise ValueError(f"invalid quantity {min(quantities)} in order")
+
+    names = [entry[0] for entry in entries]
+    unit_cents = array('q', [entry[1] for entry in entries])
+    priced = price_lines(unit_cents, quantities)
+    priced.update(item_ids=item_ids, names=names, unit_cents=unit_cents, quantities=quantities)
+    return priced
+
+
+def reprice_cart(restaurant_id, items):
+    """Re-price one cart or order from the restaurant's current menu snapshot."""
+    return reprice_items(menu_prices_for([restaurant_id])[restaurant_id], items)
+
+
+def reprice_carts(carts):
+    """
+    Re-price many (restaurant_id, items) carts in bulk. Every restaurant's menu
+    is looked up once for the whole batch, and all lines are priced together
+    in flat integer arrays. Returns {subtotal, tax, fees, total} per cart (in
+    cents), in input order.
+    """
+    prices = menu_prices_for({restaurant_id for restaurant_id, _ in carts})
+    unit_cents = array('q')
+    quantities = array('q')
+    ends = []
+    for restaurant_id, items in carts:
+        restaurant_prices = prices[restaurant_id]
+        try:
+            unit_cents.extend([restaurant_prices[item['item_id']][1] for item in items])
+        except KeyError as e:
+            raise UnknownMenuItem(f"item {e.args[0]} is not on the menu of {restaurant_id}") from None
+        quantities.extend([int(item['quantity']) for item in items])
+        ends.append(len(unit_cents))
+    if quantities and min(quantities) <= 0:
+        raise ValueError(f"invalid quantity {min(quantities)} in carts")
+
+    line_totals = array('q', map(mul, unit_cents, quantities))
+    results = []
+    start = 0
+    for end in ends:
+        subtotal = sum(line_totals[start:end])
+        tax = rate_of(subtotal, TAX_RATE_PPM)
+        fees = DELIVERY_FEE_CENTS if subtotal else 0
+        results.append({'subtotal': subtotal, 'tax': tax, 'fees': fees, 'total': subtotal + tax + fees})
+        start = end
+    return results
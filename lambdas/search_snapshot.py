@@ -0,0 +1,39 @@
+import gzip
+import json
+import os
+
+import boto3
+
+# Written by database/export_search_snapshot.py:
+# gzipped JSON {"version": 1, "fields": [...], "rows": [[...], ...]}
+SNAPSHOT_VERSION = 1
+
+SNAPSHOT_PATH = os.getenv(
+    'SEARCH_SNAPSHOT_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'restaurants_snapshot.json.gz')
+)
+SNAPSHOT_BUCKET = os.getenv('SEARCH_SNAPSHOT_BUCKET')
+SNAPSHOT_KEY = os.getenv('SEARCH_SNAPSHOT_KEY', 'search/restaurants_snapshot.json.gz')
+
+
+def read_snapshot(path):
+    """Return the restaurant documents stored in a snapshot file."""
+    with gzip.open(path, "rt", encoding="utf-8") as snapshot_file:
+        snapshot = json.load(snapshot_file)
+    if snapshot.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported search snapshot version: {snapshot.get('version')}")
+
+    columns = snapshot["fields"]
+    return [dict(zip(columns, row)) for row in snapshot["rows"]]
+
+
+def load_snapshot_documents(path=SNAPSHOT_PATH, bucket=SNAPSHOT_BUCKET, key=SNAPSHOT_KEY):
+    """
+    Read the snapshot bundled with the function, or download it to /tmp from
+    S3 when it is not bundled and a bucket is configured.
+    """
+    if not os.path.exists(path) and bucket:
+        path = os.path.join('/tmp', os.path.basename(key))
+        if not os.path.exists(path):
+            boto3.client('s3').download_file(bucket, key, path)
+    return read_snapshot(path)
@@ -0,0 +1,61 @@
+import json
+import os
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+# Records with different keys run concurrently on this many threads
+CONSUMER_WORKERS = int(os.getenv('CONSUMER_WORKERS', '8'))
+executor = ThreadPoolExecutor(max_workers=CONSUMER_WORKERS)
+
+
+def group_by_key(records, key):
+    """
+    [(key, [(record, message)])] in order of first appearance, keeping the
+    batch order within each key. Records whose body or key cannot be read are
+    returned separately as failures.
+    """
+    groups = {}
+    unreadable = []
+    for record in records:
+        try:
+            message = json.loads(record['body'])
+            groups.setdefault(key(message), []).append((record, message))
+        except Exception as e:
+            print(f"Unreadable message {record.get('messageId')}: {e}")
+            unreadable.append(record)
+    return list(groups.items()), unreadable
+
+
+def process_group(group_key, entries, process):
+    """
+    Process one key's records in order. After a failure the rest of the key's
+    records are not attempted and fail too, so they are redelivered after the
+    one they must follow. Returns the failed records.
+    """
+    for position, (record, message) in enumerate(entries):
+        try:
+            process(message, record)
+        except Exception:
+            print(f"Failed to process message {record['messageId']} (key {group_key}):\n{traceback.format_exc()}")
+            return [failed for failed, _ in entries[position:]]
+    return []
+
+
+def consume(event, process, key):
+    """
+    Run `process(message, record)` for every record of an SQS event and report
+    only the failed ones, for an event source mapping with
+    ReportBatchItemFailures. `message` is the parsed JSON body.
+
+    Records sharing `key(message)` run one after another in batch order;
+    different keys run in parallel on the shared pool. One bad record no longer
+    fails or drops the rest of the batch: it is returned in batchItemFailures
+    and redelivered alone (and moved to the DLQ by the queue's redrive policy).
+    """
+    groups, failed = group_by_key(event.get('Records', []), key)
+    futures = [executor.submit(process_group, group_key, entries, process) for group_key, entries in groups]
+    for future in futures:
+        failed.extend(future.result())
+    if failed:
+        print(f"{len(failed)} of {len(event.get('Records', []))} messages failed")
+    return {'batchItemFailures': [{'itemIdentifier': record['messageId']} for record in failed]}
@@ -0,0 +1,120 @@
+import heapq
+import math
+import re
+import unicodedata
+from array import array
+from collections import Counter, defaultdict
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Candidates scored per requested result, before the final similarity ranking
+CANDIDATES_PER_RESULT = 10
+MIN_CANDIDATES = 100
+
+
+def normalize_name(name):
+    """Lowercase, strip accents and punctuation, collapse whitespace."""
+    if not name:
+        return ""
+    name = unicodedata.normalize("NFKD", str(name)).encode("ascii", "ignore").decode("ascii")
+    return " ".join(WORD_PATTERN.findall(name.lower().replace("'", "")))
+
+
+def trigrams(name):
+    """
+    Character trigrams of each word, padded like pg_trgm ("  ab", " abc", "bc ")
+    so short words and word boundaries still produce grams.
+    """
+    grams = set()
+    for word in normalize_name(name).split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class TrigramIndex:
+    """
+    Precomputed character-trigram index over restaurant names for typo-tolerant
+    lookups ("chipolte" -> "Chipotle"). Candidates are the names sharing the most
+    trigrams with the query, so cost depends on the postings touched rather than
+    on catalog size.
+    """
+
+    def __init__(self):
+        self.doc_ids = []
+        self.names = []
+        self.documents = []
+        self.gram_counts = array("H")
+        # trigram -> doc indexes containing it
+        self.postings = defaultdict(lambda: array("I"))
+        # normalized name -> doc indexes, for exact matches without scoring
+        self.exact = defaultdict(list)
+
+    def add(self, doc_id, name, document=None):
+        doc_index = len(self.doc_ids)
+        grams = trigrams(name)
+        self.doc_ids.append(doc_id)
+        self.names.append(name)
+        self.documents.append(document)
+        self.gram_counts.append(min(len(grams), 0xFFFF))
+        for gram in grams:
+            self.postings[gram].append(doc_index)
+        self.exact[normalize_name(name)].append(doc_index)
+
+    def __len__(self):
+        return len(self.doc_ids)
+
+    def search(self, query, size=5, min_score=0.45):
+        """
+        Return up to `size` (doc_id, score, document) tuples, best first.
+
+        The score is the share of the query's trigrams found in the name, so a
+        misspelled word still matches inside a longer name; ties go to the name
+        closest in overall trigram similarity (shorter, tighter names).
+        """
+        query_grams = trigrams(query)
+        if not query_grams:
+            return []
+
+        # A name sharing at least `required` grams with the query must appear in one
+        # of the (n - required + 1) rarest posting lists, so the most common grams
+        # never need to be scanned to find candidates.
+        query_count = len(query_grams)
+        required = max(1, math.ceil(min_score * query_count))
+        rarest = sorted((len(self.postings.get(gram, ())), gram) for gram in query_grams)
+        shared = Counter()
+        for _, gram in rarest[:query_count - required + 1]:
+            postings = self.postings.get(gram)
+            if postings:
+                shared.update(postings)
+
+        # Re-count the best partial matches exactly against their own trigrams
+        scored = []
+        for doc_index, _ in shared.most_common(max(size * CANDIDATES_PER_RESULT, MIN_CANDIDATES)):
+            count = len(query_grams & trigrams(self.names[doc_index]))
+            if count < required:
+                continue
+            similarity = count / (query_count + self.gram_counts[doc_index] - count)
+            scored.append((count / query_count, similarity, doc_index))
+
+        best = heapq.nlargest(size, scored)
+        return [(self.doc_ids[doc_index], round(coverage, 4), self.documents[doc_index])
+                for coverage, _, doc_index in best]
+
+    def lookup(self, name, min_score=0.45):
+        """
+        Resolve a free-text name to a single doc_id: exact normalized match
+        first, otherwise the best fuzzy candidate above `min_score`.
+        """
+        exact = self.exact.get(normalize_name(name))
+        if exact:
+            return self.doc_ids[exact[0]]
+        matches = self.search(name, size=1, min_score=min_score)
+        return matches[0][0] if matches else None
+
+    @classmethod
+    def from_documents(cls, documents, id_field="restaurant_id", name_field="name"):
+        index = cls()
+        for document in documents:
+            index.add(document[id_field], document.get(name_field), document)
+        return index